@@ -1 +1 @@
-from .database import createDB, createSession, engine
\ No newline at end of file
+from .database import createDB, createSession, engine, async_engine, pool_stats
\ No newline at end of file
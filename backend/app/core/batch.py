@@ -0,0 +1,153 @@
+"""
+Set-based bulk writes behind POST /recipes/batch.
+
+A batch costs a fixed number of statements however many recipes it holds: one
+SELECT ... IN per lookup (authors, cuisines, existing recipes, names), one
+INSERT ... RETURNING for names seen for the first time, then one executemany
+INSERT per table for the recipes and their link rows. Everything runs in the
+caller's transaction, so an importer commits once per batch, not once per row.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..models.recipe import Recipe
+from ..models.user import User
+from ..models.cuisine import Cuisine
+from ..models.ingredient import Ingredient, RecipeIngredient
+from ..models.instructions import Instruction
+from ..models.tag import Tag, RecipeTag
+from ..models.diet import Diet, RecipeDiet
+from ..schemas.recipe_schema import BatchRecipe, BatchItemResult, CreateRecipeBase
+
+CHUNK_SIZE = 500  # values per IN (...), well below SQLite's bound parameter limit
+
+# link tables rewritten when a recipe is replaced
+RECIPE_LISTS = (RecipeIngredient, Instruction, RecipeTag, RecipeDiet)
+
+
+def _chunks(values: List, size: int = CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _names(values: Iterable[str]) -> List[str]:
+    """Stripped, non-empty and de-duplicated, first occurrence wins."""
+    return list(dict.fromkeys(name.strip() for name in values if name and name.strip()))
+
+
+async def insert_returning_ids(session: AsyncSession, model, rows: List[dict]) -> List[int]:
+    """Insert `rows` with executemany; returns the new ids in the order of `rows`."""
+    table = model.__table__
+    if session.get_bind().dialect.name == "sqlite":
+        # SQLite can only keep RETURNING in parameter order by inserting row by
+        # row. It hands out INTEGER PRIMARY KEY values in increasing order though
+        # (max + 1), so the sorted ids of a batched insert line up with `rows`
+        result = await session.exec(insert(table).returning(table.c.id), params=rows)
+        return sorted(result.scalars())
+    result = await session.exec(insert(table).returning(table.c.id, sort_by_parameter_order=True), params=rows)
+    return list(result.scalars())
+
+
+async def existing_ids(session: AsyncSession, column, ids: Iterable[int]) -> set:
+    found = set()
+    for chunk in _chunks(list(set(ids))):
+        found.update((await session.exec(select(column).where(column.in_(chunk)))).all())
+    return found
+
+
+async def get_or_create(session: AsyncSession, model, names: Iterable[str]) -> Dict[str, int]:
+    """Map each name to the id of its Ingredient/Tag/Diet row, inserting the missing ones."""
+    wanted = _names(names)
+    ids = {}
+    for chunk in _chunks(wanted):
+        rows = await session.exec(select(model.name, model.id).where(model.name.in_(chunk)).order_by(model.id))
+        for name, row_id in rows:
+            ids.setdefault(name, row_id)  # the oldest row wins if a name is duplicated
+    missing = [name for name in wanted if name not in ids]
+    if missing:
+        created = await insert_returning_ids(session, model, [{"name": name} for name in missing])
+        ids.update(zip(missing, created))
+    return ids
+
+
+async def save_recipes(session: AsyncSession, recipes: List[BatchRecipe]) -> Tuple[List[BatchItemResult], Set[int]]:
+    """Create or replace every valid recipe.
+
+    Returns one result per input, in input order, and the ids of the users
+    whose recipe count may have changed (new authors and previous authors of
+    replaced recipes). Items with an unknown author, cuisine or recipe id are
+    reported as errors and skipped, as are repeats of a recipe id already in
+    the batch; the rest are written. The caller commits.
+    """
+    users = await existing_ids(session, User.id, (recipe.user_id for recipe in recipes))
+    cuisines = await existing_ids(session, Cuisine.id, (recipe.cuisine_id for recipe in recipes))
+    replaced = {}  # recipe id -> current author
+    for chunk in _chunks(list({recipe.id for recipe in recipes if recipe.id is not None})):
+        replaced.update((await session.exec(select(Recipe.id, Recipe.user_id).where(Recipe.id.in_(chunk)))).all())
+
+    results = [BatchItemResult(index=index, status="error") for index in range(len(recipes))]
+    valid = []
+    first_index = {}  # recipe id -> the item that replaces it, later ones are errors
+    for index, recipe in enumerate(recipes):
+        if recipe.user_id not in users:
+            results[index].detail = f"User {recipe.user_id} not found"
+        elif recipe.cuisine_id not in cuisines:
+            results[index].detail = f"Cuisine {recipe.cuisine_id} not found"
+        elif recipe.id is not None and recipe.id not in replaced:
+            results[index].detail = f"Recipe {recipe.id} not found"
+        elif recipe.id is not None and recipe.id in first_index:
+            results[index].detail = f"Recipe {recipe.id} is already replaced by item {first_index[recipe.id]}"
+        else:
+            if recipe.id is not None:
+                first_index[recipe.id] = index
+            valid.append(index)
+    if not valid:
+        return results, set()
+
+    ingredient_ids = await get_or_create(session, Ingredient, (item.name for i in valid for item in recipes[i].ingredients))
+    tag_ids = await get_or_create(session, Tag, (name for i in valid for name in recipes[i].tags))
+    diet_ids = await get_or_create(session, Diet, (name for i in valid for name in recipes[i].diets))
+
+    now = datetime.utcnow()
+    fields = CreateRecipeBase.model_fields.keys()
+    new = [i for i in valid if recipes[i].id is None]
+    if new:
+        rows = [{**recipes[i].model_dump(include=fields), "created_at": now, "updated_at": now} for i in new]
+        for i, recipe_id in zip(new, await insert_returning_ids(session, Recipe, rows)):
+            results[i].id, results[i].status = recipe_id, "created"
+    updated = [i for i in valid if recipes[i].id is not None]
+    if updated:
+        # bulk UPDATE by primary key, then the old lists are replaced wholesale
+        rows = [{**recipes[i].model_dump(include=fields), "id": recipes[i].id, "updated_at": now} for i in updated]
+        await session.exec(update(Recipe), params=rows)
+        for chunk in _chunks([recipes[i].id for i in updated]):
+            for model in RECIPE_LISTS:
+                await session.exec(delete(model).where(model.recipe_id.in_(chunk)))
+        for i in updated:
+            results[i].id, results[i].status = recipes[i].id, "updated"
+
+    ingredients, instructions, tags, diets = [], [], [], []
+    for i in valid:
+        recipe, recipe_id = recipes[i], results[i].id
+        seen = set()
+        for item in recipe.ingredients:
+            name = item.name.strip()
+            if name and name not in seen:  # (recipe_id, ingredient_id) is the primary key
+                seen.add(name)
+                ingredients.append({"recipe_id": recipe_id, "ingredient_id": ingredient_ids[name],
+                                    "quantity": item.quantity, "ord": len(seen)})
+        steps = [step.strip() for step in recipe.instructions if step and step.strip()]
+        instructions += [{"recipe_id": recipe_id, "step_number": number, "description": step}
+                         for number, step in enumerate(steps, start=1)]
+        tags += [{"recipe_id": recipe_id, "tag_id": tag_ids[name]} for name in _names(recipe.tags)]
+        diets += [{"recipe_id": recipe_id, "diet_id": diet_ids[name]} for name in _names(recipe.diets)]
+    for model, rows in ((RecipeIngredient, ingredients), (Instruction, instructions), (RecipeTag, tags), (RecipeDiet, diets)):
+        if rows:
+            # Core insert on the table: one executemany even where some values are None
+            await session.exec(insert(model.__table__), params=rows)
+    authors = {recipes[i].user_id for i in valid} | {replaced[recipes[i].id] for i in updated}
+    return results, authors
@@ -0,0 +1,186 @@
+"""
+Response cache for hot read endpoints.
+
+Entries hold the JSON-ready body of one response under a per-resource key
+(recipe:{id}, user:{id}, reviews:recipe:{id}?...) and can be grouped under a
+tag, so a write drops exactly the entries it made stale: a review write calls
+invalidate("recipe:7", "user:3") plus invalidate_tag("reviews:recipe:7") for
+every cached page of that recipe's reviews.
+
+MemoryCache (LRU + TTL, per process) is the default. RedisCache shares one
+cache between workers; it takes any client with redis.asyncio's get/set/
+delete/sadd/smembers/expire coroutines, so a local stand-in can replace Redis.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from . import config
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional, only needed for CACHE_BACKEND=redis
+    redis = None
+
+
+class Cache:
+    """Interface and shared hit/miss counters; NullCache when used as is."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, tags: Iterable[str] = ()):
+        pass
+
+    async def invalidate(self, *keys: str):
+        self.invalidations += len(keys)
+
+    async def invalidate_tag(self, *tags: str):
+        self.invalidations += len(tags)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class MemoryCache(Cache):
+    def __init__(self, max_entries: int, ttl: int):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags), oldest first
+        self._tags = {}  # tag -> keys stored under it
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    async def set(self, key, value, tags=()):
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tuple(tags))
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate(self, *keys):
+        for key in keys:
+            self._drop(key)
+        self.invalidations += len(keys)
+
+    async def invalidate_tag(self, *tags):
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._drop(key)
+        self.invalidations += len(tags)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        return {**super().stats(), "entries": len(self._entries), "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+class RedisCache(Cache):
+    def __init__(self, client, ttl: int, namespace: str = "recipes"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.namespace = namespace
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _tag(self, tag):
+        return f"{self.namespace}:tag:{tag}"
+
+    async def get(self, key):
+        raw = await self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key, value, tags=()):
+        await self.client.set(self._key(key), json.dumps(value), ex=self.ttl)
+        for tag in tags:
+            await self.client.sadd(self._tag(tag), self._key(key))
+            await self.client.expire(self._tag(tag), self.ttl)
+
+    async def invalidate(self, *keys):
+        if keys:
+            await self.client.delete(*(self._key(key) for key in keys))
+        self.invalidations += len(keys)
+
+    async def invalidate_tag(self, *tags):
+        for tag in tags:
+            members = await self.client.smembers(self._tag(tag))
+            await self.client.delete(self._tag(tag), *members)
+        self.invalidations += len(tags)
+
+
+def build_cache() -> Cache:
+    if config.CACHE_BACKEND == "memory":
+        return MemoryCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL)
+    if config.CACHE_BACKEND == "redis":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package (pip install redis)")
+        return RedisCache(redis.from_url(config.REDIS_URL), config.CACHE_TTL)
+    return Cache()
+
+
+cache = build_cache()
+
+
+def getCache() -> Cache:
+    # a dependency so tests or a stand-in backend can swap it via dependency_overrides
+    return cache
+
+
+# keys shared by the readers that fill the cache and the writers that invalidate it
+def recipe_key(recipe_id: int) -> str:
+    return f"recipe:{recipe_id}"
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def recipe_reviews_tag(recipe_id: int) -> str:
+    return f"reviews:recipe:{recipe_id}"
+
+
+def facets_key(signature: str) -> str:
+    # no invalidation: the signature covers the catalog snapshot the counts came from
+    return f"facets:{signature}"
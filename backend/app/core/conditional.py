@@ -0,0 +1,66 @@
+"""
+HTTP conditional requests: ETag / Last-Modified validators and 304 responses.
+
+Validators are derived from data the handler already has (Recipe.updated_at,
+a count, the few scalars of a profile) so a matching If-None-Match or
+If-Modified-Since is answered before the response body is ever built.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given values, e.g. make_etag("recipe", 7, updated_at)."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def http_date(moment: datetime) -> str:
+    # timestamps are stored as naive UTC
+    return format_datetime(moment.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False  # unparseable dates are ignored, as RFC 9110 asks
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole seconds only
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def validators(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(request: Request, response: Response, etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """A 304 if the client's copy is current, else None after adding the validators to `response`."""
+    headers = validators(etag, last_modified)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins; If-Modified-Since is only looked at without it
+        current = _etag_matches(if_none_match, etag)
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        current = _not_modified_since(request.headers["if-modified-since"], last_modified)
+    else:
+        current = False
+    if current:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,12 +1,176 @@
-from sqlmodel import SQLModel, create_engine, Session
+import logging
+import time
 
-DATABASE_URL = "sqlite:///database.db"
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-engine = create_engine(DATABASE_URL)
+from . import config
+from .migrations import upgradeDB
+from .querystats import current_stats
+
+logger = logging.getLogger("app.queries")
+
+DATABASE_URL = config.DATABASE_URL
+
+# async drivers for the same database; the routers only use these
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+def engine_options(url: str) -> dict:
+    options = {"echo": config.DATABASE_ECHO}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # in-memory databases live in a single connection, there is nothing to pool
+        return options
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+    )
+    if parsed.get_backend_name() != "sqlite":
+        # server connections can be dropped under us; files cannot
+        options["pool_pre_ping"] = True
+    return options
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in config.SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+# checkouts, connections opened and time connections spent checked out, per engine
+POOL_STATS = {}
+
+def track_pool(name: str, sync_engine):
+    stats = POOL_STATS[name] = {
+        "connects": 0,
+        "checkouts": 0,
+        "checked_out": 0,
+        "max_checked_out": 0,
+        "invalidations": 0,
+        "checkout_seconds": 0.0,
+    }
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats["connects"] += 1
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        stats["checkouts"] += 1
+        stats["checked_out"] += 1
+        stats["max_checked_out"] = max(stats["max_checked_out"], stats["checked_out"])
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            stats["checked_out"] -= 1
+            stats["checkout_seconds"] += time.perf_counter() - started
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats["invalidations"] += 1
+
+# dialect -> (EXPLAIN prefix, test of one plan row for a full table scan)
+EXPLAIN_PLANS = {
+    # SQLite rows are (id, parent, notused, detail); "SCAN recipe" reads the
+    # whole table, "SCAN recipe USING INDEX ..." walks an index and a VIRTUAL
+    # TABLE scan is FTS5 answering MATCH from its own index
+    "sqlite": ("EXPLAIN QUERY PLAN ", lambda row: row[3].startswith("SCAN ")
+               and not any(word in row[3] for word in (" USING ", " VIRTUAL TABLE ", "sqlite_"))),
+    "postgresql": ("EXPLAIN ", lambda row: "Seq Scan" in row[0]),
+}
+EXPLAINED_LIMIT = 1000  # distinct statements remembered, so each is explained once
+
+def explain_full_scans(conn, cursor, statement, parameters, explained: set):
+    if statement in explained or len(explained) >= EXPLAINED_LIMIT:
+        return
+    explained.add(statement)
+    prefix, full_scan = EXPLAIN_PLANS[conn.dialect.name]
+    # a fresh DBAPI cursor on the same connection, so no events fire for it
+    explain = conn.connection.cursor()
+    try:
+        explain.execute(prefix + statement, parameters)
+        plan = explain.fetchall()
+    except Exception as exc:  # diagnostics must never fail the query itself
+        logger.debug("Could not explain %s: %s", statement, exc)
+        return
+    finally:
+        explain.close()
+    if any(full_scan(row) for row in plan):
+        logger.warning("Full table scan in %s\n%s", statement, "\n".join(str(row[-1]) for row in plan))
+
+def track_queries(sync_engine):
+    """Time every statement into the current request's stats and log the slow ones."""
+    explained = set()
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_stats.get()
+        if stats is not None:
+            stats.add(statement, elapsed)
+        if elapsed * 1000 > config.SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+        if (config.EXPLAIN_QUERIES and not executemany and conn.dialect.name in EXPLAIN_PLANS
+                and statement.lstrip()[:6].upper() in ("SELECT", "UPDATE", "DELETE")):
+            explain_full_scans(conn, cursor, statement, parameters, explained)
+
+def configure(name: str, sync_engine):
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    track_pool(name, sync_engine)
+    track_queries(sync_engine)
+
+# sync engine for startup migrations and the command line scripts
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+configure("sync", engine)
+
+async_engine = create_async_engine(async_url(DATABASE_URL), **engine_options(DATABASE_URL))
+configure("async", async_engine.sync_engine)
+
+def pool_stats() -> dict:
+    """Current pool occupancy and lifetime counters for both engines."""
+    report = {}
+    for name, sync_engine in (("sync", engine), ("async", async_engine.sync_engine)):
+        pool = sync_engine.pool
+        stats = dict(POOL_STATS[name])
+        stats["checkout_seconds"] = round(stats["checkout_seconds"], 3)
+        if hasattr(pool, "checkedout"):
+            # QueuePool; in-memory SQLite uses a single-connection pool without these
+            stats.update(
+                pool_size=pool.size(),
+                idle=pool.checkedin(),
+                in_use=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),  # negative while the pool is not yet full
+            )
+        stats["url"] = sync_engine.url.render_as_string(hide_password=True)
+        report[name] = stats
+    return report
 
 def createDB():
     SQLModel.metadata.create_all(engine)
+    # create_all skips existing tables, so bring older databases up to date
+    upgradeDB(engine)
 
-def createSession():
-    with Session(engine) as session:
+async def createSession():
+    # expire_on_commit=False: touching an expired attribute would need a lazy
+    # (blocking) reload, which an async session cannot do implicitly
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
\ No newline at end of file
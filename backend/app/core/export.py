@@ -0,0 +1,115 @@
+"""
+Row encoders for the streaming exports.
+
+Each encoder takes the exported table columns and an async iterator of row
+partitions (lists of tuples, as produced by AsyncResult.partitions) and yields
+bytes, holding one partition in memory at a time. gzipped() wraps any of them.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for format=parquet
+    pa = pq = None
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def ndjson_rows(columns: Sequence, partitions) -> AsyncIterator[bytes]:
+    names = [column.name for column in columns]
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(names, row)), default=_json_default) + "\n" for row in rows
+        ).encode()
+
+
+async def csv_rows(columns: Sequence, partitions) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in columns])
+    async for rows in partitions:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # header of an empty export
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _arrow_type(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pa.string()
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp("us")
+    return pa.string()
+
+
+async def parquet_rows(columns: Sequence, partitions) -> AsyncIterator[bytes]:
+    """One row group per partition; the schema comes from the column types so
+    a partition that is all NULL in some column cannot change it."""
+    schema = pa.schema([(column.name, _arrow_type(column)) for column in columns])
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    async for rows in partitions:
+        writer.write_table(pa.Table.from_pylist([dict(zip(schema.names, row)) for row in rows], schema=schema))
+        yield sink.drain()
+    writer.close()  # writes the footer
+    yield sink.drain()
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+# format -> (encoder, media type)
+FORMATS = {
+    "ndjson": (ndjson_rows, "application/x-ndjson"),
+    "csv": (csv_rows, "text/csv; charset=utf-8"),
+    "parquet": (parquet_rows, "application/vnd.apache.parquet"),
+}
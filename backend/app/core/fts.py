@@ -0,0 +1,136 @@
+"""
+SQLite FTS5 full-text index over recipes.
+
+recipe_fts holds one row per recipe (rowid = recipe.id) with the title,
+description, ingredient names and author display name. Triggers on recipe,
+recipeingredient, ingredient and user keep it in sync, so every writer (API,
+seed scripts, bulk imports) updates it inside its own transaction.
+
+Other databases have no FTS5; callers fall back to LIKE matching there.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import column, literal_column, table
+
+FTS_TABLE = "recipe_fts"
+
+# rowid is the recipe id; rank is FTS5's hidden relevance column
+recipe_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+# column weights for bm25: title, description, ingredients, author
+RANK_FUNCTION = "bm25(10.0, 1.0, 4.0, 2.0)"
+
+_INGREDIENTS = """(SELECT group_concat(ingredient.name, ' ') FROM recipeingredient
+        JOIN ingredient ON ingredient.id = recipeingredient.ingredient_id
+        WHERE recipeingredient.recipe_id = {recipe_id})"""
+_AUTHOR = """(SELECT display_name FROM "user" WHERE "user".id = {user_id})"""
+
+_CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    title, description, ingredients, author,
+    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+)"""
+
+_REBUILD = f"""
+INSERT INTO {FTS_TABLE}(rowid, title, description, ingredients, author)
+SELECT recipe.id, recipe.title, coalesce(recipe.description, ''),
+    coalesce({_INGREDIENTS.format(recipe_id="recipe.id")}, ''),
+    coalesce({_AUTHOR.format(user_id="recipe.user_id")}, '')
+FROM recipe"""
+
+_TRIGGERS = {
+    "recipe_fts_insert": f"""
+AFTER INSERT ON recipe BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, title, description, ingredients, author)
+    VALUES (new.id, new.title, coalesce(new.description, ''),
+        coalesce({_INGREDIENTS.format(recipe_id="new.id")}, ''),
+        coalesce({_AUTHOR.format(user_id="new.user_id")}, ''));
+END""",
+    "recipe_fts_update": f"""
+AFTER UPDATE OF title, description, user_id ON recipe BEGIN
+    UPDATE {FTS_TABLE} SET title = new.title, description = coalesce(new.description, ''),
+        author = coalesce({_AUTHOR.format(user_id="new.user_id")}, '')
+    WHERE rowid = new.id;
+END""",
+    "recipe_fts_delete": f"""
+AFTER DELETE ON recipe BEGIN
+    DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+END""",
+    "recipeingredient_fts_insert": f"""
+AFTER INSERT ON recipeingredient BEGIN
+    UPDATE {FTS_TABLE} SET ingredients = coalesce({_INGREDIENTS.format(recipe_id="new.recipe_id")}, '')
+    WHERE rowid = new.recipe_id;
+END""",
+    "recipeingredient_fts_update": f"""
+AFTER UPDATE OF recipe_id, ingredient_id ON recipeingredient BEGIN
+    UPDATE {FTS_TABLE} SET ingredients = coalesce({_INGREDIENTS.format(recipe_id=f"{FTS_TABLE}.rowid")}, '')
+    WHERE rowid IN (old.recipe_id, new.recipe_id);
+END""",
+    "recipeingredient_fts_delete": f"""
+AFTER DELETE ON recipeingredient BEGIN
+    UPDATE {FTS_TABLE} SET ingredients = coalesce({_INGREDIENTS.format(recipe_id="old.recipe_id")}, '')
+    WHERE rowid = old.recipe_id;
+END""",
+    "ingredient_fts_rename": f"""
+AFTER UPDATE OF name ON ingredient BEGIN
+    UPDATE {FTS_TABLE} SET ingredients = coalesce({_INGREDIENTS.format(recipe_id=f"{FTS_TABLE}.rowid")}, '')
+    WHERE rowid IN (SELECT recipe_id FROM recipeingredient WHERE ingredient_id = new.id);
+END""",
+    "user_fts_rename": f"""
+AFTER UPDATE OF display_name ON "user" BEGIN
+    UPDATE {FTS_TABLE} SET author = new.display_name
+    WHERE rowid IN (SELECT id FROM recipe WHERE user_id = new.id);
+END""",
+}
+
+
+def is_supported(conn) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def installFTS(conn):
+    """Create the FTS table and its triggers if missing; returns a list of what was done."""
+    if not is_supported(conn):
+        return []
+    changes = []
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first()
+    if not exists:
+        conn.exec_driver_sql(_CREATE_TABLE)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', '{RANK_FUNCTION}')")
+        conn.exec_driver_sql(_REBUILD)
+        changes.append(f"created full-text index {FTS_TABLE}")
+    for name, body in _TRIGGERS.items():
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    return changes
+
+
+def dropFTSTriggers(conn):
+    """Stop per-row index maintenance before a bulk load; installFTS() puts them back."""
+    for name in _TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuildFTS(conn):
+    """Repopulate the index from scratch, e.g. after a bulk load with triggers dropped."""
+    conn.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+    conn.exec_driver_sql(_REBUILD)
+
+
+def match_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted so FTS5 operators typed by users (AND, NEAR, column:...)
+    are searched for literally instead of being parsed.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def matches(query: str):
+    """WHERE clause for `recipe_fts MATCH :query`."""
+    return literal_column(FTS_TABLE).op("MATCH")(query)
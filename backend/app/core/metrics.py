@@ -0,0 +1,162 @@
+"""
+Request metrics in the Prometheus text exposition format, served at /metrics.
+
+MetricsMiddleware records, per method and route template (/recipes/{recipe_id},
+never the raw path, so the number of series is bounded by the routes), a
+request counter by status, a latency histogram and the SQL statements issued.
+Everything lives in plain dicts and lists updated from the event loop thread,
+so recording a request is a few integer additions: no locks, and no objects
+beyond the label tuple and one histogram per new route.
+
+Pool and cache figures are not recorded per request; render() reads them from
+pool_stats() and cache.stats() when /metrics is scraped.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from .querystats import current_stats
+
+# seconds; upper bounds of the latency histogram, +Inf is implied
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+UNMATCHED = "<unmatched>"  # 404s and anything else no route claimed
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot: above the largest bound
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Metrics:
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = {}  # (method, route, status) -> count
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], int] = {}
+        self.in_flight = 0
+
+    def record(self, method: str, route: str, status: int, seconds: float, queries: int):
+        key = (method, route, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+        self.queries[key] = self.queries.get(key, 0) + queries
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware, installed inside QueryStatsMiddleware so the
+    request's query count is known when it finishes."""
+
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        registry = self.registry
+        status = 500  # unless a response starts, the request failed
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            route = scope.get("route")  # set by the router on a match
+            stats = current_stats.get()
+            registry.record(
+                scope["method"],
+                getattr(route, "path_format", None) or UNMATCHED,
+                status,
+                time.perf_counter() - started,
+                stats.queries if stats is not None else 0,
+            )
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _help(lines: List[str], name: str, kind: str, text: str):
+    lines.append(f"# HELP {name} {text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render(registry: Metrics, pools: dict, cache_stats: dict) -> str:
+    lines: List[str] = []
+    _help(lines, "http_requests_total", "counter", "Requests handled, by route template and status.")
+    for (method, route, status), count in sorted(registry.requests.items()):
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    _help(lines, "http_request_duration_seconds", "histogram", "Request latency, by route template.")
+    for (method, route), histogram in sorted(registry.latency.items()):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}")
+        lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {histogram.sum:.6f}")
+        lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {histogram.total}")
+
+    _help(lines, "http_request_db_queries_total", "counter", "SQL statements issued, by route template.")
+    for (method, route), count in sorted(registry.queries.items()):
+        lines.append(f"http_request_db_queries_total{_labels(method=method, route=route)} {count}")
+
+    _help(lines, "http_requests_in_flight", "gauge", "Requests being handled right now.")
+    lines.append(f"http_requests_in_flight {registry.in_flight}")
+
+    pool_metrics = (
+        ("db_pool_in_use", "gauge", "Connections checked out.", "in_use"),
+        ("db_pool_idle", "gauge", "Connections idle in the pool.", "idle"),
+        ("db_pool_overflow", "gauge", "Connections open beyond pool_size.", "overflow"),
+        ("db_pool_size", "gauge", "Configured pool size.", "pool_size"),
+        ("db_pool_max_in_use", "gauge", "Most connections ever checked out at once.", "max_checked_out"),
+        ("db_pool_connects_total", "counter", "Connections opened.", "connects"),
+        ("db_pool_checkouts_total", "counter", "Connection checkouts.", "checkouts"),
+        ("db_pool_invalidations_total", "counter", "Connections invalidated.", "invalidations"),
+        ("db_pool_checkout_seconds_total", "counter", "Time connections spent checked out.", "checkout_seconds"),
+    )
+    for name, kind, text, field in pool_metrics:
+        _help(lines, name, kind, text)
+        for engine_name, stats in pools.items():
+            if field in stats:  # the in-memory SQLite pool has no occupancy figures
+                lines.append(f"{name}{_labels(engine=engine_name)} {stats[field]}")
+
+    backend = cache_stats["backend"]
+    cache_metrics = (
+        ("cache_hits_total", "counter", "Response cache hits.", "hits"),
+        ("cache_misses_total", "counter", "Response cache misses.", "misses"),
+        ("cache_hit_ratio", "gauge", "Hits over lookups since start.", "hit_ratio"),
+        ("cache_invalidations_total", "counter", "Cache entries invalidated by writes.", "invalidations"),
+        ("cache_entries", "gauge", "Entries held by the in-process cache.", "entries"),
+        ("cache_evictions_total", "counter", "Entries evicted to stay under CACHE_MAX_ENTRIES.", "evictions"),
+    )
+    for name, kind, text, field in cache_metrics:
+        if field in cache_stats:
+            _help(lines, name, kind, text)
+            lines.append(f"{name}{_labels(backend=backend)} {cache_stats[field]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,77 @@
+"""
+In-place schema upgrades for existing databases.
+
+SQLModel.metadata.create_all() only creates tables that are missing, so anything
+added to a model later (columns, indexes, unique constraints) never reaches an
+existing database.db. upgradeDB() brings such a database up to date without
+dropping data and is safe to run on every startup.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+from .ratings import recompute_rating_aggregates
+from .fts import installFTS
+
+# data to fill in when a derived column is first added to an existing table
+BACKFILLS = {
+    ("recipe", "rating_count"): recompute_rating_aggregates,
+}
+
+
+def _add_missing_columns(conn, inspector):
+    added = []
+    quote = conn.dialect.identifier_preparer.quote
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect=conn.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                # only possible with a server default, which every added column needs
+                ddl += " NOT NULL"
+            conn.exec_driver_sql(ddl)
+            added.append((table.name, column.name))
+    return added
+
+
+def _create_missing_indexes(conn, inspector):
+    created = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(conn)
+            except Exception as exc:
+                # most likely duplicate usernames/emails blocking a unique index
+                raise RuntimeError(f"Could not create index {index.name} on {table.name}: {exc}") from exc
+            created.append(index.name)
+    return created
+
+
+def upgradeDB(engine: Engine):
+    """Apply pending schema changes; returns a list of what was done."""
+    changes = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        added = _add_missing_columns(conn, inspector)
+        changes += [f"added column {table_name}.{column_name}" for table_name, column_name in added]
+        # backfill only once every new column exists, a backfill may write several
+        for table_name, column_name in added:
+            backfill = BACKFILLS.get((table_name, column_name))
+            if backfill:
+                backfill(conn)
+                changes.append(f"backfilled {table_name}.{column_name}")
+        inspector = inspect(conn)  # fresh inspector, the cached one predates the new columns
+        changes += [f"created index {name}" for name in _create_missing_indexes(conn, inspector)]
+        changes += installFTS(conn)
+    return changes
@@ -0,0 +1,49 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered by (created_at, id) and the cursor is an opaque token holding
+the sort key of the last row sent, so fetching page N costs the same as page 1.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(session: AsyncSession, statement, model, cursor: Optional[str], limit: int, id_column=None):
+    """Run `statement` for one page; returns (rows, next_cursor).
+
+    id_column breaks ties between equal created_at values; it defaults to
+    model.id and must be unique within the rows the statement selects.
+    """
+    id_column = model.id if id_column is None else id_column
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(model.created_at, id_column) > tuple_(created_at, row_id))
+    # one extra row tells us whether another page exists without a COUNT
+    rows = (await session.exec(statement.order_by(model.created_at, id_column).limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, getattr(rows[-1], id_column.key))
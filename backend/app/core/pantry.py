@@ -0,0 +1,127 @@
+"""
+"What can I cook" index for POST /recipes/by-ingredients.
+
+An inverted index from each ingredient, diet and allergy to the set of recipes
+that have it, every set a packed bitset over the index rows (one bit per
+recipe, capacity / 8 bytes). A query unpacks the bitsets of the ingredients
+the user has and adds them up, which gives every recipe's coverage in one
+vectorized pass; missing = ingredient count - coverage. Diet requirements and
+allergy exclusions are ANDs and AND NOTs of the packed bitsets before that, so
+they cost a few kB of byte operations whatever the number of recipes.
+
+The index is kept current row by row like the similar recipes one (see
+recipe_index). Needs numpy (pip install .[recommendations]).
+"""
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from sqlalchemy import select, true
+from sqlalchemy.engine import Engine
+
+from .database import engine
+from .recipe_index import Bitsets, RecipeIndex, unpack
+from ..models.recipe import Recipe
+from ..models.ingredient import RecipeIngredient
+from ..models.diet import RecipeDiet
+from ..models.allergy import RecipeAllergy
+
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for the pantry search
+    np = None
+
+# (ingredients, diets, allergies) of one recipe
+Features = Tuple[FrozenSet[int], FrozenSet[int], FrozenSet[int]]
+LINKS = ((RecipeIngredient, RecipeIngredient.ingredient_id),
+         (RecipeDiet, RecipeDiet.diet_id),
+         (RecipeAllergy, RecipeAllergy.allergy_id))
+
+
+def available() -> bool:
+    return np is not None
+
+
+def load_features(conn, condition=true()) -> Dict[int, Features]:
+    """Ingredient, diet and allergy ids of the recipes matching `condition`."""
+    recipes = select(Recipe.id).where(condition)
+    features = {recipe_id: (set(), set(), set()) for recipe_id in conn.execute(recipes).scalars()}
+    for position, (link, column) in enumerate(LINKS):
+        for recipe_id, feature_id in conn.execute(select(link.recipe_id, column).where(link.recipe_id.in_(recipes))):
+            if recipe_id in features:
+                features[recipe_id][position].add(feature_id)
+    return {recipe_id: tuple(map(frozenset, sets)) for recipe_id, sets in features.items()}
+
+
+class PantryIndex(RecipeIndex):
+    name = "pantry index"
+
+    def __init__(self, engine: Engine):
+        self.features: List[Features] = []  # per row, to clear its bits on update
+        self.ingredient_counts = None  # per row, uint16
+        self.ingredients = Bitsets()
+        self.diets = Bitsets()
+        self.allergies = Bitsets()
+        super().__init__(engine)
+
+    def load(self, conn, condition) -> Dict[int, Features]:
+        return load_features(conn, condition)
+
+    def _resize(self, capacity: int):
+        if not self.used:
+            self.ingredients, self.diets, self.allergies = Bitsets(), Bitsets(), Bitsets()
+        for bitsets in (self.ingredients, self.diets, self.allergies):
+            bitsets.resize(capacity)
+        counts = np.zeros(capacity, dtype=np.uint16)
+        if self.used:
+            counts[:self.used] = self.ingredient_counts[:self.used]
+        self.ingredient_counts = counts
+        empty = (frozenset(), frozenset(), frozenset())
+        self.features = self.features[:self.used] + [empty] * (capacity - self.used)
+
+    def _store(self, row: int, item: Features):
+        ingredients, diets, allergies = item
+        self.features[row] = item
+        self.ingredient_counts[row] = len(ingredients)
+        for bitsets, ids in ((self.ingredients, ingredients), (self.diets, diets), (self.allergies, allergies)):
+            for feature_id in ids:
+                bitsets.add(feature_id, row)
+
+    def _clear(self, row: int):
+        ingredients, diets, allergies = self.features[row]
+        for bitsets, ids in ((self.ingredients, ingredients), (self.diets, diets), (self.allergies, allergies)):
+            for feature_id in ids:
+                bitsets.discard(feature_id, row)
+        self.features[row] = (frozenset(), frozenset(), frozenset())
+        self.ingredient_counts[row] = 0
+
+    def allowed(self, diet_ids: Iterable[int] = (), exclude_allergy_ids: Iterable[int] = ()) -> "np.ndarray":
+        """Packed bitset of the recipes on every diet in `diet_ids` and free of every allergen listed."""
+        return self.allergies.none_of(exclude_allergy_ids, self.diets.all_of(diet_ids, self.present))
+
+    async def cookable(self, ingredient_ids: Iterable[int], max_missing: int, limit: int,
+                       diet_ids: Iterable[int] = (), exclude_allergy_ids: Iterable[int] = ()):
+        """Recipes that use at least one of `ingredient_ids` and miss at most
+        `max_missing` of theirs, fewest missing first, then most used.
+
+        Returns (total, [(recipe_id, have, missing ingredient ids)]) with up to `limit` items.
+        """
+        await self.ensure()
+        owned = {ingredient_id for ingredient_id in ingredient_ids if self.ingredients.get(ingredient_id) is not None}
+        if not owned:
+            return 0, []
+        capacity = self.capacity
+        have = np.zeros(capacity, dtype=np.uint16)
+        for ingredient_id in owned:
+            have += unpack(self.ingredients.get(ingredient_id), capacity)
+        missing = self.ingredient_counts.astype(np.int32) - have
+        candidates = unpack(self.allowed(diet_ids, exclude_allergy_ids), capacity).astype(bool)
+        candidates &= (have > 0) & (missing <= max_missing)
+        rows = np.flatnonzero(candidates)
+        order = np.lexsort((self.ids[rows], -have[rows].astype(np.int32), missing[rows]))
+        picked = []
+        for row in rows[order[:limit]]:
+            lacking = sorted(self.features[row][0] - owned)
+            picked.append((int(self.ids[row]), int(have[row]), lacking))
+        return len(rows), picked
+
+
+pantry = PantryIndex(engine)
@@ -0,0 +1,84 @@
+"""
+Per-request SQL statistics.
+
+QueryStatsMiddleware puts a RequestStats in a context variable for the length
+of each request; the cursor hooks installed by database.track_queries add every
+statement's duration to it. The totals go out as a Server-Timing header
+
+    Server-Timing: db;dur=3.1;desc="4 queries", db-slowest;dur=1.7, app;dur=5.9
+
+and a request over SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES is logged with its
+slowest statement. Headers are sent before a streamed body, so a streaming
+response reports the queries made up to its first chunk.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from . import config
+
+logger = logging.getLogger("app.queries")
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def add(self, statement: str, seconds: float):
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds, self.slowest_statement = seconds, statement
+
+
+# statistics of the request being handled in this context, None outside requests
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_stats", default=None)
+
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}, "
+        f"app;dur={elapsed * 1000:.1f}"
+    )
+
+
+class QueryStatsMiddleware:
+    """Plain ASGI middleware: unlike BaseHTTPMiddleware it does not buffer or
+    re-task the response, so streamed exports pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if config.SERVER_TIMING:
+                    timing = server_timing(stats, time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            if elapsed * 1000 > config.SLOW_REQUEST_MS or stats.queries > config.SLOW_REQUEST_QUERIES:
+                logger.warning(
+                    "Slow request %s %s -> %s: %.1f ms, %d queries (%.1f ms in the database), slowest %.1f ms: %s",
+                    scope["method"], scope["path"], status, elapsed * 1000, stats.queries,
+                    stats.db_seconds * 1000, stats.slowest_seconds * 1000, stats.slowest_statement,
+                )
@@ -0,0 +1,75 @@
+"""
+Denormalized review statistics on Recipe.
+
+Every review write adjusts rating_count, rating_sum, the 1-5 star histogram and
+rating_avg with a single UPDATE in the same transaction as the review itself, so
+top-rated listings never have to touch the review table.
+"""
+from typing import Optional
+
+from sqlalchemy import case, func, select, update
+
+from ..models.recipe import Recipe
+from ..models.review import Review
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def histogram_column(star: int):
+    return getattr(Recipe, f"rating_{star}_count")
+
+
+def _average(count, total):
+    return case((count > 0, total * 1.0 / count), else_=0.0)
+
+
+def rating_change(recipe_id: int, added: Optional[int] = None, removed: Optional[int] = None):
+    """UPDATE statement moving one review from `removed` stars to `added` stars.
+
+    Pass only `added` for a new review, only `removed` for a deleted one and both
+    for an edited rating. The new values are computed by the database from the
+    current row, so concurrent writers cannot lose each other's increments.
+    Like any UPDATE of the row it also bumps Recipe.updated_at, which is what
+    the recipe and review-list ETags are derived from.
+    """
+    count_delta = (added is not None) - (removed is not None)
+    sum_delta = (added or 0) - (removed or 0)
+    values = {
+        Recipe.rating_count: Recipe.rating_count + count_delta,
+        Recipe.rating_sum: Recipe.rating_sum + sum_delta,
+        Recipe.rating_avg: _average(Recipe.rating_count + count_delta, Recipe.rating_sum + sum_delta),
+    }
+    for star in STARS:
+        delta = (added == star) - (removed == star)
+        if delta:
+            column = histogram_column(star)
+            values[column] = column + delta
+    return (
+        update(Recipe)
+        .where(Recipe.id == recipe_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recompute_rating_aggregates(conn):
+    """Rebuild every recipe's rating columns from the review table in one statement."""
+    def reviews(*conditions):
+        return select(*conditions).where(Review.recipe_id == Recipe.id).scalar_subquery()
+
+    count = reviews(func.count(Review.id))
+    total = reviews(func.coalesce(func.sum(Review.rating), 0))
+    values = {
+        Recipe.rating_count: count,
+        Recipe.rating_sum: total,
+        Recipe.rating_avg: _average(count, total),
+        # a rebuild (migration backfill, bulk load) is not an edit; keep the ETags valid
+        Recipe.updated_at: Recipe.updated_at,
+    }
+    for star in STARS:
+        values[histogram_column(star)] = (
+            select(func.count(Review.id))
+            .where(Review.recipe_id == Recipe.id, Review.rating == star)
+            .scalar_subquery()
+        )
+    conn.execute(update(Recipe).values(values))
@@ -0,0 +1,275 @@
+"""
+Shared upkeep of the in-memory per-recipe indexes (similar recipes, pantry,
+catalog).
+
+A RecipeIndex maps every recipe to a row of its arrays and keeps them current
+incrementally: refresh() re-reads only the recipes whose updated_at moved
+since the last pass (every recipe write bumps it) and rewrites their rows.
+The recipe routes call recipes_changed() after a write to wake the refresh
+loops, and recipe_deleted() to drop a row. Writes announced that way are
+applied before the next query of the index answers (ensure()), so a client
+always sees its own writes; edits made by other processes are picked up
+within RECIPE_INDEX_REFRESH seconds. A recipe count that updates cannot
+explain (a delete elsewhere) triggers a full rebuild.
+
+Rows are only changed from the event loop thread: the reads run in a worker
+thread and applying them is a few array writes, so queries never see a
+half-applied update.
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select, true
+from sqlalchemy.engine import Engine
+
+from . import config
+from ..models.recipe import Recipe
+
+try:
+    import numpy as np
+except ImportError:  # optional, the indexes are only built when it is installed
+    np = None
+
+logger = logging.getLogger("app.recipe_index")
+
+OVERLAP = timedelta(seconds=5)  # re-read window, for transactions that committed late
+MIN_CAPACITY = 1024
+
+INDEXES: List["RecipeIndex"] = []  # every index created, for the write hooks and the startup
+
+
+def available() -> bool:
+    return np is not None
+
+
+def recipes_changed():
+    """Called by the recipe routes after creating or editing recipes."""
+    for index in INDEXES:
+        index.changed()
+
+
+def recipe_deleted(recipe_id: int):
+    for index in INDEXES:
+        index.remove(recipe_id)
+        index.changed()  # a refresh that read the recipe before the delete may put it back
+
+
+class Bitsets:
+    """Packed bitsets over the index rows, one per id, all the same length."""
+
+    def __init__(self):
+        self.sets: Dict[int, "np.ndarray"] = {}
+        self.size = 0  # bytes per bitset
+
+    def resize(self, capacity: int):
+        size = (capacity + 7) // 8
+        for key, bits in self.sets.items():
+            grown = np.zeros(size, dtype=np.uint8)
+            grown[:len(bits)] = bits
+            self.sets[key] = grown
+        self.size = size
+
+    def add(self, key: int, row: int):
+        bits = self.sets.get(key)
+        if bits is None:
+            bits = self.sets[key] = np.zeros(self.size, dtype=np.uint8)
+        bits[row >> 3] |= 1 << (row & 7)
+
+    def discard(self, key: int, row: int):
+        bits = self.sets.get(key)
+        if bits is not None:
+            bits[row >> 3] &= ~np.uint8(1 << (row & 7))
+
+    def get(self, key: int) -> Optional["np.ndarray"]:
+        return self.sets.get(key)
+
+    def any_of(self, keys: Iterable[int], bits: "np.ndarray") -> "np.ndarray":
+        """`bits` AND the union of the keys' sets."""
+        union = np.zeros_like(bits)
+        for key in keys:
+            other = self.sets.get(key)
+            if other is not None:
+                union |= other
+        return bits & union
+
+    def all_of(self, keys: Iterable[int], bits: "np.ndarray") -> "np.ndarray":
+        """`bits` AND every key's set (an unknown key empties it)."""
+        for key in keys:
+            other = self.sets.get(key)
+            if other is None:
+                return np.zeros_like(bits)
+            bits = bits & other
+        return bits
+
+    def none_of(self, keys: Iterable[int], bits: "np.ndarray") -> "np.ndarray":
+        """`bits` AND NOT any key's set."""
+        for key in keys:
+            other = self.sets.get(key)
+            if other is not None:
+                bits = bits & ~other
+        return bits
+
+
+def unpack(bits: "np.ndarray", capacity: int) -> "np.ndarray":
+    return np.unpackbits(bits, count=capacity, bitorder="little")
+
+
+class RecipeIndex(ABC):
+    """Row bookkeeping and incremental refresh; subclasses hold the data.
+
+    Subclasses implement load() (blocking, per-recipe data for the recipes
+    matching a condition), optionally prepare() (blocking, e.g. hashing),
+    and _resize()/_store()/_clear() for their own arrays. One that misses a
+    hook fails when it is created, not in the background refresh loop.
+    """
+
+    name = "recipe index"
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.rows: Dict[int, int] = {}  # recipe id -> row
+        self.ids = None  # row -> recipe id, -1 for a free row
+        self.present = None  # packed bitset of the rows that hold a recipe
+        self.free: List[int] = []
+        self.used = 0  # rows handed out so far, free ones included
+        self.watermark: Optional[datetime] = None  # newest updated_at applied
+        self.changes = 0  # writes announced by changed()
+        self.applied = 0  # how many of them the last refresh started after
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        INDEXES.append(self)
+
+    # subclass hooks
+
+    @abstractmethod
+    def load(self, conn, condition) -> Dict[int, Any]:
+        ...
+
+    def prepare(self, items: Dict[int, Any]) -> Dict[int, Any]:
+        return items
+
+    @abstractmethod
+    def _resize(self, capacity: int):
+        """Reallocate the arrays for `capacity` rows, keeping the first `self.used`."""
+
+    @abstractmethod
+    def _store(self, row: int, item):
+        ...
+
+    @abstractmethod
+    def _clear(self, row: int):
+        ...
+
+    # bookkeeping
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self.ids is None else len(self.ids)
+
+    def _reset(self, capacity: int):
+        self.rows, self.free, self.used = {}, [], 0
+        self._grow(max(capacity, MIN_CAPACITY))
+
+    def _grow(self, capacity: int):
+        ids = np.full(capacity, -1, dtype=np.int64)
+        present = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+        if self.used:
+            ids[:self.used] = self.ids[:self.used]
+            present[:len(self.present)] = self.present
+        self.ids, self.present = ids, present
+        self._resize(capacity)
+
+    def _apply(self, items: Dict[int, Any]):
+        for recipe_id, item in items.items():
+            row = self.rows.get(recipe_id)
+            if row is None:
+                if self.free:
+                    row = self.free.pop()
+                else:
+                    if self.used == self.capacity:
+                        self._grow(2 * self.capacity)
+                    row, self.used = self.used, self.used + 1
+                self.rows[recipe_id] = row
+                self.ids[row] = recipe_id
+                self.present[row >> 3] |= 1 << (row & 7)
+            else:
+                self._clear(row)
+            self._store(row, item)
+
+    def remove(self, recipe_id: int):
+        row = self.rows.pop(recipe_id, None)
+        if row is not None:
+            self.ids[row] = -1
+            self.present[row >> 3] &= ~np.uint8(1 << (row & 7))
+            self._clear(row)
+            self.free.append(row)
+
+    def changed(self):
+        """Refresh now instead of at the next tick, and before the next query."""
+        self.changes += 1
+        self._wake.set()
+
+    # refresh
+
+    def _read(self, full: bool):
+        # blocking, runs in a worker thread
+        started = time.perf_counter()
+        condition = true() if full else Recipe.updated_at >= self.watermark - OVERLAP
+        with self.engine.connect() as conn:
+            items = self.load(conn, condition)
+            newest = conn.execute(select(func.max(Recipe.updated_at)).where(condition)).scalar()
+            total = conn.execute(select(func.count(Recipe.id))).scalar_one()
+        items = self.prepare(items)
+        if full:
+            logger.info("Built the %s for %d recipes in %.1f s", self.name, len(items), time.perf_counter() - started)
+        return items, newest, total
+
+    async def refresh(self, changes: Optional[int] = None):
+        """Apply what changed since the last pass; with `changes`, only if the
+        writes up to that count are not applied yet (another caller's refresh
+        may have covered them while this one waited for the lock)."""
+        async with self._lock:
+            if changes is not None and self.watermark is not None and self.applied >= changes:
+                return
+            started_after = self.changes  # writes committed before the read below starts
+            full = self.watermark is None
+            items, newest, total = await asyncio.to_thread(self._read, full)
+            if full:
+                self._reset(len(items))
+            self._apply(items)
+            if newest is not None and (self.watermark is None or newest > self.watermark):
+                self.watermark = newest
+            if len(self.rows) != total:
+                # deleted by another process; only a full read can tell which
+                items, newest, total = await asyncio.to_thread(self._read, True)
+                self._reset(len(items))
+                self._apply(items)
+                self.watermark = newest
+            if self.watermark is None:
+                self.watermark = datetime.min + OVERLAP  # no recipes yet, every future one is newer
+            self.applied = started_after
+
+    async def ensure(self):
+        """Build on first use and apply pending writes of this process. Nothing
+        else refreshes on the request path, so looking up unknown ids costs no
+        queries; recipes created elsewhere arrive with the next tick."""
+        changes = self.changes
+        if self.watermark is None or self.applied < changes:
+            await self.refresh(changes)
+
+    async def run(self):
+        """Background refresh loop, started with the application."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Refreshing the %s failed", self.name)
+            try:
+                await asyncio.wait_for(self._wake.wait(), config.RECIPE_INDEX_REFRESH)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
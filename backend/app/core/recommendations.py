@@ -0,0 +1,240 @@
+"""
+Item-item collaborative filtering for GET /users/{id}/recommendations.
+
+build_model() reads every favorite and review once into a sparse users x
+recipes matrix of interaction weights, L2-normalizes the recipe columns and
+multiplies it by its own transpose a block of recipes at a time, keeping only
+the NEIGHBORS most similar recipes of each. The result is two dense arrays,
+neighbors[recipe] (int32 column indices) and similarity[recipe] (float32), a
+few MB even for 100k recipes.
+
+A request then costs the one query for the user's own favorites and reviews
+plus a gather over their neighbor rows. The favorite and review routes call
+interactions_changed(), which wakes Recommender.run(); it also wakes every
+RECOMMENDATIONS_REFRESH seconds for writes of other processes. Either way it
+checks a cheap data_version() of the two tables and, if it moved, rebuilds in
+a worker thread and swaps the new model in; requests keep using the previous
+one meanwhile. Rebuilds are at least RECOMMENDATIONS_MIN_INTERVAL seconds
+apart, so a burst of favorites costs one rebuild, not one each.
+
+Until there is a model (no favorites or reviews yet) the route falls back to
+popular_recipes(), the best rated recipes.
+
+numpy and scipy are optional (pip install .[recommendations]).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.engine import Engine
+
+from . import config
+from .database import engine
+from ..models.favorite import Favorite
+from ..models.recipe import Recipe
+from ..models.review import Review
+
+try:
+    import numpy as np
+    import scipy.sparse as sp
+except ImportError:  # optional, only needed for recommendations
+    np = sp = None
+
+logger = logging.getLogger("app.recommendations")
+
+FAVORITE = -1  # kind of a favorite row in interactions(); reviews carry their rating
+BLOCK_SIZE = 2048  # recipes per sparse product block, bounds the memory of a rebuild
+
+
+def available() -> bool:
+    return np is not None
+
+
+def weight(kind: int) -> float:
+    """How much one interaction says the user likes the recipe."""
+    if kind == FAVORITE:
+        return 1.0
+    return max(kind - 2, 0) / 3  # 5 stars 1.0, 4 stars 0.67, 3 stars 0.33, 1-2 stars nothing
+
+
+def interactions(user_id: Optional[int] = None):
+    """(user_id, recipe_id, kind) rows of favorites and reviews, of one user or everyone."""
+    favorites = select(Favorite.user_id, Favorite.recipe_id, literal(FAVORITE).label("kind"))
+    reviews = select(Review.user_id, Review.recipe_id, Review.rating.label("kind"))
+    if user_id is not None:
+        # answered from the favorite primary key and ix_review_user_id
+        favorites = favorites.where(Favorite.user_id == user_id)
+        reviews = reviews.where(Review.user_id == user_id)
+    return union_all(favorites, reviews)
+
+
+def popular_recipes(limit: int):
+    """Best rated recipe ids, for users when there is no model yet; walks
+    ix_recipe_rating_avg_count_id like the top_rated sort of GET /recipes/."""
+    return select(Recipe.id).order_by(Recipe.rating_avg.desc(), Recipe.rating_count.desc(), Recipe.id.desc()).limit(limit)
+
+
+class Model:
+    def __init__(self, recipe_ids, neighbors, similarity, popular, built_at: datetime):
+        self.recipe_ids = recipe_ids  # column index -> recipe id, sorted
+        self.neighbors = neighbors  # (recipes, NEIGHBORS) column indices, -1 pads
+        self.similarity = similarity  # (recipes, NEIGHBORS), descending per row
+        self.popular = popular  # column indices by total interaction weight, for cold starts
+        self.built_at = built_at
+
+    def columns(self, recipe_ids) -> "np.ndarray":
+        """Column index of each recipe id, -1 for recipes the model has not seen."""
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        found = np.searchsorted(self.recipe_ids, recipe_ids)
+        found[found == len(self.recipe_ids)] = 0
+        return np.where(self.recipe_ids[found] == recipe_ids, found, -1)
+
+    def recommend(self, rows: List[Tuple[int, int]], limit: int) -> Tuple[List[Tuple[int, float]], bool]:
+        """Top `limit` (recipe id, score) for a user with these (recipe_id, kind)
+        interactions, never one they already interacted with. The flag tells
+        whether popularity had to stand in for missing history."""
+        seen = {recipe_id for recipe_id, _ in rows}
+        liked = [(recipe_id, weight(kind)) for recipe_id, kind in rows]
+        liked = [(recipe_id, w) for recipe_id, w in liked if w > 0]
+        if liked:
+            columns = self.columns([recipe_id for recipe_id, _ in liked])
+            weights = np.array([w for _, w in liked], dtype=np.float32)[columns >= 0]
+            columns = columns[columns >= 0]
+            candidates = self.neighbors[columns].ravel()
+            scores = (self.similarity[columns] * weights[:, None]).ravel()
+            keep = candidates >= 0
+            candidates, inverse = np.unique(candidates[keep], return_inverse=True)
+            totals = np.bincount(inverse, weights=scores[keep])
+            order = np.argsort(-totals, kind="stable")
+            picked = [(int(self.recipe_ids[candidates[i]]), round(float(totals[i]), 4)) for i in order
+                      if int(self.recipe_ids[candidates[i]]) not in seen][:limit]
+            if picked:
+                return picked, False
+        popular = (int(self.recipe_ids[column]) for column in self.popular)
+        return [(recipe_id, 0.0) for recipe_id in popular if recipe_id not in seen][:limit], True
+
+
+def build_model(engine: Engine, neighbors: int) -> Optional[Model]:
+    """Blocking: read all interactions and compute the top-`neighbors` table."""
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        rows = conn.execute(interactions()).all()
+    if not rows:
+        return None
+    users, recipes, kinds = (np.array(column, dtype=np.int64) for column in zip(*rows))
+    weights = np.where(kinds == FAVORITE, 1.0, np.maximum(kinds - 2, 0) / 3).astype(np.float32)
+    user_ids, user_rows = np.unique(users, return_inverse=True)
+    recipe_ids, recipe_columns = np.unique(recipes, return_inverse=True)
+    # duplicates (a favorite and a review of the same recipe) are summed
+    matrix = sp.csr_matrix((weights, (user_rows, recipe_columns)), shape=(len(user_ids), len(recipe_ids)))
+    matrix.eliminate_zeros()
+
+    popularity = np.asarray(matrix.sum(axis=0)).ravel()
+    popular = np.argsort(-popularity, kind="stable")[:config.RECOMMENDATIONS_LIMIT * 10].astype(np.int32)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    items = sp.csr_matrix(matrix.multiply(1.0 / norms).T, dtype=np.float32)  # recipes x users, unit rows
+    items_t = items.T.tocsr()
+
+    count = len(recipe_ids)
+    top_neighbors = np.full((count, neighbors), -1, dtype=np.int32)
+    top_similarity = np.zeros((count, neighbors), dtype=np.float32)
+    for start in range(0, count, BLOCK_SIZE):
+        block = (items[start:start + BLOCK_SIZE] @ items_t).tocsr()  # cosine similarities
+        for offset in range(block.shape[0]):
+            row = start + offset
+            begin, end = block.indptr[offset], block.indptr[offset + 1]
+            columns, values = block.indices[begin:end], block.data[begin:end]
+            keep = (columns != row) & (values > 0)
+            columns, values = columns[keep], values[keep]
+            if len(values) > neighbors:
+                best = np.argpartition(-values, neighbors)[:neighbors]
+                columns, values = columns[best], values[best]
+            order = np.argsort(-values, kind="stable")
+            top_neighbors[row, :len(order)] = columns[order]
+            top_similarity[row, :len(order)] = values[order]
+    logger.info("Built recommendations for %d recipes from %d interactions in %.1f s",
+                count, len(rows), time.perf_counter() - started)
+    return Model(recipe_ids, top_neighbors, top_similarity, popular, datetime.utcnow())
+
+
+def data_version(conn) -> tuple:
+    """Changes whenever a favorite or review is added, removed or re-rated."""
+    reviews = conn.execute(select(func.count(), func.sum(Review.rating), func.max(Review.id))).one()
+    favorites = conn.execute(select(func.count(), func.max(Favorite.created_at)).select_from(Favorite)).one()
+    return (*reviews, *favorites)
+
+
+class Recommender:
+    """Holds the current Model and rebuilds it when the interactions change."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.model: Optional[Model] = None
+        self.version = None  # data_version() the model was built from, None before the first build
+        self.changes = 0  # writes announced by changed()
+        self.applied = 0  # how many of them the last refresh started after
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+
+    def changed(self):
+        """Rebuild at the next tick of run() instead of after RECOMMENDATIONS_REFRESH."""
+        self.changes += 1
+        self._wake.set()
+
+    def _build_if_changed(self):
+        # blocking, runs in a worker thread
+        with self.engine.connect() as conn:
+            version = data_version(conn)
+        if version == self.version:
+            return
+        model = build_model(self.engine, config.RECOMMENDATION_NEIGHBORS)
+        self.model, self.version = model, version  # readers see the old model or the new one
+
+    async def refresh(self, changes: Optional[int] = None):
+        """Rebuild if the interactions moved; with `changes`, only if the writes
+        up to that count are not applied yet (another caller's refresh may have
+        covered them while this one waited for the lock)."""
+        async with self._lock:
+            if changes is not None and self.version is not None and self.applied >= changes:
+                return
+            started_after = self.changes  # writes committed before the read below starts
+            await asyncio.to_thread(self._build_if_changed)
+            self.applied = started_after
+
+    async def current(self) -> Optional[Model]:
+        """The model, built on first use if the scheduler has not got to it yet,
+        and on the request path while there is none and this process has written
+        interactions since; None while there are no favorites or reviews at all.
+        An existing model is only replaced by run()."""
+        changes = self.changes
+        if self.version is None or (self.model is None and self.applied < changes):
+            await self.refresh(changes)
+        return self.model
+
+    async def run(self):
+        """Background refresh loop, started with the application."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Rebuilding recommendations failed, keeping the previous model")
+            # writes during the pause set the event, so the next wait returns at once
+            await asyncio.sleep(config.RECOMMENDATIONS_MIN_INTERVAL)
+            try:
+                await asyncio.wait_for(self._wake.wait(), config.RECOMMENDATIONS_REFRESH)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+recommender = Recommender(engine)
+
+
+def interactions_changed():
+    """Called by the favorite, review and recipe routes after their writes."""
+    recommender.changed()
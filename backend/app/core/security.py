@@ -0,0 +1,161 @@
+"""
+Password hashing off the request path.
+
+bcrypt is slow on purpose (about 0.25 s at 12 rounds) and holds the GIL while
+it works, so hashing in the threadpool still stalls every other request of the
+process. hash_password() and verify_password() send the work to a
+ProcessPoolExecutor instead, behind a semaphore that bounds how much is queued.
+The pool runs bcrypt.hashpw/checkpw directly, so its spawned workers import
+nothing but bcrypt (and the main module, which is why scripts calling these
+need the usual `if __name__ == "__main__":` guard; hashpw() does not).
+
+Accounts created by the old /auth/register hold their password in plain text;
+verify_password() still accepts those and needs_rehash() reports them, so the
+login route can replace them with a hash.
+
+Login hands out an HS256 JWT carrying the user's id, username and display
+name. getCurrentUser checks its signature and expiry with hmac alone, so an
+authenticated request costs no query.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import multiprocessing
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from . import config
+from ..schemas.user_schema import TokenData
+
+BCRYPT_MAX_BYTES = 72  # bcrypt ignores the rest; newer releases refuse longer input
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots = asyncio.Semaphore(config.HASH_CONCURRENCY)
+_dummy_hash: Optional[str] = None
+
+
+def _encode(password: str) -> bytes:
+    return password.encode()[:BCRYPT_MAX_BYTES]
+
+
+def _is_bcrypt(password_hash: str) -> bool:
+    return password_hash.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def hashpw(password: str, rounds: int = config.BCRYPT_ROUNDS) -> str:
+    """Blocking hash, for scripts; request handlers use hash_password()."""
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode()
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Plain text legacy value, or a hash made with a different BCRYPT_ROUNDS."""
+    if not _is_bcrypt(password_hash):
+        return True
+    return int(password_hash.split("$")[2]) != config.BCRYPT_ROUNDS
+
+
+def executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the server process runs threads (aiosqlite, the
+        # threadpool) and forking those is unsafe
+        _executor = ProcessPoolExecutor(config.HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def _run(function, *args):
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(executor(), function, *args)
+
+
+async def hash_password(password: str) -> str:
+    salt = bcrypt.gensalt(config.BCRYPT_ROUNDS)  # cheap, os.urandom
+    return (await _run(bcrypt.hashpw, _encode(password), salt)).decode()
+
+
+async def verify_password(password: str, password_hash: Optional[str]) -> bool:
+    if not password_hash:
+        return False
+    if not _is_bcrypt(password_hash):
+        # legacy plain text row
+        return hmac.compare_digest(password.encode(), password_hash.encode())
+    try:
+        return await _run(bcrypt.checkpw, _encode(password), password_hash.encode())
+    except ValueError:  # malformed hash
+        return False
+
+
+async def dummy_hash() -> str:
+    """Hash of a random password, made once. Login checks the password of an
+    unknown username against it, so the response time does not tell which
+    usernames exist."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+
+def shutdownHasher():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(message: bytes) -> bytes:
+    return hmac.new(config.JWT_SECRET.encode(), message, hashlib.sha256).digest()
+
+
+_HEADER = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+
+def create_token(user: TokenData, ttl: int = config.JWT_TTL) -> str:
+    now = int(time.time())
+    claims = {"sub": str(user.id), "name": user.username, "display_name": user.display_name, "iat": now, "exp": now + ttl}
+    message = _HEADER + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return (message + b"." + _b64encode(_sign(message))).decode()
+
+
+def decode_token(token: str) -> TokenData:
+    """The user a valid, unexpired token was issued to; ValueError otherwise."""
+    try:
+        header, payload, signature = token.split(".")
+        if not hmac.compare_digest(_b64decode(signature), _sign(f"{header}.{payload}".encode())):
+            raise ValueError("bad signature")
+        if json.loads(_b64decode(header)).get("alg") != "HS256":
+            raise ValueError("unexpected algorithm")
+        claims = json.loads(_b64decode(payload))
+        if claims["exp"] < time.time():
+            raise ValueError("expired")
+        return TokenData(id=int(claims["sub"]), username=claims["name"], display_name=claims["display_name"])
+    except (KeyError, TypeError, AttributeError) as exc:  # decoding errors are ValueErrors already
+        raise ValueError("malformed token") from exc
+
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def getCurrentUser(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> TokenData:
+    """Dependency for routes that need a signed-in user (Authorization: Bearer <token>)."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return decode_token(credentials.credentials)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token", headers={"WWW-Authenticate": "Bearer"})
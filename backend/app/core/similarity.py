@@ -0,0 +1,127 @@
+"""
+"Similar recipes" index for GET /recipes/{id}/similar.
+
+Each recipe is the set of its ingredients, tags, diets and cuisine. The index
+keeps a MinHash signature per recipe (SIGNATURE_SIZE uint32 values, one
+contiguous matrix row), so the share of equal positions between two rows
+estimates the Jaccard similarity of their sets. A query compares its row
+against the whole matrix in one vectorized pass, keeps the RERANK * limit best
+candidates and orders those by their exact Jaccard similarity.
+
+Signatures do not depend on any other recipe, so the index is refreshed
+incrementally, row by row (see recipe_index).
+
+Needs numpy (pip install .[recommendations]).
+"""
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, true
+from sqlalchemy.engine import Engine
+
+from .database import engine
+from .recipe_index import RecipeIndex
+from ..models.recipe import Recipe
+from ..models.ingredient import RecipeIngredient
+from ..models.tag import RecipeTag
+from ..models.diet import RecipeDiet
+
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for similar recipes
+    np = None
+
+SIGNATURE_SIZE = 64  # hash functions; the estimate's error is about 1 / sqrt(64)
+RERANK = 8  # candidates per requested result that get an exact Jaccard score
+PRIME = (1 << 31) - 1  # hashes are (a * x + b) mod PRIME; a * x fits in int64
+EMPTY = np.uint32(0xFFFFFFFF) if np else None  # signature of a recipe without features, matches no hash
+
+# feature kinds, so ingredient 7 and tag 7 are different tokens
+INGREDIENT, TAG, DIET, CUISINE = range(4)
+LINKS = ((RecipeIngredient, RecipeIngredient.ingredient_id, INGREDIENT),
+         (RecipeTag, RecipeTag.tag_id, TAG),
+         (RecipeDiet, RecipeDiet.diet_id, DIET))
+
+if np is not None:
+    _hashes = np.random.default_rng(2024)  # fixed, signatures must be stable across rebuilds
+    _A = _hashes.integers(1, PRIME, SIGNATURE_SIZE, dtype=np.int64)
+    _B = _hashes.integers(0, PRIME, SIGNATURE_SIZE, dtype=np.int64)
+
+
+def available() -> bool:
+    return np is not None
+
+
+def signature(tokens: Set[int]) -> "np.ndarray":
+    if not tokens:
+        return np.full(SIGNATURE_SIZE, EMPTY, dtype=np.uint32)
+    x = np.fromiter(tokens, dtype=np.int64, count=len(tokens)) % PRIME
+    return ((np.outer(x, _A) + _B) % PRIME).min(axis=0).astype(np.uint32)
+
+
+def load_features(conn, condition=true()) -> Dict[int, Set[int]]:
+    """Token sets of the recipes matching `condition`."""
+    recipes = select(Recipe.id).where(condition)
+    features = {}
+    for recipe_id, cuisine_id in conn.execute(select(Recipe.id, Recipe.cuisine_id).where(condition)):
+        features[recipe_id] = {cuisine_id * 4 + CUISINE} if cuisine_id is not None else set()
+    for link, column, kind in LINKS:
+        for recipe_id, feature_id in conn.execute(select(link.recipe_id, column).where(link.recipe_id.in_(recipes))):
+            if recipe_id in features:
+                features[recipe_id].add(feature_id * 4 + kind)
+    return features
+
+
+class SimilarityIndex(RecipeIndex):
+    """Signature matrix, one row per recipe, kept current by RecipeIndex."""
+
+    name = "similar recipes index"
+
+    def __init__(self, engine: Engine):
+        self.signatures = None  # (capacity, SIGNATURE_SIZE) uint32
+        self.tokens: List[frozenset] = []
+        super().__init__(engine)
+
+    def load(self, conn, condition) -> Dict[int, Set[int]]:
+        return load_features(conn, condition)
+
+    def prepare(self, features: Dict[int, Set[int]]) -> Dict[int, Tuple[frozenset, "np.ndarray"]]:
+        return {recipe_id: (frozenset(tokens), signature(tokens)) for recipe_id, tokens in features.items()}
+
+    def _resize(self, capacity: int):
+        signatures = np.full((capacity, SIGNATURE_SIZE), EMPTY, dtype=np.uint32)
+        if self.used:
+            signatures[:self.used] = self.signatures[:self.used]
+        self.signatures = signatures
+        self.tokens = self.tokens[:self.used] + [frozenset()] * (capacity - self.used)
+
+    def _store(self, row: int, item):
+        self.tokens[row], self.signatures[row] = item
+
+    def _clear(self, row: int):
+        self.tokens[row] = frozenset()
+        self.signatures[row] = EMPTY
+
+    async def similar(self, recipe_id: int, limit: int) -> Optional[List[Tuple[int, float]]]:
+        """Up to `limit` (recipe id, Jaccard similarity), best first; None for an unknown recipe."""
+        await self.ensure()  # first use, or a recipe created a moment ago
+        row = self.rows.get(recipe_id)
+        if row is None:
+            return None
+        tokens = self.tokens[row]
+        if not tokens:
+            return []
+        estimate = (self.signatures == self.signatures[row]).sum(axis=1, dtype=np.int32)
+        estimate[row] = 0
+        candidates = min(limit * RERANK, len(estimate) - 1)
+        if candidates <= 0:
+            return []
+        best = np.argpartition(-estimate, candidates)[:candidates]
+        scored = []
+        for candidate in best[estimate[best] > 0]:
+            other = self.tokens[candidate]
+            scored.append((len(tokens & other) / len(tokens | other), -int(self.ids[candidate])))
+        scored.sort(reverse=True)
+        return [(-negative_id, round(score, 4)) for score, negative_id in scored[:limit]]
+
+
+similar_recipes = SimilarityIndex(engine)
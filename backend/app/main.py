@@ -1,9 +1,18 @@
+import asyncio
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from .models import *
 
-from app.core.database import createDB
+from app.core.database import createDB, async_engine, pool_stats
+from app.core.cache import cache
+from app.core.security import shutdownHasher
+from app.core import recommendations, recipe_index
+from app.core import catalog, pantry, similarity  # noqa: F401 -- importing them registers their indexes in recipe_index.INDEXES
+from app.core.querystats import QueryStatsMiddleware
+from app.core.metrics import MetricsMiddleware, metrics, render
 
 from .routers import routers
 
@@ -19,6 +28,24 @@ def on_startup():
     print("Running database creation on startup...")
     createDB() 
 
+@app.on_event("startup")
+async def start_background_jobs():
+    """Keeps the recommendation model and the in-memory recipe indexes in step with the data."""
+    app.state.background_jobs = []
+    if recommendations.available():
+        app.state.background_jobs.append(asyncio.create_task(recommendations.recommender.run()))
+    if recipe_index.available():
+        for index in recipe_index.INDEXES:
+            app.state.background_jobs.append(asyncio.create_task(index.run()))
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stops background jobs, closes the pooled async database connections and the hashing processes."""
+    for task in getattr(app.state, "background_jobs", []):
+        task.cancel()
+    await async_engine.dispose()
+    shutdownHasher()
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +55,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# per-route counters and latency histograms for /metrics; added before
+# QueryStatsMiddleware so it runs inside it and sees the query count
+app.add_middleware(MetricsMiddleware)
+# query count and database time per request (Server-Timing), slow request log
+app.add_middleware(QueryStatsMiddleware)
+
 # Include routers
 
 for router in routers:
@@ -39,4 +72,19 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/db")
+def database_health():
+    """Connection pool occupancy and checkout counters."""
+    return pool_stats()
+
+@app.get("/health/cache")
+def cache_health():
+    """Response cache hit/miss counters, for sizing CACHE_MAX_ENTRIES and CACHE_TTL."""
+    return cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Request, connection pool and cache metrics in the Prometheus text format."""
+    return PlainTextResponse(render(metrics, pool_stats(), cache.stats()), media_type="text/plain; version=0.0.4")
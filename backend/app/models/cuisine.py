@@ -4,6 +4,6 @@ from sqlmodel import SQLModel, Field, Relationship
 
 class Cuisine(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str
+    name: str = Field(index=True)
 
     recipes: List["Recipe"] = Relationship(back_populates="cuisine")
\ No newline at end of file
@@ -1,12 +1,17 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from datetime import datetime
 
 
 
 class Favorite(SQLModel, table = True):
+  __table_args__ = (
+    Index("ix_favorite_user_created", "user_id", "created_at", "recipe_id"),  # keyset pages of one user's favorites
+  )
+
 # composite PK prevents duplicate favorites
   user_id: int = Field(foreign_key="user.id", primary_key=True)
-  recipe_id: int = Field(foreign_key="recipe.id", primary_key=True)
+  recipe_id: int = Field(foreign_key="recipe.id", primary_key=True, index=True) # PK covers user_id lookups
   created_at: datetime = Field(default_factory=datetime.utcnow)
 
   user: "User" = Relationship(back_populates="favorites") #M:M
@@ -4,14 +4,14 @@ from typing import Optional, List
 
 class Ingredient(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str
+    name: str = Field(index=True)
 
     recipes: List["RecipeIngredient"] = Relationship(back_populates="ingredient")
 
 
 class RecipeIngredient(SQLModel, table=True):
     recipe_id: int = Field(foreign_key="recipe.id", primary_key=True)
-    ingredient_id: int = Field(foreign_key="ingredient.id", primary_key=True)
+    ingredient_id: int = Field(foreign_key="ingredient.id", primary_key=True, index=True)  # PK covers recipe_id lookups
     quantity: Optional[str] = None
     ord: Optional[int] = None
 
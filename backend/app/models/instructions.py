@@ -1,8 +1,13 @@
 from typing import Optional
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 
 
 class Instruction(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_instruction_recipe_id_step_number", "recipe_id", "step_number"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     recipe_id: int = Field(foreign_key="recipe.id")
     step_number: int
@@ -1,9 +1,16 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import List, Optional
 from datetime import datetime
 
 
 class Recipe(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_recipe_created_at_id", "created_at", "id"),  # keyset pagination order
+        Index("ix_recipe_rating_avg_count_id", "rating_avg", "rating_count", "id"),  # top-rated order
+        Index("ix_recipe_updated_at", "updated_at"),  # max(updated_at) for the collection ETag
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: Optional[str] = None
@@ -13,18 +20,39 @@ class Recipe(SQLModel, table=True):
     servings: Optional[int] = None
     difficulty: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # bumped by every UPDATE of the row (edits and rating changes); drives the ETags
+    updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
+
+    # review stats maintained by the reviews router (see core/ratings.py)
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_sum: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_avg: float = Field(default=0.0, sa_column_kwargs={"server_default": "0"})
+    rating_1_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_2_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_3_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_4_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_5_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
-    cuisine_id: int = Field(foreign_key="cuisine.id")
+    cuisine_id: int = Field(foreign_key="cuisine.id", index=True)
     cuisine: "Cuisine" = Relationship(back_populates="recipes")
 
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     author: "User" = Relationship(back_populates="recipes")
 
-    ingredients: List["RecipeIngredient"] = Relationship(back_populates="recipe")
-    instructions: List["Instruction"] = Relationship(back_populates="recipe")
+    ingredients: List["RecipeIngredient"] = Relationship(
+        back_populates="recipe", sa_relationship_kwargs={"order_by": "RecipeIngredient.ord"}
+    )
+    instructions: List["Instruction"] = Relationship(
+        back_populates="recipe", sa_relationship_kwargs={"order_by": "Instruction.step_number"}
+    )
     reviews: List["Review"] = Relationship(back_populates="recipe")
     favorites: List["Favorite"] = Relationship(back_populates="recipe")
     diets: List["RecipeDiet"] = Relationship(back_populates="recipe")
     allergies: List["RecipeAllergy"] = Relationship(back_populates="recipe")
-    tags: List["RecipeTag"] = Relationship(back_populates="recipe")
\ No newline at end of file
+    tags: List["RecipeTag"] = Relationship(back_populates="recipe")
+
+    @property
+    def rating_histogram(self) -> List[int]:
+        """Number of 1, 2, 3, 4 and 5 star reviews, in that order."""
+        return [self.rating_1_count, self.rating_2_count, self.rating_3_count,
+                self.rating_4_count, self.rating_5_count]
@@ -1,16 +1,23 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional
 from datetime import datetime
 
 
 class Review(SQLModel, table = True):
+    __table_args__ = (
+        Index("ix_review_created_at_id", "created_at", "id"),  # keyset pagination order
+        # leading recipe_id serves plain recipe_id lookups as well as per-recipe pages
+        Index("ix_review_recipe_id_created_at_id", "recipe_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     rating: int
     comment: str
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     recipe_id: int = Field(foreign_key="recipe.id")
 
     user: "User" = Relationship(back_populates="reviews") #1:M
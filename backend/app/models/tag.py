@@ -4,13 +4,13 @@ from typing import List, Optional
 
 class Tag(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str
+    name: str = Field(index=True)
 
     recipes: List["RecipeTag"] = Relationship(back_populates="tag")
 
 class RecipeTag(SQLModel, table=True):
     recipe_id: int = Field(foreign_key="recipe.id", primary_key=True)
-    tag_id: int = Field(foreign_key="tag.id", primary_key=True)
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True, index=True)  # PK covers recipe_id lookups
 
     # relationships to allow joins
     recipe: "Recipe" = Relationship(back_populates="tags") #M:M
@@ -1,15 +1,19 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import List, Optional
 from datetime import datetime
 
 #from models import *
 
 class User(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_user_created_at_id", "created_at", "id"),  # keyset pagination order
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    username: str
+    username: str = Field(index=True, unique=True)
     display_name: str
-    email: str
+    email: str = Field(index=True, unique=True)
     password_hash: str
     bio: Optional[str] = None
     
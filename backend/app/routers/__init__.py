@@ -1,4 +1,6 @@
 from .auths import router as auth_router
+from .exports import router as export_router
+from .favorites import router as favorite_router
 from .recipes import router as recipe_router
 from .reviews import router as review_router
 from .users import router as user_router
@@ -9,4 +11,6 @@ routers = [
     recipe_router,
     review_router,
     user_router,
+    favorite_router,
+    export_router,
 ]
@@ -1,62 +1,79 @@
-from fastapi import APIRouter, HTTPException
-# The CryptContext setup is no longer needed if not hashing
-# from passlib.context import CryptContext 
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
 from app.models.user import User
-from app.core.database import engine
+from app.core.database import createSession
+from app.core.security import hash_password, verify_password, dummy_hash, needs_rehash, create_token, getCurrentUser
+from app.core import config
+from ..schemas.user_schema import Token, TokenData
 
 router = APIRouter(prefix="/auth")
-# Removed: pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class AuthRequest(BaseModel):
     username: str
     password: str
 
 @router.post("/register")
-def register(auth_data: AuthRequest):
-    """Register a new user with username and password, storing password in plain text."""
-    with Session(engine) as session:
-        # Check if username already exists
-        existing_user = session.exec(select(User).where(User.username == auth_data.username)).first()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already registered")
-        
-        # --- CHANGE 1: Store the plain text password directly ---
-        new_user = User(
-            username=auth_data.username,
-            display_name=auth_data.username,
-            email=f"{auth_data.username}@example.com",
-            # Store the raw, unhashed password
-            password_hash=auth_data.password 
-        )
-        session.add(new_user)
-        session.commit()
-        session.refresh(new_user)
-        
-        return {
-            "message": "User registered successfully (INSECURE)",
-            "user_id": new_user.id,
-            "username": new_user.username
-        }
-
-@router.post("/login")
-def login(auth_data: AuthRequest):
-    """Login by comparing plain text passwords."""
-    with Session(engine) as session:
-        user = session.exec(select(User).where(User.username == auth_data.username)).first()
-        
-        # --- CHANGE 2: Compare the plain text password directly ---
-        # The password_hash field now contains the raw password string
-        if not user or user.password_hash != auth_data.password: 
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        
-        return {
-            "token": "fake-jwt-for-now",
-            "user_id": user.id,
-            "username": user.username,
-            "display_name": user.display_name
-        }
+async def register(auth_data: AuthRequest, session: AsyncSession = Depends(createSession)):
+    """Register a new user with username and password."""
+    # Check if username already exists
+    existing_user = (await session.exec(select(User).where(User.username == auth_data.username))).first()
+    if existing_user:
+        raise HTTPException(status_code=400, detail="Username already registered")
+    
+    new_user = User(
+        username=auth_data.username,
+        display_name=auth_data.username,
+        email=f"{auth_data.username}@example.com",
+        password_hash=await hash_password(auth_data.password),
+    )
+    session.add(new_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Username already registered")
+    await session.refresh(new_user)
+    
+    return {
+        "message": "User registered successfully",
+        "user_id": new_user.id,
+        "username": new_user.username
+    }
+
+@router.post("/login", response_model=Token)
+async def login(auth_data: AuthRequest, session: AsyncSession = Depends(createSession)):
+    """Login with username and password; returns a signed bearer token."""
+    # just the columns needed, found through the unique username index
+    statement = select(User.id, User.username, User.display_name, User.password_hash).where(User.username == auth_data.username)
+    user = (await session.exec(statement)).first()
+    # unknown usernames cost a bcrypt check too, so timing does not reveal which exist
+    password_hash = user.password_hash if user else await dummy_hash()
+    if not await verify_password(auth_data.password, password_hash) or not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if needs_rehash(user.password_hash):
+        # plain text from the old register route, or an outdated BCRYPT_ROUNDS
+        password_hash = await hash_password(auth_data.password)
+        await session.exec(update(User).where(User.id == user.id).values(password_hash=password_hash))
+        await session.commit()
+
+    token_user = TokenData(id=user.id, username=user.username, display_name=user.display_name)
+    return Token(
+        token=create_token(token_user),
+        expires_in=config.JWT_TTL,
+        user_id=user.id,
+        username=user.username,
+        display_name=user.display_name,
+    )
+
+@router.get("/me", response_model=TokenData)
+async def me(current_user: TokenData = Depends(getCurrentUser)):
+    """The signed-in user, read from the token alone."""
+    return current_user
+
 # from fastapi import APIRouter, HTTPException
 # from passlib.context import CryptContext
 # from sqlmodel import Session, select
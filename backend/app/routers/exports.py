@@ -0,0 +1,58 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from ..core.database import async_engine
+from ..core import export
+from ..models.recipe import Recipe
+from ..models.review import Review
+from ..models.user import User
+
+router = APIRouter(prefix="/export")
+
+EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip and encoded per chunk
+
+# table -> exported columns; users leave out credentials and email addresses
+EXPORTS = {
+    "recipes": list(Recipe.__table__.columns),
+    "reviews": list(Review.__table__.columns),
+    "users": [column for column in User.__table__.columns if column.name not in ("password_hash", "email")],
+}
+
+
+@router.get("/{table}")  # stream a whole table as a file
+async def export_table(
+    table: Literal["recipes", "reviews", "users"],
+    format: Literal["ndjson", "csv", "parquet"] = "ndjson",
+    compress: Optional[Literal["gzip"]] = None,
+):
+    """Rows in id order, fetched EXPORT_BATCH_SIZE at a time from a server-side
+    cursor and encoded as they arrive, so memory stays flat whatever the table size."""
+    if format == "parquet" and export.pa is None:
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow (pip install pyarrow)")
+    columns = EXPORTS[table]
+    encode, media_type = export.FORMATS[format]
+
+    async def partitions():
+        # its own connection: the stream outlives the request handler
+        async with async_engine.connect() as conn:
+            result = await conn.stream(
+                select(*columns)
+                .order_by(columns[0].table.c.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for rows in result.partitions():
+                yield rows
+
+    body = encode(columns, partitions())
+    filename = f"{table}.{format}"
+    if compress == "gzip":
+        body = export.gzipped(body)
+        media_type, filename = "application/gzip", f"{filename}.gz"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
+
+from ..core import createSession
+from ..core.pagination import paginate, DEFAULT_LIMIT, MAX_LIMIT
+from ..core.cache import Cache, getCache, user_key
+from ..core.recommendations import interactions_changed
+from ..models.favorite import Favorite
+from ..models.recipe import Recipe
+from ..models.user import User
+from ..schemas.favorite_schema import ReadFavoriteBase, CreateFavoriteBase, FavoritePage, FavoriteCheck
+
+router = APIRouter(prefix="/favorites")
+
+MAX_CHECK_RECIPES = 200  # one page of recipe cards at MAX_LIMIT
+
+
+async def _exists(session: AsyncSession, column, value) -> bool:
+    return (await session.exec(select(column).where(column == value))).first() is not None
+
+@router.post("/", response_model=ReadFavoriteBase)  # favorite a recipe; repeating it is a no-op
+async def add_favorite(
+    favorite: CreateFavoriteBase,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    existing = await session.get(Favorite, (favorite.user_id, favorite.recipe_id))
+    if existing:
+        return existing
+    # SQLite does not enforce the foreign keys, so check them here
+    if not await _exists(session, User.id, favorite.user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    if not await _exists(session, Recipe.id, favorite.recipe_id):
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    new_favorite = Favorite(user_id=favorite.user_id, recipe_id=favorite.recipe_id)
+    session.add(new_favorite)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # a concurrent request added the same favorite first
+        await session.rollback()
+        return await session.get(Favorite, (favorite.user_id, favorite.recipe_id))
+    await cache.invalidate(user_key(favorite.user_id))  # favorite_count
+    interactions_changed()
+    return new_favorite
+
+@router.delete("/{user_id}/{recipe_id}", response_model=dict)  # unfavorite a recipe
+async def remove_favorite(
+    user_id: int,
+    recipe_id: int,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    favorite = await session.get(Favorite, (user_id, recipe_id))
+    if not favorite:
+        raise HTTPException(status_code=404, detail="Favorite not found")
+    await session.delete(favorite)
+    await session.commit()
+    await cache.invalidate(user_key(user_id))
+    interactions_changed()
+    return {"message": "Favorite removed"}
+
+@router.get("/user/{user_id}", response_model=FavoritePage)  # a user's favorites, one page at a time
+async def get_user_favorites(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: AsyncSession = Depends(createSession),
+):
+    statement = select(Favorite).where(Favorite.user_id == user_id)
+    favorites, next_cursor = await paginate(session, statement, Favorite, cursor, limit, id_column=Favorite.recipe_id)
+    return FavoritePage(items=favorites, next_cursor=next_cursor)
+
+@router.get("/user/{user_id}/check", response_model=FavoriteCheck)  # which of these recipes are favorites
+async def check_favorites(
+    user_id: int,
+    recipe_ids: List[int] = Query(...),
+    session: AsyncSession = Depends(createSession),
+):
+    """One primary key lookup for a whole page of recipe cards:
+    SELECT recipe_id FROM favorite WHERE user_id = ? AND recipe_id IN (...)."""
+    if len(recipe_ids) > MAX_CHECK_RECIPES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CHECK_RECIPES} recipe ids per request")
+    statement = select(Favorite.recipe_id).where(Favorite.user_id == user_id, Favorite.recipe_id.in_(recipe_ids))
+    favorited = set((await session.exec(statement)).all())
+    return FavoriteCheck(user_id=user_id, recipe_ids=[recipe_id for recipe_id in dict.fromkeys(recipe_ids) if recipe_id in favorited])
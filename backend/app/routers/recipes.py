@@ -1,54 +1,408 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlmodel import select, func, or_, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 #from schemas import recipe_schema
 #from core import createSession
 
 from ..models.recipe import Recipe 
-from ..schemas import ReadRecipeBase, CreateRecipeBase, UpdateRecipeBase
-from typing import List
+from ..models.diet import Diet, RecipeDiet
+from ..models.cuisine import Cuisine
+from ..models.user import User
+from ..models.ingredient import Ingredient, RecipeIngredient
+from ..models.tag import RecipeTag
+from ..models.allergy import Allergy, RecipeAllergy
+from ..models.favorite import Favorite
+from ..models.review import Review
+from ..schemas import ReadRecipeBase, ReadRecipeFull, ReadRecipeIngredient, CreateRecipeBase, UpdateRecipeBase, RecipePage, RecipeSearchPage, BatchRecipe, RecipeBatchResult
+from ..schemas import Recommendation, SimilarRecipes, PantryQuery, PantryMatch, PantryResult
+from ..schemas import FacetCount, TimeBucketCount, RecipeFacets
+from typing import List, Literal, Optional
+from datetime import datetime
 from ..core.database import createSession
+from ..core import fts
+from ..core.cache import Cache, getCache, recipe_key, user_key, recipe_reviews_tag, facets_key
+from ..core.conditional import make_etag, not_modified
+from ..core.pagination import paginate, DEFAULT_LIMIT, MAX_LIMIT
+from ..core.batch import save_recipes, RECIPE_LISTS
+from ..core import pantry, similarity
+from ..core.catalog import catalog, available as catalog_available, TIME_BUCKETS
+from ..core.pantry import pantry as pantry_index
+from ..core.recipe_index import recipes_changed, recipe_deleted
+from ..core.recommendations import interactions_changed
+from ..core.similarity import similar_recipes
 
 router = APIRouter(prefix="/recipes")
 
+MAX_BATCH_RECIPES = 5000
+MAX_SIMILAR = 50
+MAX_PANTRY_INGREDIENTS = 200
+
+# rows that point at a recipe and go with it
+RECIPE_CHILDREN = RECIPE_LISTS + (RecipeAllergy, Favorite, Review)
+
+
+def _like_pattern(text: str) -> str:
+    """Wrap user input in % wildcards, escaping LIKE metacharacters."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# sort name -> ORDER BY; top_rated walks ix_recipe_rating_avg_count_id backwards
+SORT_ORDERS = {
+    "newest": (Recipe.created_at.desc(), Recipe.id.desc()),
+    "top_rated": (Recipe.rating_avg.desc(), Recipe.rating_count.desc(), Recipe.id.desc()),
+    "relevance": (fts.recipe_fts.c.rank, Recipe.id.desc()),  # only with a full-text query
+}
+
+
+def _recipe_filters(q, difficulty, cuisine_id, diet_id, min_time, max_time, min_rating=None,
+                    diet_match="any", exclude_allergy_id=()):
+    """Build the WHERE clauses shared by the search listing and its count.
+
+    `q` is matched with LIKE here; search_recipes uses the FTS index instead
+    when the database has one and passes q=None. Without a query the listing
+    is answered from the in-memory catalog instead (core/catalog.py), these
+    are the equivalent SQL for searches and for installs without numpy.
+    """
+    conditions = []
+    if q:
+        pattern = _like_pattern(q.strip())
+        authors = select(User.id).where(User.display_name.ilike(pattern, escape="\\"))
+        conditions.append(or_(
+            Recipe.title.ilike(pattern, escape="\\"),
+            Recipe.description.ilike(pattern, escape="\\"),
+            Recipe.user_id.in_(authors),
+        ))
+    if difficulty:
+        conditions.append(Recipe.difficulty.in_(difficulty))
+    if cuisine_id:
+        conditions.append(Recipe.cuisine_id.in_(cuisine_id))
+    if diet_id and diet_match == "all":
+        for one_diet in diet_id:
+            conditions.append(Recipe.id.in_(select(RecipeDiet.recipe_id).where(RecipeDiet.diet_id == one_diet)))
+    elif diet_id:
+        # any of the selected diets matches, same as the sidebar checkboxes
+        conditions.append(Recipe.id.in_(select(RecipeDiet.recipe_id).where(RecipeDiet.diet_id.in_(diet_id))))
+    if exclude_allergy_id:
+        conditions.append(Recipe.id.not_in(
+            select(RecipeAllergy.recipe_id).where(RecipeAllergy.allergy_id.in_(exclude_allergy_id))
+        ))
+    total_time = func.coalesce(Recipe.prep_time, 0) + func.coalesce(Recipe.cook_time, 0)
+    if min_time is not None:
+        conditions.append(total_time >= min_time)
+    if max_time is not None:
+        conditions.append(total_time <= max_time)
+    if min_rating is not None:
+        conditions.append(Recipe.rating_avg >= min_rating)
+    return conditions
+
 @router.post("/", response_model=ReadRecipeBase)  # create a recipe
-def create_recipe(recipe: CreateRecipeBase, session: Session = Depends(createSession)):
+async def create_recipe(
+    recipe: CreateRecipeBase,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
     new_recipe = Recipe(**recipe.model_dump())
     session.add(new_recipe)
-    session.commit()
-    session.refresh(new_recipe)
+    await session.commit()
+    await session.refresh(new_recipe)
+    await cache.invalidate(user_key(new_recipe.user_id))  # author's recipe_count
+    recipes_changed()
     return new_recipe
 
-@router.get("/{recipe_id}", response_model=ReadRecipeBase)  # get recipe by id
-def get_recipe(recipe_id: int, session: Session = Depends(createSession)):
-    recipe = session.get(Recipe, recipe_id)
+@router.post("/batch", response_model=RecipeBatchResult)  # create or replace many recipes with their lists
+async def batch_recipes(
+    recipes: List[BatchRecipe],
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    """One transaction for the whole batch; invalid items are reported per item and skipped."""
+    if len(recipes) > MAX_BATCH_RECIPES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_RECIPES} recipes per request")
+    results, authors = await save_recipes(session, recipes)
+    await session.commit()
+    await cache.invalidate(
+        *(recipe_key(result.id) for result in results if result.status == "updated"),
+        *(user_key(user_id) for user_id in authors),
+    )
+    recipes_changed()
+    return RecipeBatchResult(
+        created=sum(result.status == "created" for result in results),
+        updated=sum(result.status == "updated" for result in results),
+        failed=sum(result.status == "error" for result in results),
+        items=results,
+    )
+
+@router.get("/search", response_model=RecipeSearchPage)  # search and filter recipes
+async def search_recipes(
+    q: Optional[str] = None,
+    difficulty: List[str] = Query(default=[]),
+    cuisine_id: List[int] = Query(default=[]),
+    diet_id: List[int] = Query(default=[]),
+    diet_match: Literal["any", "all"] = "any",  # all: on every listed diet, e.g. vegan AND gluten-free
+    exclude_allergy_id: List[int] = Query(default=[]),  # contains none of these allergens
+    min_time: Optional[int] = Query(default=None, ge=0),  # prep_time + cook_time, in minutes
+    max_time: Optional[int] = Query(default=None, ge=0),
+    min_rating: Optional[float] = Query(default=None, ge=0, le=5),
+    sort: Optional[Literal["relevance", "newest", "top_rated"]] = None,  # relevance when q is given, else newest
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(createSession),
+):
+    if not (q and q.strip()) and catalog_available():
+        # browsing without a text query: filtered, counted and paged in memory,
+        # one query fetches the page
+        total, ids = await catalog.search(
+            "top_rated" if sort == "top_rated" else "newest", offset, limit,
+            difficulty=difficulty, cuisine_id=cuisine_id, diet_id=diet_id, diet_match=diet_match,
+            exclude_allergy_id=exclude_allergy_id, min_time=min_time, max_time=max_time, min_rating=min_rating,
+        )
+        found = {recipe.id: recipe for recipe in (await session.exec(select(Recipe).where(Recipe.id.in_(ids)))).all()} if ids else {}
+        return RecipeSearchPage(items=[found[recipe_id] for recipe_id in ids if recipe_id in found],
+                                total=total, limit=limit, offset=offset)
+
+    statement = select(Recipe)
+    count_statement = select(func.count()).select_from(Recipe)
+    match = fts.match_query(q) if q and fts.is_supported(session.get_bind()) else None
+    if match:
+        # ranked prefix matching over title, description, ingredients and author
+        statement = statement.join(fts.recipe_fts, fts.recipe_fts.c.rowid == Recipe.id).where(fts.matches(match))
+        count_statement = count_statement.join(fts.recipe_fts, fts.recipe_fts.c.rowid == Recipe.id).where(fts.matches(match))
+        q = None
+    if sort is None or (sort == "relevance" and not match):
+        sort = "relevance" if match else "newest"
+
+    conditions = _recipe_filters(q, difficulty, cuisine_id, diet_id, min_time, max_time, min_rating,
+                                 diet_match, exclude_allergy_id)
+    total = (await session.exec(count_statement.where(*conditions))).one()
+    recipes = (await session.exec(
+        statement
+        .where(*conditions)
+        .order_by(*SORT_ORDERS[sort])
+        .offset(offset)
+        .limit(limit)
+    )).all()
+    return RecipeSearchPage(items=recipes, total=total, limit=limit, offset=offset)
+
+@router.get("/facets", response_model=RecipeFacets)  # counts for the browse sidebar
+async def recipe_facets(
+    request: Request,
+    response: Response,
+    q: Optional[str] = None,
+    difficulty: List[str] = Query(default=[]),
+    cuisine_id: List[int] = Query(default=[]),
+    diet_id: List[int] = Query(default=[]),
+    diet_match: Literal["any", "all"] = "any",
+    exclude_allergy_id: List[int] = Query(default=[]),
+    min_time: Optional[int] = Query(default=None, ge=0),
+    max_time: Optional[int] = Query(default=None, ge=0),
+    min_rating: Optional[float] = Query(default=None, ge=0, le=5),
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    """Recipes per cuisine, difficulty, diet, allergen and cooking time for the filters
+    of /recipes/search, counted over the in-memory catalog in one request.
+
+    Each facet ignores its own filter, so the other options keep their counts.
+    Bodies are cached and ETagged per filter set and catalog snapshot.
+    """
+    if not catalog_available():
+        raise HTTPException(status_code=501, detail="Facet counts need numpy (pip install .[recommendations])")
+    await catalog.ensure()  # applies this process's pending writes, so the etag below is current
+    q = q.strip() if q else None
+    filters = dict(difficulty=sorted(difficulty), cuisine_id=sorted(cuisine_id), diet_id=sorted(diet_id),
+                   diet_match=diet_match, exclude_allergy_id=sorted(exclude_allergy_id),
+                   min_time=min_time, max_time=max_time, min_rating=min_rating)
+    # the watermark and recipe count move with every write the catalog has applied
+    etag = make_etag("facets", catalog.watermark, len(catalog.rows), q, *filters.items())
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    body = await cache.get(facets_key(etag))
+    if body is not None:
+        return body
+
+    within = None
+    if q:
+        match = fts.match_query(q) if fts.is_supported(session.get_bind()) else None
+        if match:
+            matches = select(fts.recipe_fts.c.rowid).where(fts.matches(match))
+        else:
+            matches = select(Recipe.id).where(*_recipe_filters(q, [], [], [], None, None))
+        within = catalog.rows_of((await session.exec(matches)).all())
+    counts = catalog.facets(within, **filters)
+    cuisines = (await session.exec(select(Cuisine.id, Cuisine.name).order_by(Cuisine.name))).all()
+    diets = (await session.exec(select(Diet.id, Diet.name).order_by(Diet.name))).all()
+    allergies = (await session.exec(select(Allergy.id, Allergy.name).order_by(Allergy.name))).all()
+    body = RecipeFacets(
+        total=counts["total"],
+        cuisine=[FacetCount(id=row_id, name=name, count=counts["cuisine"].get(row_id, 0)) for row_id, name in cuisines],
+        difficulty=[FacetCount(name=name, count=count) for name, count in sorted(counts["difficulty"].items())],
+        diet=[FacetCount(id=row_id, name=name, count=counts["diet"].get(row_id, 0)) for row_id, name in diets],
+        allergy_free=[FacetCount(id=row_id, name=name, count=counts["allergy_free"].get(row_id, counts["allergy_candidates"]))
+                      for row_id, name in allergies],
+        cooking_time=[TimeBucketCount(name=name, min_time=low, max_time=high, count=counts["cooking_time"][name])
+                      for name, low, high in TIME_BUCKETS],
+    ).model_dump(mode="json")
+    await cache.set(facets_key(etag), body)
+    return body
+
+@router.post("/by-ingredients", response_model=PantryResult)  # recipes that can be cooked from the ingredients at hand
+async def recipes_by_ingredients(query: PantryQuery, session: AsyncSession = Depends(createSession)):
+    """Ranked from the in-memory ingredient bitsets; the only query resolves ingredient names."""
+    if not pantry.available():
+        raise HTTPException(status_code=501, detail="Searching by ingredients needs numpy (pip install .[recommendations])")
+    if len(query.ingredient_ids) + len(query.ingredients) > MAX_PANTRY_INGREDIENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PANTRY_INGREDIENTS} ingredients per request")
+    ingredient_ids = set(query.ingredient_ids)
+    unknown = []
+    names = list(dict.fromkeys(name.strip() for name in query.ingredients if name.strip()))
+    if names:
+        found = dict((await session.exec(select(Ingredient.name, Ingredient.id).where(Ingredient.name.in_(names)))).all())
+        ingredient_ids.update(found.values())
+        unknown = [name for name in names if name not in found]
+    total, matches = await pantry_index.cookable(
+        ingredient_ids, query.max_missing, query.limit, query.diet_ids, query.exclude_allergy_ids,
+    )
+    return PantryResult(
+        items=[PantryMatch(recipe_id=recipe_id, have=have, missing=len(lacking), missing_ingredient_ids=lacking)
+               for recipe_id, have, lacking in matches],
+        total=total,
+        unknown_ingredients=unknown,
+    )
+
+@router.get("/{recipe_id}/full", response_model=ReadRecipeFull)  # recipe with everything needed to cook it
+async def get_recipe_full(recipe_id: int, session: AsyncSession = Depends(createSession)):
+    # fixed 6 queries whatever the recipe size: the recipe joined to cuisine and
+    # author, then one SELECT ... IN per collection (each joined to its lookup table)
+    recipe = (await session.exec(
+        select(Recipe)
+        .where(Recipe.id == recipe_id)
+        .options(
+            joinedload(Recipe.cuisine),
+            joinedload(Recipe.author),
+            selectinload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient),
+            selectinload(Recipe.instructions),
+            selectinload(Recipe.tags).joinedload(RecipeTag.tag),
+            selectinload(Recipe.diets).joinedload(RecipeDiet.diet),
+            selectinload(Recipe.allergies).joinedload(RecipeAllergy.allergy),
+        )
+    )).first()
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    return recipe   
+    return ReadRecipeFull(
+        **ReadRecipeBase.model_validate(recipe).model_dump(),
+        cuisine=recipe.cuisine,
+        author=recipe.author,
+        ingredients=[
+            ReadRecipeIngredient(id=link.ingredient_id, name=link.ingredient.name, quantity=link.quantity, ord=link.ord)
+            for link in recipe.ingredients
+        ],
+        instructions=recipe.instructions,
+        tags=[link.tag for link in recipe.tags],
+        diets=[link.diet for link in recipe.diets],
+        allergies=[link.allergy for link in recipe.allergies],
+    )
+
+@router.get("/{recipe_id}/similar", response_model=SimilarRecipes)  # recipes with the most ingredients, tags and diets in common
+async def get_similar_recipes(recipe_id: int, limit: int = Query(default=10, ge=1, le=MAX_SIMILAR)):
+    """Answered from the in-memory MinHash index, without a query."""
+    if not similarity.available():
+        raise HTTPException(status_code=501, detail="Similar recipes need numpy (pip install .[recommendations])")
+    similar = await similar_recipes.similar(recipe_id, limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return SimilarRecipes(
+        recipe_id=recipe_id,
+        items=[Recommendation(recipe_id=other_id, score=score) for other_id, score in similar],
+    )
+
+@router.get("/{recipe_id}", response_model=ReadRecipeBase)  # get recipe by id
+async def get_recipe(
+    recipe_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    body = await cache.get(recipe_key(recipe_id))
+    if body is None:
+        recipe = await session.get(Recipe, recipe_id)
+        if not recipe:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        body = ReadRecipeBase.model_validate(recipe).model_dump(mode="json")
+        await cache.set(recipe_key(recipe_id), body)
+    # updated_at moves with every edit and rating change
+    etag = make_etag("recipe", recipe_id, body["updated_at"])
+    unchanged = not_modified(request, response, etag, datetime.fromisoformat(body["updated_at"]))
+    if unchanged:
+        return unchanged
+    return body
 
-@router.get("/", response_model=List[ReadRecipeBase])  # get all recipes
-def get_all_recipes(session: Session = Depends(createSession)):
-    recipes = session.exec(select(Recipe)).all()
-    return recipes
+@router.get("/", response_model=RecipePage)  # get all recipes, one page at a time
+async def get_all_recipes(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: AsyncSession = Depends(createSession),
+):
+    # any edit moves max(updated_at) and any insert or delete moves the count,
+    # so the pair validates every page without reading it
+    last_modified, total = (await session.exec(select(func.max(Recipe.updated_at), func.count(Recipe.id)))).one()
+    etag = make_etag("recipes", last_modified, total, cursor, limit)
+    unchanged = not_modified(request, response, etag, last_modified)
+    if unchanged:
+        return unchanged
+    recipes, next_cursor = await paginate(session, select(Recipe), Recipe, cursor, limit)
+    return RecipePage(items=recipes, next_cursor=next_cursor)
 
 @router.put("/{recipe_id}", response_model=ReadRecipeBase)  # update recipe by id
-def update_recipe(recipe_id: int, recipe_data: UpdateRecipeBase, session: Session = Depends(createSession)):
-    recipe = session.get(Recipe, recipe_id)
+async def update_recipe(
+    recipe_id: int,
+    recipe_data: UpdateRecipeBase,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    recipe = await session.get(Recipe, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
+    previous_author = recipe.user_id
     for key, value in recipe_data.dict(exclude_unset=True).items():
         setattr(recipe, key, value)
     session.add(recipe)
-    session.commit()
-    session.refresh(recipe)
+    await session.commit()
+    await session.refresh(recipe)
+    await cache.invalidate(recipe_key(recipe_id))
+    if recipe.user_id != previous_author:
+        await cache.invalidate(user_key(previous_author), user_key(recipe.user_id))
+    recipes_changed()  # the cuisine may have changed
     return recipe
 
 @router.delete("/{recipe_id}")  # delete recipe by id
-def delete_recipe(recipe_id: int, session: Session = Depends(createSession)):
-    recipe = session.get(Recipe, recipe_id)
+async def delete_recipe(
+    recipe_id: int,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    recipe = await session.get(Recipe, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    session.delete(recipe)
-    session.commit()
+    # their favorite_count and review_count drop with the recipe
+    fans = select(Favorite.user_id).where(Favorite.recipe_id == recipe_id)
+    reviewers = select(Review.user_id).where(Review.recipe_id == recipe_id)
+    user_ids = set((await session.execute(fans.union(reviewers))).scalars().all())
+    # bulk deletes, children first: the ORM would try to blank out the link
+    # rows' recipe_id, which is part of their primary key
+    for model in RECIPE_CHILDREN:
+        await session.exec(delete(model).where(model.recipe_id == recipe_id))
+    await session.exec(delete(Recipe).where(Recipe.id == recipe_id))
+    await session.commit()
+    await cache.invalidate(recipe_key(recipe_id), *(user_key(user_id) for user_id in user_ids | {recipe.user_id}))
+    await cache.invalidate_tag(recipe_reviews_tag(recipe_id))
+    recipe_deleted(recipe_id)
+    interactions_changed()  # its favorites and reviews went with it
     return {"message": "Recipe deleted successfully"}
 
 
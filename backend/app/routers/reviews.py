@@ -1,59 +1,128 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 # from schemas import *
 from ..core import createSession
+from ..core.pagination import paginate, DEFAULT_LIMIT, MAX_LIMIT
+from ..core.ratings import rating_change
+from ..core.cache import Cache, getCache, recipe_key, user_key, recipe_reviews_tag
+from ..core.conditional import make_etag, not_modified
+from ..core.recipe_index import recipes_changed
+from ..core.recommendations import interactions_changed
 
+from ..models.recipe import Recipe
 from ..models.review import Review
-from ..schemas.review_schema import ReadReviewBase, CreateReviewBase
-from typing import List
+from ..schemas.review_schema import ReadReviewBase, CreateReviewBase, ReviewPage
+from typing import Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/reviews")
 
+
+async def _invalidate_review(cache: Cache, review: Review):
+    # the recipe's rating stats, the author's review_count and the recipe's review pages
+    await cache.invalidate(recipe_key(review.recipe_id), user_key(review.user_id))
+    await cache.invalidate_tag(recipe_reviews_tag(review.recipe_id))
+    recipes_changed()  # the in-memory catalog sorts and filters on the ratings
+    interactions_changed()
+
 @router.post("/", response_model=ReadReviewBase)  # create a review
-def create_review(review: CreateReviewBase, session: Session = Depends(createSession)):
+async def create_review(
+    review: CreateReviewBase,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
     new_review = Review.from_orm(review)
+    # the recipe's rating stats move in the same transaction as the review
+    if (await session.exec(rating_change(review.recipe_id, added=review.rating))).rowcount == 0:
+        raise HTTPException(status_code=404, detail="Recipe not found")
     session.add(new_review)
-    session.commit()
-    session.refresh(new_review)
+    await session.commit()
+    await session.refresh(new_review)
+    await _invalidate_review(cache, new_review)
     return new_review
 
 @router.get("/{review_id}", response_model=ReadReviewBase)  # get review by id
-def get_review(review_id: int, session: Session = Depends(createSession)):
-    review = session.get(Review, review_id)
+async def get_review(review_id: int, session: AsyncSession = Depends(createSession)):
+    review = await session.get(Review, review_id)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     return review
 
-@router.get("/", response_model=List[ReadReviewBase])  # get all reviews
-def get_all_reviews(session: Session = Depends(createSession)):
-    reviews = session.exec(select(Review)).all()
-    return reviews
+@router.get("/", response_model=ReviewPage)  # get all reviews, one page at a time
+async def get_all_reviews(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: AsyncSession = Depends(createSession),
+):
+    reviews, next_cursor = await paginate(session, select(Review), Review, cursor, limit)
+    return ReviewPage(items=reviews, next_cursor=next_cursor)
 
-@router.get("/recipe/{recipe_id}", response_model=List[ReadReviewBase])  # get reviews for a recipe
-def get_reviews_for_recipe(recipe_id: int, session: Session = Depends(createSession)):
-    reviews = session.exec(select(Review).where(Review.recipe_id == recipe_id)).all()
-    return reviews  
+@router.get("/recipe/{recipe_id}", response_model=ReviewPage)  # get reviews for a recipe
+async def get_reviews_for_recipe(
+    recipe_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    key = f"{recipe_reviews_tag(recipe_id)}?cursor={cursor or ''}&limit={limit}"
+    # cached as {"updated_at", "page"}; every review write bumps the recipe's
+    # updated_at, so it validates the page without reading the reviews
+    cached = await cache.get(key)
+    if cached is None:
+        updated_at = (await session.exec(select(Recipe.updated_at).where(Recipe.id == recipe_id))).first()
+        if updated_at is None:
+            return ReviewPage(items=[])  # unknown recipe, nothing to validate against
+        cached = {"updated_at": updated_at.isoformat(), "page": None}
+    etag = make_etag("reviews", recipe_id, cached["updated_at"], cursor, limit)
+    unchanged = not_modified(request, response, etag, datetime.fromisoformat(cached["updated_at"]))
+    if unchanged:
+        return unchanged
+    if cached["page"] is None:
+        statement = select(Review).where(Review.recipe_id == recipe_id)
+        reviews, next_cursor = await paginate(session, statement, Review, cursor, limit)
+        cached["page"] = ReviewPage(items=reviews, next_cursor=next_cursor).model_dump(mode="json")
+        await cache.set(key, cached, tags=[recipe_reviews_tag(recipe_id)])
+    return cached["page"]
 
 @router.delete("/{review_id}")  # delete review by id
-def delete_review(review_id: int, session: Session = Depends(createSession)):
-    review = session.get(Review, review_id)
+async def delete_review(
+    review_id: int,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    review = await session.get(Review, review_id)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
-    session.delete(review)
-    session.commit()
+    await session.exec(rating_change(review.recipe_id, removed=review.rating))
+    await session.delete(review)
+    await session.commit()
+    await _invalidate_review(cache, review)
     return {"message": "Review deleted successfully"}
 
 
 @router.put("/{review_id}", response_model=ReadReviewBase)  # update review by id
-def update_review(review_id: int, review_data: CreateReviewBase, session: Session = Depends(createSession)):
-    review = session.get(Review, review_id)
+async def update_review(
+    review_id: int,
+    review_data: CreateReviewBase,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    review = await session.get(Review, review_id)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
+    # run even when only the comment changed: the UPDATE bumps the recipe's
+    # updated_at, which the review-list ETag is derived from
+    await session.exec(rating_change(review.recipe_id, added=review_data.rating, removed=review.rating))
     review.rating = review_data.rating
     review.comment = review_data.comment
     session.add(review)
-    session.commit()
-    session.refresh(review)
+    await session.commit()
+    await session.refresh(review)
+    await _invalidate_review(cache, review)
     return review
 
 #i was hereeeeewnfowbhnuojbgruj
\ No newline at end of file
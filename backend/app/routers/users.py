@@ -1,72 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 from app.models.user import User
-from ..schemas.user_schema import ReadUser, CreateUser, UserWithDetails
+from app.models.recipe import Recipe
+from app.models.favorite import Favorite
+from app.models.review import Review
+from ..schemas.user_schema import ReadUser, CreateUser, UserWithDetails, UserPage
+from ..schemas.recommendation_schema import Recommendation, RecommendationList
 from app.core.database import createSession
-from passlib.context import CryptContext # NEW IMPORT
+from app.core.pagination import paginate, DEFAULT_LIMIT, MAX_LIMIT
+from app.core.cache import Cache, getCache, user_key
+from app.core.conditional import make_etag, not_modified
+from app.core.security import hash_password
+from app.core import config
+from app.core.recommendations import recommender, interactions, popular_recipes, available as recommendations_available
 
 router = APIRouter(prefix="/users")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto") # NEW
 
-@router.get("/", response_model=List[ReadUser])
-def get_users(session: Session = Depends(createSession)):
-    # ... (unchanged) ...
-    users = session.exec(select(User)).all()
-    return users
+MAX_BATCH_USERS = 100
+
+
+async def _user_details(session: AsyncSession, *conditions) -> List[UserWithDetails]:
+    """Profile rows with their counts, all in one query.
+
+    Each count is a correlated COUNT answered from an index (ix_recipe_user_id,
+    the favorite primary key, ix_review_user_id) instead of loading the related
+    rows through the relationships.
+    """
+    def count_of(column, user_column):
+        return select(func.count(column)).where(user_column == User.id).scalar_subquery()
+
+    statement = select(
+        User.id,
+        User.username,
+        User.display_name,
+        User.bio,
+        User.created_at,
+        count_of(Recipe.id, Recipe.user_id).label("recipe_count"),
+        count_of(Favorite.recipe_id, Favorite.user_id).label("favorite_count"),
+        count_of(Review.id, Review.user_id).label("review_count"),
+    ).where(*conditions)
+    return [UserWithDetails(**row._mapping) for row in await session.exec(statement)]
+
+@router.get("/", response_model=UserPage)
+async def get_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    session: AsyncSession = Depends(createSession),
+):
+    users, next_cursor = await paginate(session, select(User), User, cursor, limit)
+    return UserPage(items=users, next_cursor=next_cursor)
+
+@router.get("/batch", response_model=List[UserWithDetails])
+async def get_users_batch(ids: List[int] = Query(...), session: AsyncSession = Depends(createSession)):
+    """Profiles for many users in one round trip, in the order requested; unknown ids are skipped."""
+    if len(ids) > MAX_BATCH_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_USERS} ids per request")
+    found = {user.id: user for user in await _user_details(session, User.id.in_(ids))}
+    return [found[user_id] for user_id in dict.fromkeys(ids) if user_id in found]
 
 @router.get("/{user_id}", response_model=UserWithDetails)
-def get_user(user_id: int, session: Session = Depends(createSession)):
-    # ... (unchanged) ...
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Create response with counts
-    return UserWithDetails(
-        id=user.id,
-        username=user.username,
-        display_name=user.display_name,
-        bio=user.bio,
-        created_at=user.created_at,
-        recipe_count=len(user.recipes),
-        favorite_count=len(user.favorites),
-        review_count=len(user.reviews)
+async def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
+    body = await cache.get(user_key(user_id))
+    if body is None:
+        users = await _user_details(session, User.id == user_id)
+        if not users:
+            raise HTTPException(status_code=404, detail="User not found")
+        body = users[0].model_dump(mode="json")
+        await cache.set(user_key(user_id), body)
+    # users have no updated_at; the profile is a handful of scalars, validate on all of them
+    etag = make_etag("user", *(body[field] for field in sorted(body)))
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    return body
+
+@router.get("/{user_id}/recommendations", response_model=RecommendationList)  # recipes this user may like
+async def get_recommendations(
+    user_id: int,
+    limit: int = Query(default=config.RECOMMENDATIONS_LIMIT, ge=1, le=MAX_LIMIT),
+    session: AsyncSession = Depends(createSession),
+):
+    """Item-item collaborative filtering over favorites and reviews.
+
+    The only query is the user's own interactions; the neighbor table is in
+    memory. Users without usable history (including unknown ids) get the most
+    popular recipes, flagged with fallback=True; so does everyone while there
+    are no favorites or reviews to build a model from.
+    """
+    if not recommendations_available():
+        raise HTTPException(status_code=501, detail="Recommendations need numpy and scipy (pip install .[recommendations])")
+    model = await recommender.current()
+    if model is None:
+        popular = (await session.exec(popular_recipes(limit))).scalars().all()
+        return RecommendationList(
+            user_id=user_id,
+            items=[Recommendation(recipe_id=recipe_id, score=0.0) for recipe_id in popular],
+            fallback=True,
+        )
+    rows = (await session.exec(interactions(user_id))).all()
+    picked, fallback = model.recommend([(recipe_id, kind) for _, recipe_id, kind in rows], limit)
+    return RecommendationList(
+        user_id=user_id,
+        items=[Recommendation(recipe_id=recipe_id, score=score) for recipe_id, score in picked],
+        fallback=fallback,
+        model_built_at=model.built_at,
     )
 
 @router.get("/username/{username}", response_model=UserWithDetails)
-def get_user_by_username(username: str, session: Session = Depends(createSession)):
-    # ... (unchanged) ...
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user:
+async def get_user_by_username(username: str, session: AsyncSession = Depends(createSession)):
+    users = await _user_details(session, User.username == username)
+    if not users:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # Create response with counts
-    return UserWithDetails(
-        id=user.id,
-        username=user.username,
-        display_name=user.display_name,
-        bio=user.bio,
-        created_at=user.created_at,
-        recipe_count=len(user.recipes),
-        favorite_count=len(user.favorites),
-        review_count=len(user.reviews)
-    )
+    return users[0]
 
 @router.post("/", response_model=ReadUser)
-def create_user(user: CreateUser, session: Session = Depends(createSession)):
+async def create_user(user: CreateUser, session: AsyncSession = Depends(createSession)):
     # Check if username already exists
-    db_user = session.exec(select(User).where(User.username == user.username)).first()
+    db_user = (await session.exec(select(User).where(User.username == user.username))).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Check if email already exists
-    db_user = session.exec(select(User).where(User.email == user.email)).first()
+    db_user = (await session.exec(select(User).where(User.email == user.email))).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # NEW: Hash the password before storing it
-    hashed_pw = pwd_context.hash(user.password)
+    # bcrypt is slow on purpose, it runs in the hashing process pool
+    hashed_pw = await hash_password(user.password)
     
     # Create new user
     new_user = User(
@@ -78,19 +148,29 @@ def create_user(user: CreateUser, session: Session = Depends(createSession)):
     )
     
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # lost a race with a concurrent sign-up; the unique indexes caught it
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Username or email already registered")
+    await session.refresh(new_user)
     return new_user
 
 @router.delete("/{user_id}", response_model=dict)
-def delete_user(user_id: int, session: Session = Depends(createSession)):
+async def delete_user(
+    user_id: int,
+    session: AsyncSession = Depends(createSession),
+    cache: Cache = Depends(getCache),
+):
     # ... (unchanged) ...
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    session.delete(user)
-    session.commit()
+    await session.delete(user)
+    await session.commit()
+    await cache.invalidate(user_key(user_id))
     return {"detail": "User deleted successfully"}
 # from fastapi import APIRouter, Depends, HTTPException
 # from sqlmodel import Session, select
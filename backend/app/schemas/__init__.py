@@ -1,13 +1,30 @@
-from .user_schema import ReadUser, CreateUser, UpdateUser, UserPublic, UserWithCounts, UserWithDetails
+from .user_schema import ReadUser, CreateUser, UpdateUser, UserPublic, UserWithCounts, UserWithDetails, UserPage
+from .user_schema import Token, TokenData
 #UserWithRecipes
 # UserWithDetails, LoginData, Token, TokenData
-from .recipe_schema import ReadRecipeBase, CreateRecipeBase, UpdateRecipeBase
-from .review_schema import ReadReviewBase, CreateReviewBase
+from .recipe_schema import ReadRecipeBase, ReadRecipeFull, CreateRecipeBase, UpdateRecipeBase, RecipePage, RecipeSearchPage
+from .recipe_schema import BatchIngredient, BatchRecipe, BatchItemResult, RecipeBatchResult
+from .recipe_schema import PantryQuery, PantryMatch, PantryResult
+from .recipe_schema import FacetCount, TimeBucketCount, RecipeFacets
+from .review_schema import ReadReviewBase, CreateReviewBase, ReviewPage
+from .favorite_schema import ReadFavoriteBase, CreateFavoriteBase, FavoritePage, FavoriteCheck
+from .recommendation_schema import Recommendation, RecommendationList, SimilarRecipes
 from .ingredient_schema import ReadRecipeIngredient
+from .instruction_schema import ReadInstruction
+from .tag_schema import ReadTag
+from .cuisine_schema import ReadCuisine
+from .diet_schema import ReadDiet
+from .allergy_schema import ReadAllergy
 
 __all__ = [
-    "ReadUser", "CreateUser", "UpdateUser", "UserPublic", "userrWithCounts", "UserWithDetails",
-    "ReadRecipeBase", "CreateRecipeBase", "UpdateRecipeBase", "DeleteRecipeBase",
-    "ReadReviewBase", "CreateReviewBase", 
-    "ReadRecipeIngredient"
+    "ReadUser", "CreateUser", "UpdateUser", "UserPublic", "userrWithCounts", "UserWithDetails", "UserPage",
+    "Token", "TokenData",
+    "ReadRecipeBase", "ReadRecipeFull", "CreateRecipeBase", "UpdateRecipeBase", "DeleteRecipeBase", "RecipePage", "RecipeSearchPage",
+    "BatchIngredient", "BatchRecipe", "BatchItemResult", "RecipeBatchResult",
+    "PantryQuery", "PantryMatch", "PantryResult",
+    "FacetCount", "TimeBucketCount", "RecipeFacets",
+    "ReadReviewBase", "CreateReviewBase", "ReviewPage",
+    "ReadFavoriteBase", "CreateFavoriteBase", "FavoritePage", "FavoriteCheck",
+    "Recommendation", "RecommendationList", "SimilarRecipes",
+    "ReadRecipeIngredient", "ReadInstruction", "ReadTag", "ReadCuisine", "ReadDiet", "ReadAllergy"
 ]
\ No newline at end of file
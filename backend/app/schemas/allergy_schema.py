@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from sqlmodel import SQLModel
+from pydantic import ConfigDict
+
+class ReadAllergy(SQLModel):
+    id: int
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+__all__ = ["ReadAllergy"]
\ No newline at end of file
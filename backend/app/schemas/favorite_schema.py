@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from datetime import datetime
+from typing import List, Optional
+
 from sqlmodel import SQLModel
 from pydantic import ConfigDict
 
@@ -7,6 +10,7 @@ from pydantic import ConfigDict
 class ReadFavoriteBase(SQLModel):
     user_id: int
     recipe_id: int
+    created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -23,5 +27,13 @@ class UpdateFavoriteBase(SQLModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class FavoritePage(SQLModel):
+    items: List[ReadFavoriteBase]
+    next_cursor: Optional[str] = None
+
+class FavoriteCheck(SQLModel):
+    user_id: int
+    recipe_ids: List[int]  # the requested ids this user has favorited, in request order
+
 
-__all__ = ["ReadFavoriteBase", "CreateFavoriteBase", "UpdateFavoriteBase"]
\ No newline at end of file
+__all__ = ["ReadFavoriteBase", "CreateFavoriteBase", "UpdateFavoriteBase", "FavoritePage", "FavoriteCheck"]
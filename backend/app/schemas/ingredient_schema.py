@@ -8,5 +8,6 @@ class ReadRecipeIngredient(SQLModel):
     id: int
     name: str
     quantity: Optional[str] = None
+    ord: Optional[int] = None
     
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
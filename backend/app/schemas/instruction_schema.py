@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from sqlmodel import SQLModel
+from pydantic import ConfigDict
+
+class ReadInstruction(SQLModel):
+    id: int
+    step_number: int
+    description: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+__all__ = ["ReadInstruction"]
\ No newline at end of file
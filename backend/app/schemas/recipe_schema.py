@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
-from sqlmodel import SQLModel
+from typing import List, Literal, Optional
+from sqlmodel import SQLModel, Field
 from pydantic import ConfigDict
 
+from .ingredient_schema import ReadRecipeIngredient
+from .instruction_schema import ReadInstruction
+from .tag_schema import ReadTag
+from .cuisine_schema import ReadCuisine
+from .diet_schema import ReadDiet
+from .allergy_schema import ReadAllergy
+from .user_schema import UserPublic
+
 class ReadRecipeBase(SQLModel):
     id: int
     title: str
@@ -18,9 +26,25 @@ class ReadRecipeBase(SQLModel):
     updated_at: datetime
     cuisine_id: int
     user_id: int
+    rating_count: int = 0
+    rating_sum: int = 0
+    rating_avg: float = 0.0
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]  # counts of 1..5 star reviews
     
     model_config = ConfigDict(from_attributes=True)
 
+# Complete recipe for the detail view, nested collections already in display order
+class ReadRecipeFull(ReadRecipeBase):
+    cuisine: Optional[ReadCuisine] = None
+    author: Optional[UserPublic] = None
+    ingredients: List[ReadRecipeIngredient] = []
+    instructions: List[ReadInstruction] = []
+    tags: List[ReadTag] = []
+    diets: List[ReadDiet] = []
+    allergies: List[ReadAllergy] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
 class CreateRecipeBase(SQLModel):
     title: str
     description: Optional[str] = None
@@ -51,8 +75,88 @@ class DeleteRecipeBase(SQLModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class RecipePage(SQLModel):
+    items: List[ReadRecipeBase]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+
+class RecipeSearchPage(SQLModel):
+    items: List[ReadRecipeBase]
+    total: int  # number of recipes matching the filters, not just this page
+    limit: int
+    offset: int
+
+# One recipe of a POST /recipes/batch body; ingredient, tag and diet names are
+# matched to existing rows and created when missing
+class BatchIngredient(SQLModel):
+    name: str
+    quantity: Optional[str] = None
+
+class BatchRecipe(CreateRecipeBase):
+    id: Optional[int] = None  # set to replace an existing recipe and its lists, omit to create
+    ingredients: List[BatchIngredient] = []
+    instructions: List[str] = []  # in step order
+    tags: List[str] = []
+    diets: List[str] = []
+
+class BatchItemResult(SQLModel):
+    index: int  # position in the request
+    status: Literal["created", "updated", "error"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class RecipeBatchResult(SQLModel):
+    created: int
+    updated: int
+    failed: int
+    items: List[BatchItemResult]
+
+# POST /recipes/by-ingredients: what can be cooked from what the user has
+class PantryQuery(SQLModel):
+    ingredient_ids: List[int] = []
+    ingredients: List[str] = []  # names, matched exactly like the batch import does
+    max_missing: int = Field(default=0, ge=0, le=20)  # ingredients a recipe may need beyond these
+    diet_ids: List[int] = []  # the recipe must be on all of them
+    exclude_allergy_ids: List[int] = []  # and contain none of these
+    limit: int = Field(default=20, ge=1, le=100)
+
+class PantryMatch(SQLModel):
+    recipe_id: int
+    have: int  # of the recipe's ingredients, how many the user has
+    missing: int
+    missing_ingredient_ids: List[int]
+
+class PantryResult(SQLModel):
+    items: List[PantryMatch]  # fewest missing first, then most ingredients used
+    total: int  # every recipe within max_missing, not just this page
+    unknown_ingredients: List[str] = []  # names with no matching ingredient
+
+# GET /recipes/facets: counts next to the browse sidebar options
+class FacetCount(SQLModel):
+    id: Optional[int] = None  # cuisine, diet or allergy id to filter on; None for difficulties
+    name: str
+    count: int  # matching recipes under the other active filters
+
+class TimeBucketCount(SQLModel):
+    name: str
+    min_time: int  # pass as min_time/max_time to filter on the bucket
+    max_time: Optional[int] = None
+    count: int
+
+class RecipeFacets(SQLModel):
+    total: int  # matching recipes under all active filters
+    cuisine: List[FacetCount]
+    difficulty: List[FacetCount]
+    diet: List[FacetCount]
+    allergy_free: List[FacetCount]  # recipes without the allergen, for exclude_allergy_id
+    cooking_time: List[TimeBucketCount]
+
 
-__all__ = ["ReadRecipeBase", "CreateRecipeBase", "UpdateRecipeBase", "DeleteRecipeBase"]
+__all__ = [
+    "ReadRecipeBase", "ReadRecipeFull", "CreateRecipeBase", "UpdateRecipeBase", "DeleteRecipeBase", "RecipePage", "RecipeSearchPage",
+    "BatchIngredient", "BatchRecipe", "BatchItemResult", "RecipeBatchResult",
+    "PantryQuery", "PantryMatch", "PantryResult",
+    "FacetCount", "TimeBucketCount", "RecipeFacets",
+]
 
 
 
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlmodel import SQLModel
+from pydantic import ConfigDict
+
+
+class Recommendation(SQLModel):
+    recipe_id: int
+    score: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+class RecommendationList(SQLModel):
+    user_id: int
+    items: List[Recommendation]
+    fallback: bool = False  # True when popular recipes stand in for missing history
+    model_built_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class SimilarRecipes(SQLModel):
+    recipe_id: int
+    items: List[Recommendation]  # score: Jaccard similarity of ingredients, tags, diets and cuisine
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+__all__ = ["Recommendation", "RecommendationList", "SimilarRecipes"]
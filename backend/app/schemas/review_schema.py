@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
-from sqlmodel import SQLModel
+from typing import List, Optional
+from sqlmodel import SQLModel, Field
 from pydantic import ConfigDict
 
 class CreateReviewBase(SQLModel):
-    rating: int
+    rating: int = Field(ge=1, le=5)
     comment: Optional[str] = None
     recipe_id: int
     user_id: int
@@ -23,5 +23,9 @@ class ReadReviewBase(SQLModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class ReviewPage(SQLModel):
+    items: List[ReadReviewBase]
+    next_cursor: Optional[str] = None
+
 
-__all__ = ["ReadReviewBase", "CreateReviewBase"]
\ No newline at end of file
+__all__ = ["ReadReviewBase", "CreateReviewBase", "ReviewPage"]
\ No newline at end of file
@@ -64,4 +64,22 @@ class UserWithDetails(SQLModel):
     favorite_count: int = 0
     review_count: int = 0
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class UserPage(SQLModel):
+    items: List[ReadUser]
+    next_cursor: Optional[str] = None
+
+class Token(SQLModel):
+    token: str
+    token_type: str = "bearer"
+    expires_in: int  # seconds
+    user_id: int
+    username: str
+    display_name: str
+
+class TokenData(SQLModel):
+    """The signed-in user as carried by the token; no database read involved."""
+    id: int
+    username: str
+    display_name: str
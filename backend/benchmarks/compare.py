@@ -0,0 +1,55 @@
+"""
+Diff two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/head.json
+
+Rows are matched on (scale, scenario, concurrency). Exits with status 1 when a
+p95 latency or throughput regressed by more than --threshold percent, or when
+a request's worst case started issuing more SQL statements (the mean moves
+with the cache hit ratio, the maximum is the uncached path), so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as file:
+        report = json.load(file)
+    return report["meta"], {(row["scale"], row["scenario"], row["concurrency"]): row for row in report["results"]}
+
+
+def change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    print(f"base {base_meta['commit']}  ->  head {head_meta['commit']}")
+    print(f"{'scale':>6} {'scenario':<16} {'c':>4} {'p50 ms':>18} {'p95 ms':>18} {'req/s':>20} {'queries':>12}")
+    regressions = []
+    for key in sorted(base.keys() & head.keys()):
+        old, new = base[key], head[key]
+        p50, p95, rps = change(old["p50_ms"], new["p50_ms"]), change(old["p95_ms"], new["p95_ms"]), change(old["rps"], new["rps"])
+        scale, scenario, concurrency = key
+        print(f"{scale:>6g} {scenario:<16} {concurrency:>4} "
+              f"{new['p50_ms']:>9.2f} ({p50:+6.1f}%) {new['p95_ms']:>9.2f} ({p95:+6.1f}%) "
+              f"{new['rps']:>10.1f} ({rps:+6.1f}%) {old['queries_per_request']:>5} -> {new['queries_per_request']:<5}")
+        if p95 > args.threshold or rps < -args.threshold or new["max_queries"] > old["max_queries"]:
+            regressions.append(key)
+    for key in sorted(base.keys() ^ head.keys()):
+        print(f"only in {'base' if key in base else 'head'}: {key}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:g}%:", *regressions, sep="\n  ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
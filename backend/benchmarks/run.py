@@ -0,0 +1,228 @@
+"""
+Benchmark the API hot paths in-process, over httpx's ASGI transport.
+
+Usage (from backend/):
+    python -m benchmarks.run --scales 0.1 1 --concurrency 1 8 32 --requests 500
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+For every scale a synthetic database is generated once with generate_data.py
+(cached under benchmarks/.data/) and copied to a scratch file, so review writes
+never leak into the next run. Each scale is measured in its own process:
+DATABASE_URL is read when the app is imported. Every scenario is run at every
+concurrency level and reports p50/p95/p99 latency, requests per second, SQL
+statements per request, status codes and the response cache hit ratio.
+Results go to benchmarks/results/<commit>-<time>.json.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .scenarios import SCENARIOS, Dataset, setup
+
+BACKEND = Path(__file__).resolve().parent.parent
+DATA_DIR = BACKEND / "benchmarks" / ".data"
+RESULTS_DIR = BACKEND / "benchmarks" / "results"
+
+# statements executed by the request running in the current task
+_statements = contextvars.ContextVar("bench_statements", default=None)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def measure(client, scenario, dataset, concurrency, requests, seed):
+    """Send `requests` requests from `concurrency` workers; returns one result row."""
+    latencies, statements, statuses = [], [], Counter()
+    remaining = requests
+
+    async def worker(number):
+        nonlocal remaining
+        rng = random.Random(f"{seed}-{scenario.__name__}-{concurrency}-{number}")
+        while remaining > 0:
+            remaining -= 1
+            counter = [0]
+            _statements.set(counter)
+            started = time.perf_counter()
+            response = await scenario(client, rng, dataset)
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter[0])
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "queries_per_request": round(sum(statements) / len(statements), 2),
+        "max_queries": max(statements),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def run_worker(args):
+    """Runs inside the per-scale process, with DATABASE_URL already pointing at the copy."""
+    import httpx
+    from sqlalchemy import event, func, select
+
+    from app.main import app
+    from app.core.cache import cache
+    from app.core.database import async_engine, createDB, engine
+    from app.core.security import shutdownHasher
+    from app.models.allergy import Allergy
+    from app.models.diet import Diet
+    from app.models.ingredient import Ingredient
+    from app.models.recipe import Recipe
+    from app.models.user import User
+
+    createDB()  # the ASGI transport does not send lifespan events
+    logging.getLogger("app.queries").setLevel(logging.ERROR)  # slow request warnings would flood stderr
+    with engine.connect() as conn:
+        first_user, last_user = conn.execute(select(func.min(User.id), func.max(User.id))).one()
+        first_recipe, last_recipe = conn.execute(select(func.min(Recipe.id), func.max(Recipe.id))).one()
+        ids = {model: conn.execute(select(func.min(model.id), func.max(model.id))).one()
+               for model in (Ingredient, Diet, Allergy)}
+    dataset = Dataset(range(first_user, last_user + 1), range(first_recipe, last_recipe + 1),
+                      *(range(first, last + 1) for first, last in ids.values()))
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        counter = _statements.get()
+        if counter is not None:
+            counter[0] += 1
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await setup(client)
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                scenario = SCENARIOS[name]
+                await measure(client, scenario, dataset, concurrency, args.warmup, f"{args.seed}-warmup")
+                before = cache.stats()
+                row = await measure(client, scenario, dataset, concurrency, args.requests, args.seed)
+                after = cache.stats()
+                lookups = (after["hits"] + after["misses"]) - (before["hits"] + before["misses"])
+                row["cache_hit_ratio"] = round((after["hits"] - before["hits"]) / lookups, 3) if lookups else None
+                results.append({"scale": args.scale, "scenario": name, "concurrency": concurrency, **row})
+                print(f"  {name:<16} c={concurrency:<4} {row['rps']:>9.1f} req/s  p50 {row['p50_ms']:>8.2f} ms  "
+                      f"p95 {row['p95_ms']:>8.2f} ms  p99 {row['p99_ms']:>8.2f} ms  "
+                      f"{row['queries_per_request']:>5} queries", file=sys.stderr)
+    await async_engine.dispose()
+    shutdownHasher()
+    print(json.dumps({"dataset": {"users": len(dataset.users), "recipes": len(dataset.recipes)}, "results": results}))
+
+
+def dataset_path(scale: float, seed: int) -> Path:
+    path = DATA_DIR / f"scale-{scale:g}-seed-{seed}.db"
+    if not path.exists():
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        print(f"Generating dataset {path.name} (once)...", file=sys.stderr)
+        partial = path.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+        subprocess.run(
+            [sys.executable, "generate_data.py", "--scale", str(scale), "--seed", str(seed),
+             "--database", f"sqlite:///{partial}"],
+            cwd=BACKEND, check=True, stdout=subprocess.DEVNULL,
+        )
+        partial.rename(path)
+    return path
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cache": "none" if args.no_cache else os.getenv("CACHE_BACKEND", "memory"),
+            "seed": args.seed,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "datasets": {},
+        "results": [],
+    }
+    for scale in args.scales:
+        source = dataset_path(scale, args.seed)
+        with tempfile.TemporaryDirectory() as scratch:
+            database = Path(scratch) / "bench.db"
+            shutil.copyfile(source, database)
+            env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}"}
+            if args.no_cache:
+                env["CACHE_BACKEND"] = "none"
+            print(f"Scale {scale:g}:", file=sys.stderr)
+            worker = subprocess.run(
+                [sys.executable, "-m", "benchmarks.run", "--worker", "--scale", str(scale),
+                 "--seed", str(args.seed), "--requests", str(args.requests), "--warmup", str(args.warmup),
+                 "--concurrency", *map(str, args.concurrency), "--scenarios", *args.scenarios],
+                cwd=BACKEND, env=env, check=True, stdout=subprocess.PIPE, text=True,
+            )
+        output = json.loads(worker.stdout.strip().splitlines()[-1])
+        report["datasets"][f"{scale:g}"] = output["dataset"]
+        report["results"] += output["results"]
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{commit}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {out}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths against synthetic datasets.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.1, 1.0], help="generate_data.py scale factors")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario and concurrency")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests sent first")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true", help="run with CACHE_BACKEND=none")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        asyncio.run(run_worker(args))
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Request mixes for the benchmark runner.
+
+A scenario is a coroutine function taking (client, rng, dataset) and sending
+one request; dataset holds the id ranges of the synthetic database so ids can
+be drawn the way real traffic would hit them (popular recipes more often).
+"""
+import random
+
+import httpx
+
+BENCH_PASSWORD = "bench-password"
+BENCH_USERS = 50  # registered during setup for the login scenario
+
+
+class Dataset:
+    def __init__(self, users: range, recipes: range, ingredients: range, diets: range, allergies: range):
+        self.users = users
+        self.recipes = recipes
+        self.ingredients = ingredients
+        self.diets = diets
+        self.allergies = allergies
+
+    def user(self, rng: random.Random) -> int:
+        return self.users[rng.randrange(len(self.users))]
+
+    def recipe(self, rng: random.Random) -> int:
+        # same skew as generate_data.py: low ids are the popular ones
+        return self.recipes[int(len(self.recipes) * rng.random() ** 2)]
+
+
+async def list_recipes(client: httpx.AsyncClient, rng, dataset):
+    return await client.get("/recipes/", params={"limit": 50})
+
+
+async def get_recipe(client, rng, dataset):
+    return await client.get(f"/recipes/{dataset.recipe(rng)}")
+
+
+async def similar_recipes(client, rng, dataset):
+    return await client.get(f"/recipes/{dataset.recipe(rng)}/similar")
+
+
+async def by_ingredients(client, rng, dataset):
+    # a well stocked kitchen, a couple of items short is fine
+    pantry = rng.sample(dataset.ingredients, min(30, len(dataset.ingredients)))
+    return await client.post("/recipes/by-ingredients", json={"ingredient_ids": pantry, "max_missing": 2})
+
+
+async def filtered_search(client, rng, dataset):
+    # "vegan AND NOT contains nuts" plus a difficulty, the sidebar's typical shape
+    return await client.get("/recipes/search", params={
+        "diet_id": rng.choice(dataset.diets),
+        "exclude_allergy_id": rng.sample(dataset.allergies, min(2, len(dataset.allergies))),
+        "difficulty": rng.choice(["Easy", "Medium", "Hard"]),
+        "sort": rng.choice(["newest", "top_rated"]),
+    })
+
+
+async def facets(client, rng, dataset):
+    # the sidebar after a tick or two; repeated filter sets are cache hits
+    params = {"diet_id": rng.choice(dataset.diets)}
+    if rng.random() < 0.5:
+        params["exclude_allergy_id"] = rng.choice(dataset.allergies)
+    if rng.random() < 0.5:
+        params["difficulty"] = rng.choice(["Easy", "Medium", "Hard"])
+    return await client.get("/recipes/facets", params=params)
+
+
+async def recipe_reviews(client, rng, dataset):
+    return await client.get(f"/reviews/recipe/{dataset.recipe(rng)}", params={"limit": 20})
+
+
+async def get_user(client, rng, dataset):
+    return await client.get(f"/users/{dataset.user(rng)}")
+
+
+async def recommendations(client, rng, dataset):
+    return await client.get(f"/users/{dataset.user(rng)}/recommendations")
+
+
+async def login(client, rng, dataset):
+    username = f"bench{rng.randrange(BENCH_USERS)}"
+    return await client.post("/auth/login", json={"username": username, "password": BENCH_PASSWORD})
+
+
+async def sign_up(client, rng, dataset):
+    # unique per request; every call costs one bcrypt hash in the hashing pool,
+    # so throughput is bounded by HASH_WORKERS and BCRYPT_ROUNDS (both read from
+    # the environment by the benchmarked process)
+    username = f"signup-{rng.getrandbits(64):016x}"
+    return await client.post("/auth/register", json={"username": username, "password": BENCH_PASSWORD})
+
+
+async def create_review(client, rng, dataset):
+    return await client.post("/reviews/", json={
+        "rating": rng.randint(1, 5),
+        "comment": "Benchmark review",
+        "recipe_id": dataset.recipe(rng),
+        "user_id": dataset.user(rng),
+    })
+
+
+SCENARIOS = {
+    "list_recipes": list_recipes,
+    "get_recipe": get_recipe,
+    "recipe_reviews": recipe_reviews,
+    "similar_recipes": similar_recipes,
+    "by_ingredients": by_ingredients,
+    "filtered_search": filtered_search,
+    "facets": facets,
+    "get_user": get_user,
+    "recommendations": recommendations,
+    "login": login,
+    "sign_up": sign_up,
+    "create_review": create_review,
+}
+
+
+async def setup(client: httpx.AsyncClient):
+    """Accounts with a known password for the login scenario."""
+    for number in range(BENCH_USERS):
+        response = await client.post("/auth/register", json={"username": f"bench{number}", "password": BENCH_PASSWORD})
+        if response.status_code not in (200, 400):  # 400: already registered by an earlier run
+            raise RuntimeError(f"Could not register bench{number}: {response.status_code} {response.text}")
@@ -0,0 +1,317 @@
+"""
+Synthetic data generator for local performance testing.
+Usage: python generate_data.py [--scale 1] [--seed 42] [--database sqlite:///perf.db]
+
+--scale 1 adds 10k users, 20k recipes, ~200k reviews and ~100k favorites plus
+their ingredient, instruction, tag, diet and allergy rows; every count grows
+linearly with the scale, so --scale 100 is a production-sized catalogue. The
+same seed always produces the same rows.
+
+Everything is written in one transaction with bulk Core executemany inserts,
+relaxed SQLite durability pragmas and the secondary indexes and full-text
+triggers dropped; indexes, rating aggregates and the search index are rebuilt
+once at the end. Rows are appended after whatever the database already holds.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlmodel import SQLModel
+
+from app.models import *  # register every table on SQLModel.metadata
+from app.models.user import User
+from app.models.recipe import Recipe
+from app.models.review import Review
+from app.models.favorite import Favorite
+from app.models.cuisine import Cuisine
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.models.instructions import Instruction
+from app.models.tag import Tag, RecipeTag
+from app.models.diet import Diet, RecipeDiet
+from app.models.allergy import Allergy, RecipeAllergy
+from app.core import config
+from app.core.database import apply_sqlite_pragmas
+from app.core.fts import dropFTSTriggers, installFTS, rebuildFTS
+from app.core.migrations import upgradeDB
+from app.core.ratings import recompute_rating_aggregates
+from app.core.security import hashpw
+
+PER_SCALE = {"users": 10_000, "recipes": 20_000}
+REVIEWS_PER_RECIPE = 10  # on average; older recipes get more
+FAVORITES_PER_USER = 10
+CHUNK_SIZE = 10_000  # rows per executemany
+PASSWORD = "p123"  # every generated user logs in with this
+
+START = datetime(2023, 1, 1)  # fixed, so a seed always yields the same timestamps
+SPAN = timedelta(days=730)
+
+# pragmas for the load connection only: losing a half-written synthetic
+# database to a power cut is fine, fsyncing every page is not
+LOAD_PRAGMAS = {"synchronous": "OFF", "cache_size": -262144, "temp_store": "MEMORY"}
+
+CUISINES = ["Asian", "Italian", "American", "Mediterranean", "French", "Various", "Mexican", "Indian",
+            "Chinese", "Japanese", "Thai", "Korean", "Greek", "Spanish", "Middle Eastern", "German",
+            "British", "Brazilian", "Moroccan", "Turkish", "Vietnamese"]
+DIETS = ["Vegetarian", "Vegan", "Gluten-Free", "Keto", "Paleo", "Low-Carb", "Dairy-Free"]
+ALLERGIES = ["Nuts", "Dairy", "Eggs", "Soy", "Shellfish", "Fish", "Gluten"]
+TAGS = ["quick", "weeknight", "comfort food", "healthy", "spicy", "baking", "one-pot", "grilling",
+        "breakfast", "lunch", "dinner", "dessert", "snack", "party", "meal prep", "budget",
+        "kid friendly", "holiday", "summer", "winter", "slow cooker", "no-bake", "tea time", "brunch"]
+DIFFICULTIES = ["Easy"] * 5 + ["Medium"] * 3 + ["Hard"] * 2
+
+# ingredient -> kind; the kind decides which diets a recipe keeps and which allergies it gets
+MEAT, FISH, SHELLFISH, DAIRY, EGG, GLUTEN, NUT, SOY, PLANT = (
+    "meat", "fish", "shellfish", "dairy", "egg", "gluten", "nut", "soy", "plant")
+INGREDIENTS = {
+    "chicken thigh": MEAT, "chicken breast": MEAT, "beef mince": MEAT, "pork belly": MEAT, "bacon": MEAT,
+    "lamb shoulder": MEAT, "chorizo": MEAT, "duck breast": MEAT, "turkey": MEAT, "sausage": MEAT,
+    "salmon": FISH, "cod": FISH, "tuna": FISH, "anchovies": FISH, "mackerel": FISH,
+    "shrimp": SHELLFISH, "mussels": SHELLFISH, "crab": SHELLFISH, "scallops": SHELLFISH,
+    "butter": DAIRY, "milk": DAIRY, "cream": DAIRY, "parmesan": DAIRY, "mozzarella": DAIRY,
+    "feta": DAIRY, "yogurt": DAIRY, "mascarpone": DAIRY, "cheddar": DAIRY, "ricotta": DAIRY,
+    "eggs": EGG, "egg yolks": EGG, "mayonnaise": EGG,
+    "flour": GLUTEN, "bread": GLUTEN, "pasta": GLUTEN, "couscous": GLUTEN, "noodles": GLUTEN,
+    "breadcrumbs": GLUTEN, "puff pastry": GLUTEN, "tortillas": GLUTEN,
+    "almonds": NUT, "walnuts": NUT, "peanuts": NUT, "cashews": NUT, "pistachios": NUT, "hazelnuts": NUT,
+    "tofu": SOY, "soy sauce": SOY, "miso": SOY, "edamame": SOY, "tempeh": SOY,
+    "rice": PLANT, "quinoa": PLANT, "potatoes": PLANT, "sweet potato": PLANT, "onion": PLANT,
+    "red onion": PLANT, "garlic": PLANT, "ginger": PLANT, "tomatoes": PLANT, "cherry tomatoes": PLANT,
+    "bell pepper": PLANT, "chili": PLANT, "carrots": PLANT, "celery": PLANT, "spinach": PLANT,
+    "kale": PLANT, "broccoli": PLANT, "cauliflower": PLANT, "zucchini": PLANT, "eggplant": PLANT,
+    "mushrooms": PLANT, "peas": PLANT, "chickpeas": PLANT, "lentils": PLANT, "black beans": PLANT,
+    "avocado": PLANT, "lemon": PLANT, "lime": PLANT, "orange": PLANT, "apple": PLANT, "banana": PLANT,
+    "strawberries": PLANT, "blueberries": PLANT, "coconut milk": PLANT, "olive oil": PLANT,
+    "sesame oil": PLANT, "basil": PLANT, "cilantro": PLANT, "parsley": PLANT, "mint": PLANT,
+    "thyme": PLANT, "rosemary": PLANT, "cumin": PLANT, "paprika": PLANT, "turmeric": PLANT,
+    "cinnamon": PLANT, "vanilla": PLANT, "sugar": PLANT, "brown sugar": PLANT, "honey": PLANT,
+    "maple syrup": PLANT, "cocoa powder": PLANT, "dark chocolate": PLANT, "matcha": PLANT,
+    "green tea": PLANT, "black tea": PLANT, "salt": PLANT, "black pepper": PLANT, "vinegar": PLANT,
+    "tahini": PLANT, "cornstarch": PLANT, "oats": PLANT, "spring onions": PLANT, "shallots": PLANT,
+}
+ALLERGENS = {NUT: "Nuts", DAIRY: "Dairy", EGG: "Eggs", SOY: "Soy", SHELLFISH: "Shellfish",
+             FISH: "Fish", GLUTEN: "Gluten"}
+DISHES = ["Curry", "Stew", "Salad", "Bowl", "Pasta", "Tart", "Soup", "Stir Fry", "Bake", "Cake",
+          "Cookies", "Skewers", "Tacos", "Risotto", "Pie", "Latte", "Smoothie", "Flatbread", "Gratin"]
+STYLES = ["Classic", "Easy", "Smoky", "Crispy", "Creamy", "Spicy", "Rustic", "Zesty", "Golden",
+          "Herby", "Sticky", "Weeknight", "Grandma's", "Summer", "Winter", "Tea-Infused"]
+IMAGES = [
+    "https://images.unsplash.com/photo-1559951742-948d2e2c86f4?w=1080",
+    "https://images.unsplash.com/photo-1564813227527-a99b83712e45?w=1080",
+    "https://images.unsplash.com/photo-1636589314668-bf6a924cd353?w=1080",
+    "https://images.unsplash.com/photo-1643750182373-b4a55a8c2801?w=1080",
+    "https://images.unsplash.com/photo-1614955177711-2540ad25432b?w=1080",
+    "https://images.unsplash.com/photo-1627769124375-8f797bb17140?w=1080",
+]
+STEPS = ["Prepare and measure all the ingredients.", "Chop the {0} and set aside.",
+         "Heat a pan over medium heat and add the {0}.", "Stir in the {1} and cook for a few minutes.",
+         "Season to taste.", "Simmer until thickened.", "Bake until golden.", "Let it rest before serving.",
+         "Fold in the {1} gently.", "Serve warm, garnished with {0}."]
+COMMENTS = ["Absolutely delicious, will make again!", "Great recipe, my family loved it.",
+            "A bit bland for my taste, I added more spices.", "Easy to follow and quick.",
+            "Perfect with a cup of tea.", "Took longer than stated but worth it.",
+            "Not my favorite, the texture was off.", "Restaurant quality at home!",
+            "I halved the sugar and it was still great.", "Became a weekly staple in our house."]
+
+
+class Loader:
+    """Buffers rows per table and writes them CHUNK_SIZE at a time with executemany.
+
+    When one buffer fills, every buffer is written, parents first (users and
+    recipes before the rows that point at them), so databases that enforce
+    foreign keys, like PostgreSQL, never see a child row before its parent.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, table, row):
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        for table in SQLModel.metadata.sorted_tables:  # dependency order, parents first
+            rows = self.buffers.pop(table, None)
+            if rows:
+                self.conn.execute(insert(table), rows)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+
+
+def next_id(conn, model) -> int:
+    return (conn.execute(select(func.coalesce(func.max(model.id), 0))).scalar_one()) + 1
+
+
+def lookup(conn, model, names):
+    """name -> id for a lookup table, inserting the names it does not have yet."""
+    ids = dict(conn.execute(select(model.name, model.id).order_by(model.id.desc())).all())
+    missing = [name for name in names if name not in ids]
+    if missing:
+        conn.execute(insert(model.__table__), [{"name": name} for name in missing])
+        ids = dict(conn.execute(select(model.name, model.id).order_by(model.id.desc())).all())
+    return {name: ids[name] for name in names}
+
+
+def skewed(rng, first, count, power=2.0):
+    """An id in [first, first + count) biased towards `first`: a few popular rows, a long tail."""
+    return first + int(count * rng.random() ** power)
+
+
+def timestamp(rng, index, count):
+    # increasing with the id like real inserts, with some jitter
+    return START + SPAN * ((index + rng.random()) / count)
+
+
+def generate(conn, scale: float, seed: int):
+    rng = random.Random(seed)
+    n_users = max(1, int(PER_SCALE["users"] * scale))
+    n_recipes = max(1, int(PER_SCALE["recipes"] * scale))
+    password_hash = hashpw(PASSWORD)  # bcrypt once, not once per user
+
+    cuisine_ids = list(lookup(conn, Cuisine, CUISINES).values())
+    diet_ids = lookup(conn, Diet, DIETS)
+    allergy_ids = lookup(conn, Allergy, ALLERGIES)
+    tag_ids = list(lookup(conn, Tag, TAGS).values())
+    ingredient_ids = lookup(conn, Ingredient, list(INGREDIENTS))
+    ingredient_names = list(INGREDIENTS)
+
+    loader = Loader(conn)
+    first_user, first_recipe = next_id(conn, User), next_id(conn, Recipe)
+    first_review = next_id(conn, Review)
+
+    for index in range(n_users):
+        user_id = first_user + index
+        loader.add(User.__table__, {
+            "id": user_id, "username": f"user{user_id}", "display_name": f"Home Cook {user_id}",
+            "email": f"user{user_id}@example.com", "password_hash": password_hash,
+            "bio": None if rng.random() < 0.5 else "Loves cooking and a good cup of tea.",
+            "created_at": timestamp(rng, index, n_users),
+        })
+
+    for index in range(n_recipes):
+        recipe_id = first_recipe + index
+        names = rng.sample(ingredient_names, rng.randint(5, 12))
+        kinds = {INGREDIENTS[name] for name in names}
+        created_at = timestamp(rng, index, n_recipes)
+        loader.add(Recipe.__table__, {
+            "id": recipe_id,
+            "title": f"{rng.choice(STYLES)} {names[0].title()} {rng.choice(DISHES)}",
+            "description": f"A {rng.choice(STYLES).lower()} take on a favorite with {names[0]} and {names[1]}.",
+            "image_url": rng.choice(IMAGES),
+            "prep_time": rng.choice([5, 10, 15, 20, 30, 45, 60]),
+            "cook_time": rng.choice([0, 5, 10, 20, 30, 45, 60, 90]),
+            "servings": rng.choice([1, 2, 4, 4, 6, 8, 12]),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "created_at": created_at, "updated_at": created_at,
+            "cuisine_id": rng.choice(cuisine_ids),
+            "user_id": skewed(rng, first_user, n_users),
+        })
+        for position, name in enumerate(names, start=1):
+            loader.add(RecipeIngredient.__table__, {
+                "recipe_id": recipe_id, "ingredient_id": ingredient_ids[name],
+                "quantity": f"{rng.randint(1, 500)} g", "ord": position,
+            })
+        for step_number in range(1, rng.randint(3, 8) + 1):
+            loader.add(Instruction.__table__, {
+                "recipe_id": recipe_id, "step_number": step_number,
+                "description": rng.choice(STEPS).format(names[0], names[1]),
+            })
+        for tag_id in rng.sample(tag_ids, rng.randint(1, 4)):
+            loader.add(RecipeTag.__table__, {"recipe_id": recipe_id, "tag_id": tag_id})
+        # diets and allergies follow from the ingredients so filters behave realistically
+        diets = set()
+        if not kinds & {MEAT, FISH, SHELLFISH}:
+            diets.add("Vegetarian")
+            if not kinds & {DAIRY, EGG}:
+                diets.add("Vegan")
+        if GLUTEN not in kinds:
+            diets.add("Gluten-Free")
+        if DAIRY not in kinds:
+            diets.add("Dairy-Free")
+        diets.update(diet for diet in ("Keto", "Paleo", "Low-Carb") if rng.random() < 0.05)
+        for diet in diets:
+            loader.add(RecipeDiet.__table__, {"recipe_id": recipe_id, "diet_id": diet_ids[diet]})
+        for kind in kinds & ALLERGENS.keys():
+            loader.add(RecipeAllergy.__table__, {"recipe_id": recipe_id, "allergy_id": allergy_ids[ALLERGENS[kind]]})
+
+    end = START + SPAN
+    for index in range(n_recipes * REVIEWS_PER_RECIPE):
+        recipe_id = skewed(rng, first_recipe, n_recipes)
+        recipe_created = START + SPAN * ((recipe_id - first_recipe + 1) / n_recipes)  # latest it can be
+        loader.add(Review.__table__, {
+            "id": first_review + index,
+            "rating": rng.choices([1, 2, 3, 4, 5], weights=[1, 2, 5, 10, 12])[0],
+            "comment": rng.choice(COMMENTS),
+            "created_at": recipe_created + (end - recipe_created) * rng.random(),
+            "user_id": first_user + rng.randrange(n_users),
+            "recipe_id": recipe_id,
+        })
+
+    for index in range(n_users):
+        user_id = first_user + index
+        count = min(n_recipes, int(rng.expovariate(1 / FAVORITES_PER_USER)))
+        for recipe_id in {skewed(rng, first_recipe, n_recipes) for _ in range(count)}:
+            loader.add(Favorite.__table__, {
+                "user_id": user_id, "recipe_id": recipe_id,
+                "created_at": timestamp(rng, index, n_users),
+            })
+
+    loader.flush()
+    return loader.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with synthetic users, recipes and reviews.")
+    parser.add_argument("--scale", type=float, default=1.0, help="1 = 10k users / 20k recipes; counts grow linearly")
+    parser.add_argument("--seed", type=int, default=42, help="same seed, same data")
+    parser.add_argument("--database", default=config.DATABASE_URL, help="SQLAlchemy URL (default: DATABASE_URL)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    SQLModel.metadata.create_all(engine)
+    upgradeDB(engine)
+
+    loaded = [User, Recipe, Review, Favorite, RecipeIngredient, Instruction, RecipeTag, RecipeDiet, RecipeAllergy]
+    indexes = [index for model in loaded for index in model.__table__.indexes]
+
+    started = time.perf_counter()
+    print(f"Generating scale {args.scale} with seed {args.seed} into {engine.url.render_as_string(hide_password=True)}...")
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            for name, value in LOAD_PRAGMAS.items():
+                conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+            dropFTSTriggers(conn)
+        # maintaining secondary indexes row by row is slower than building them once
+        for index in indexes:
+            index.drop(conn, checkfirst=True)
+        counts = generate(conn, args.scale, args.seed)
+        loaded_at = time.perf_counter()
+        for index in indexes:
+            index.create(conn)
+        recompute_rating_aggregates(conn)
+        if conn.dialect.name == "sqlite":
+            rebuildFTS(conn)
+            installFTS(conn)
+        elif conn.dialect.name == "postgresql":
+            # explicit ids leave the serial sequences behind
+            for model in (User, Recipe, Review):
+                table = model.__tablename__
+                conn.exec_driver_sql(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), (SELECT max(id) FROM \"{table}\"))")
+    finished = time.perf_counter()
+
+    rows = sum(counts.values())
+    for table, count in counts.items():
+        print(f"✓ {count:>12,} {table}")
+    print(f"\n{rows:,} rows in {loaded_at - started:.1f}s ({rows / max(loaded_at - started, 1e-9):,.0f} rows/s), "
+          f"indexes, ratings and search index rebuilt in {finished - loaded_at:.1f}s")
+    print(f"Every generated user logs in with password '{PASSWORD}'.")
+
+
+if __name__ == "__main__":
+    main()
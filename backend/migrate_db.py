@@ -0,0 +1,23 @@
+"""
+Script to upgrade an existing database in place (new indexes, constraints...)
+without losing data. The API also runs this on startup.
+Usage: python migrate_db.py
+"""
+from sqlmodel import SQLModel
+
+from app.models import *  # register every table on SQLModel.metadata
+from app.core.database import engine
+from app.core.migrations import upgradeDB
+
+def migrate_database():
+    SQLModel.metadata.create_all(engine)
+    changes = upgradeDB(engine)
+    if not changes:
+        print("Database is already up to date.")
+        return
+    for change in changes:
+        print(f"✓ {change}")
+    print("Database upgraded successfully!")
+
+if __name__ == "__main__":
+    migrate_database()
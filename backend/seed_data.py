@@ -4,16 +4,15 @@ Usage: python seed_data.py
 """
 
 from sqlmodel import Session, select
-from passlib.context import CryptContext
 from app.core.database import engine, createDB
+from app.core.ratings import recompute_rating_aggregates
+from app.core.security import hashpw
 from app.models.user import User
 from app.models.recipe import Recipe
 from app.models.cuisine import Cuisine
 from app.models.review import Review
 from datetime import datetime
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def seed_database():
     # Create tables
     print("Creating database tables...")
@@ -47,33 +46,35 @@ def seed_database():
         print(f"✓ Created {len(cuisines)} cuisines")
         
         # Create users with proper password hashing
+        # bcrypt is slow on purpose, hash the shared sample password once
+        password_hash = hashpw("p123")
         users = [
             User(
                 username="sarah",
                 display_name="Sarah Chen",
                 email="sarah@example.com",
-                password_hash=pwd_context.hash("p123"),
+                password_hash=password_hash,
                 bio="Tea enthusiast and recipe creator passionate about Asian-inspired dishes"
             ),
             User(
                 username="marco",
                 display_name="Marco Rossi",
                 email="marco@example.com",
-                password_hash=pwd_context.hash("p123"),
+                password_hash=password_hash,
                 bio="Italian chef passionate about pasta and authentic Italian cuisine"
             ),
             User(
                 username="emma",
                 display_name="Emma Baker",
                 email="emma@example.com",
-                password_hash=pwd_context.hash("p123"),
+                password_hash=password_hash,
                 bio="Professional pastry chef specializing in decadent desserts"
             ),
             User(
                 username="chef",
                 display_name="Head Chef",
                 email="chef@example.com",
-                password_hash=pwd_context.hash("p123"),
+                password_hash=password_hash,
                 bio="Culinary expert with 20 years of experience across multiple cuisines"
             )
         ]
@@ -311,6 +312,9 @@ def seed_database():
         ]
         for review in reviews:
             session.add(review)
+        session.flush()
+        # reviews added directly skip the API's rating bookkeeping, fill it in here
+        recompute_rating_aggregates(session)
         session.commit()
         print(f"✓ Created {len(reviews)} reviews")
         
@@ -0,0 +1,114 @@
+"""
+Shared fixtures. The app is started once per test session against a scratch
+SQLite file: DATABASE_URL and the other settings are read when app is
+imported, so they are set here first. Tests share that database, so each one
+creates its own cuisine, author and recipes and filters on them.
+"""
+import itertools
+import os
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="recipes-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch}/test.db"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["JWT_SECRET"] = "test-secret"
+os.environ["BCRYPT_ROUNDS"] = "4"  # the lowest bcrypt accepts, hashing stays fast
+os.environ["HASH_WORKERS"] = "1"
+os.environ["RECOMMENDATIONS_MIN_INTERVAL"] = "0"  # rebuild as soon as a write wakes the loop
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, update
+
+from app.main import app
+from app.core.database import engine, async_engine
+from app.core.recipe_index import recipes_changed
+from app.models.recipe import Recipe
+from app.models.cuisine import Cuisine
+from app.models.allergy import Allergy, RecipeAllergy
+
+_numbers = itertools.count(1)
+
+
+def unique(prefix: str) -> str:
+    return f"{prefix}-{next(_numbers)}"
+
+
+@pytest.fixture(scope="session")
+def client():
+    # one client, so the background index loops and every request share an event loop
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def user(client):
+    name = unique("user")
+    response = client.post("/users/", json={
+        "username": name, "display_name": name, "email": f"{name}@example.com", "password": "secret",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+def cuisine(db):
+    row = Cuisine(name=unique("cuisine"))
+    db.add(row)
+    db.commit()
+    return row.id
+
+
+@pytest.fixture
+def make_allergy(db):
+    def make() -> int:
+        row = Allergy(name=unique("allergy"))
+        db.add(row)
+        db.commit()
+        return row.id
+    return make
+
+
+@pytest.fixture
+def make_recipe(client, db, user, cuisine):
+    """Creates a recipe through POST /recipes/batch; returns its id.
+
+    Takes the batch fields (ingredients, instructions, tags and diets by name)
+    plus allergies, a list of Allergy ids linked afterwards.
+    """
+    def make(allergies=(), **fields) -> int:
+        body = {"title": unique("recipe"), "user_id": user["id"], "cuisine_id": cuisine, **fields}
+        if "ingredients" in body:
+            body["ingredients"] = [{"name": name} if isinstance(name, str) else name for name in body["ingredients"]]
+        result = client.post("/recipes/batch", json=[body]).json()
+        assert result["items"][0]["status"] == "created", result
+        recipe_id = result["items"][0]["id"]
+        if allergies:
+            db.add_all(RecipeAllergy(recipe_id=recipe_id, allergy_id=allergy_id) for allergy_id in allergies)
+            # written behind the API's back: bump updated_at and wake the
+            # in-memory indexes the way the recipe routes do
+            db.exec(update(Recipe).where(Recipe.id == recipe_id).values(servings=Recipe.servings))
+            db.commit()
+            client.portal.call(recipes_changed)  # on the app's event loop, like a route
+        return recipe_id
+    return make
+
+
+@pytest.fixture
+def statements():
+    """SQL statements the API runs while the test does; clear() it to start counting afresh."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
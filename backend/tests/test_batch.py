@@ -0,0 +1,89 @@
+"""POST /recipes/batch: bulk create and replace with nested lists."""
+from sqlmodel import select
+
+from app.routers.recipes import RECIPE_CHILDREN
+
+from conftest import unique
+
+
+def batch(client, items):
+    response = client.post("/recipes/batch", json=items)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def recipe(user, cuisine, **fields):
+    return {"title": unique("recipe"), "user_id": user["id"], "cuisine_id": cuisine, **fields}
+
+
+def test_creates_and_replaces_with_lists(client, user, cuisine):
+    salt = unique("ingredient")
+    created = batch(client, [recipe(user, cuisine, ingredients=[{"name": salt, "quantity": "1 tsp"}, {"name": salt}],
+                                    instructions=["Boil", " ", "Serve"], tags=["quick"], diets=["vegan", "vegan"])])
+    assert (created["created"], created["failed"]) == (1, 0)
+    recipe_id = created["items"][0]["id"]
+    full = client.get(f"/recipes/{recipe_id}/full").json()
+    assert [(item["name"], item["quantity"]) for item in full["ingredients"]] == [(salt, "1 tsp")]
+    assert [step["description"] for step in full["instructions"]] == ["Boil", "Serve"]
+    assert [diet["name"] for diet in full["diets"]] == ["vegan"]
+
+    replaced = batch(client, [recipe(user, cuisine, id=recipe_id, title="Replaced", instructions=["Eat"])])
+    assert replaced["items"] == [{"index": 0, "status": "updated", "id": recipe_id, "detail": None}]
+    full = client.get(f"/recipes/{recipe_id}/full").json()
+    assert full["title"] == "Replaced"
+    assert (full["ingredients"], full["tags"], full["diets"]) == ([], [], [])
+    assert [step["description"] for step in full["instructions"]] == ["Eat"]
+
+
+def test_batch_created_recipe_can_be_deleted(client, db, user, cuisine, make_recipe, make_allergy):
+    recipe_id = make_recipe(ingredients=[unique("ingredient")], instructions=["Mix"], tags=[unique("tag")],
+                            diets=[unique("diet")], allergies=[make_allergy()])
+    fan = client.post("/users/", json={"username": unique("user"), "display_name": "Fan",
+                                       "email": f"{unique('mail')}@example.com", "password": "secret"}).json()
+    client.post("/favorites/", json={"user_id": fan["id"], "recipe_id": recipe_id})
+    client.post("/reviews/", json={"recipe_id": recipe_id, "user_id": fan["id"], "rating": 5, "comment": "ok"})
+    profile = client.get(f"/users/{fan['id']}").json()
+    assert (profile["favorite_count"], profile["review_count"]) == (1, 1)
+
+    response = client.delete(f"/recipes/{recipe_id}")
+    assert response.status_code == 200, response.text
+    assert client.get(f"/recipes/{recipe_id}").status_code == 404
+    for model in RECIPE_CHILDREN:
+        assert db.exec(select(model).where(model.recipe_id == recipe_id)).all() == [], model.__name__
+    profile = client.get(f"/users/{fan['id']}").json()
+    assert (profile["favorite_count"], profile["review_count"]) == (0, 0)
+
+
+def test_invalid_items_are_reported_and_skipped(client, user, cuisine):
+    result = batch(client, [
+        recipe(user, cuisine),
+        recipe(user, 999999999),
+        {**recipe(user, cuisine), "user_id": 999999999},
+        recipe(user, cuisine, id=999999999),
+    ])
+    assert [item["status"] for item in result["items"]] == ["created", "error", "error", "error"]
+    assert [item["detail"] for item in result["items"][1:]] == [
+        "Cuisine 999999999 not found", "User 999999999 not found", "Recipe 999999999 not found",
+    ]
+
+
+def test_repeated_id_is_an_error_for_the_repeats(client, user, cuisine, make_recipe):
+    recipe_id = make_recipe()
+    salt = unique("ingredient")
+    result = batch(client, [
+        recipe(user, cuisine, id=recipe_id, title="First", ingredients=[{"name": salt}]),
+        recipe(user, cuisine, id=recipe_id, title="Second", ingredients=[{"name": salt}]),
+    ])
+    assert [item["status"] for item in result["items"]] == ["updated", "error"]
+    assert result["items"][1]["detail"] == f"Recipe {recipe_id} is already replaced by item 0"
+    assert client.get(f"/recipes/{recipe_id}").json()["title"] == "First"
+
+
+def test_statement_count_does_not_grow_with_the_batch(client, user, cuisine, statements):
+    def run(size):
+        statements.clear()
+        batch(client, [recipe(user, cuisine, ingredients=[{"name": unique("ingredient")}], instructions=["Mix"],
+                              tags=[unique("tag")], diets=[unique("diet")]) for _ in range(size)])
+        return len(statements)
+
+    assert run(2) == run(40)
@@ -0,0 +1,63 @@
+"""The response cache and the invalidations done by the write routes."""
+import asyncio
+
+from app.core.cache import MemoryCache
+
+from conftest import unique
+
+
+def test_memory_cache_lru_ttl_and_tags():
+    async def scenario():
+        cache = MemoryCache(max_entries=2, ttl=60)
+        await cache.set("a", 1, tags=["t"])
+        await cache.set("b", 2, tags=["t"])
+        assert await cache.get("a") == 1  # a is now the most recently used
+        await cache.set("c", 3)
+        assert await cache.get("b") is None and cache.evictions == 1
+        await cache.invalidate_tag("t")
+        assert await cache.get("a") is None and await cache.get("c") == 3
+        assert cache.stats()["entries"] == 1
+
+        expired = MemoryCache(max_entries=10, ttl=-1)
+        await expired.set("a", 1)
+        assert await expired.get("a") is None
+
+    asyncio.run(scenario())
+
+
+def test_recipe_reads_are_cached_until_written(client, make_recipe, statements):
+    recipe_id = make_recipe(title="Before")
+    assert client.get(f"/recipes/{recipe_id}").json()["title"] == "Before"
+    statements.clear()
+    assert client.get(f"/recipes/{recipe_id}").json()["title"] == "Before"
+    assert statements == []  # served from the cache
+
+    client.put(f"/recipes/{recipe_id}", json={"title": "After"})
+    assert client.get(f"/recipes/{recipe_id}").json()["title"] == "After"
+
+
+def test_review_writes_invalidate_recipe_author_and_review_pages(client, make_recipe, user):
+    recipe_id = make_recipe()
+    reviewer = client.post("/users/", json={"username": unique("user"), "display_name": "Reviewer",
+                                            "email": f"{unique('mail')}@example.com", "password": "secret"}).json()
+    # fill the three caches
+    assert client.get(f"/recipes/{recipe_id}").json()["rating_count"] == 0
+    assert client.get(f"/users/{reviewer['id']}").json()["review_count"] == 0
+    assert client.get(f"/reviews/recipe/{recipe_id}").json()["items"] == []
+
+    review = client.post("/reviews/", json={"recipe_id": recipe_id, "user_id": reviewer["id"], "rating": 4,
+                                            "comment": "good"}).json()
+    assert client.get(f"/recipes/{recipe_id}").json()["rating_count"] == 1
+    assert client.get(f"/users/{reviewer['id']}").json()["review_count"] == 1
+    assert [item["id"] for item in client.get(f"/reviews/recipe/{recipe_id}").json()["items"]] == [review["id"]]
+
+    client.delete(f"/reviews/{review['id']}")
+    assert client.get(f"/recipes/{recipe_id}").json()["rating_count"] == 0
+    assert client.get(f"/users/{reviewer['id']}").json()["review_count"] == 0
+    assert client.get(f"/reviews/recipe/{recipe_id}").json()["items"] == []
+
+
+def test_new_recipe_updates_the_author_count(client, make_recipe, user):
+    assert client.get(f"/users/{user['id']}").json()["recipe_count"] == 0
+    make_recipe()
+    assert client.get(f"/users/{user['id']}").json()["recipe_count"] == 1
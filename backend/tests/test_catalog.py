@@ -0,0 +1,94 @@
+"""GET /recipes/search without a text query, answered from the in-memory catalog."""
+import itertools
+
+import pytest
+from sqlmodel import select
+
+from app.core import catalog as catalog_module
+from app.models.recipe import Recipe
+from app.models.diet import Diet
+from app.routers.recipes import SORT_ORDERS, _recipe_filters
+
+from conftest import unique
+
+pytestmark = pytest.mark.skipif(not catalog_module.available(), reason="needs numpy")
+
+
+def search(client, **params):
+    response = client.get("/recipes/search", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_listing_shows_own_writes_at_once(client, user, cuisine):
+    body = {"title": unique("recipe"), "user_id": user["id"], "cuisine_id": cuisine, "difficulty": "Easy"}
+    created = client.post("/recipes/", json=body).json()
+    page = search(client, cuisine_id=cuisine)
+    assert page["total"] == 1
+    assert [item["id"] for item in page["items"]] == [created["id"]]
+
+    client.put(f"/recipes/{created['id']}", json={"difficulty": "Hard"})
+    assert search(client, cuisine_id=cuisine, difficulty="Easy")["total"] == 0
+    assert [item["id"] for item in search(client, cuisine_id=cuisine, difficulty="Hard")["items"]] == [created["id"]]
+
+    assert client.delete(f"/recipes/{created['id']}").status_code == 200
+    assert search(client, cuisine_id=cuisine) == {"items": [], "total": 0, "limit": 20, "offset": 0}
+
+
+def test_every_created_recipe_is_listed_right_away(client, user, cuisine):
+    created = []
+    for _ in range(20):
+        body = {"title": unique("recipe"), "user_id": user["id"], "cuisine_id": cuisine}
+        created.append(client.post("/recipes/", json=body).json()["id"])
+        page = search(client, cuisine_id=cuisine, limit=100)
+        assert page["total"] == len(created)
+        assert sorted(item["id"] for item in page["items"]) == created
+
+
+def test_filters_match_the_sql_filters(client, db, make_recipe, make_allergy, cuisine):
+    diets = [unique("diet") for _ in range(3)]
+    allergies = [make_allergy() for _ in range(2)]
+    for number in range(24):
+        make_recipe(
+            difficulty=("Easy", "Medium", "Hard")[number % 3],
+            prep_time=number * 5, cook_time=number % 4 * 10,
+            diets=[diet for bit, diet in enumerate(diets) if number >> bit & 1],
+            allergies=[allergy for bit, allergy in enumerate(allergies) if number >> (bit + 2) & 1],
+        )
+    diet_ids = db.exec(select(Diet.id).where(Diet.name.in_(diets)).order_by(Diet.id)).all()
+
+    cases = [
+        {},
+        {"difficulty": ["Hard"]},
+        {"diet_id": diet_ids[:2]},
+        {"diet_id": diet_ids[:2], "diet_match": "all"},
+        {"exclude_allergy_id": allergies},
+        {"diet_id": diet_ids[2:], "exclude_allergy_id": allergies[:1]},  # e.g. vegan AND NOT nuts
+        {"min_time": 30, "max_time": 90, "difficulty": ["Easy", "Medium"]},
+    ]
+    for case, sort in itertools.product(cases, ("newest", "top_rated")):
+        filters = dict(difficulty=[], diet_id=[], min_time=None, max_time=None, diet_match="any", exclude_allergy_id=[])
+        filters.update(case)
+        conditions = _recipe_filters(None, filters["difficulty"], [cuisine], filters["diet_id"], filters["min_time"],
+                                     filters["max_time"], None, filters["diet_match"], filters["exclude_allergy_id"])
+        expected = db.exec(select(Recipe.id).where(*conditions).order_by(*SORT_ORDERS[sort])).all()
+        page = search(client, cuisine_id=cuisine, sort=sort, limit=100, **case)
+        assert page["total"] == len(expected), case
+        assert [item["id"] for item in page["items"]] == expected, case
+
+
+def test_pages_follow_the_sort_order(client, make_recipe, cuisine):
+    ids = [make_recipe() for _ in range(5)]
+    newest_first = list(reversed(ids))
+    pages = [search(client, cuisine_id=cuisine, limit=2, offset=offset) for offset in (0, 2, 4)]
+    assert [item["id"] for page in pages for item in page["items"]] == newest_first
+    assert {page["total"] for page in pages} == {5}
+
+
+def test_top_rated_follows_new_reviews(client, user, make_recipe, cuisine):
+    low, high = make_recipe(), make_recipe()
+    client.post("/reviews/", json={"recipe_id": low, "user_id": user["id"], "rating": 2, "comment": "meh"})
+    client.post("/reviews/", json={"recipe_id": high, "user_id": user["id"], "rating": 5, "comment": "great"})
+    page = search(client, cuisine_id=cuisine, sort="top_rated")
+    assert [item["id"] for item in page["items"]] == [high, low]
+    assert [item["id"] for item in search(client, cuisine_id=cuisine, min_rating=3)["items"]] == [high]
@@ -0,0 +1,51 @@
+"""ETag / Last-Modified validators and 304 responses."""
+from datetime import datetime
+
+from app.core.conditional import _not_modified_since, http_date, make_etag
+
+
+def test_validator_helpers():
+    assert make_etag("recipe", 7, "x") == make_etag("recipe", 7, "x") != make_etag("recipe", 8, "x")
+    moment = datetime(2024, 5, 1, 12, 30, 15, 999999)
+    assert http_date(moment) == "Wed, 01 May 2024 12:30:15 GMT"
+    assert _not_modified_since("Wed, 01 May 2024 12:30:15 GMT", moment)  # HTTP dates drop the microseconds
+    assert not _not_modified_since("Wed, 01 May 2024 12:30:14 GMT", moment)
+    assert not _not_modified_since("yesterday", moment)
+
+
+def test_recipe_304_until_edited(client, make_recipe):
+    recipe_id = make_recipe()
+    first = client.get(f"/recipes/{recipe_id}")
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    for headers in ({"If-None-Match": etag}, {"If-None-Match": f'"other", W/{etag}'}, {"If-None-Match": "*"},
+                    {"If-Modified-Since": last_modified}):
+        response = client.get(f"/recipes/{recipe_id}", headers=headers)
+        assert response.status_code == 304, headers
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    # If-None-Match wins over a matching If-Modified-Since
+    mismatched = {"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    assert client.get(f"/recipes/{recipe_id}", headers=mismatched).status_code == 200
+
+    client.put(f"/recipes/{recipe_id}", json={"title": "Edited"})
+    edited = client.get(f"/recipes/{recipe_id}", headers={"If-None-Match": etag})
+    assert edited.status_code == 200 and edited.json()["title"] == "Edited"
+    assert edited.headers["etag"] != etag
+
+
+def test_review_moves_the_recipe_etag(client, make_recipe, user):
+    recipe_id = make_recipe()
+    etag = client.get(f"/recipes/{recipe_id}").headers["etag"]
+    reviews_etag = client.get(f"/reviews/recipe/{recipe_id}").headers["etag"]
+    client.post("/reviews/", json={"recipe_id": recipe_id, "user_id": user["id"], "rating": 5, "comment": "ok"})
+    assert client.get(f"/recipes/{recipe_id}", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get(f"/reviews/recipe/{recipe_id}", headers={"If-None-Match": reviews_etag}).status_code == 200
+
+
+def test_collection_etag_moves_with_inserts(client, make_recipe):
+    etag = client.get("/recipes/", params={"limit": 5}).headers["etag"]
+    assert client.get("/recipes/", params={"limit": 5}, headers={"If-None-Match": etag}).status_code == 304
+    make_recipe()
+    assert client.get("/recipes/", params={"limit": 5}, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,71 @@
+"""GET /export/{table}: streamed NDJSON, CSV and Parquet, optionally gzipped."""
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from sqlmodel import func, select
+
+from app.core import export
+from app.models.recipe import Recipe
+from app.routers import exports
+
+
+def download(client, table, **params):
+    response = client.get(f"/export/{table}", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # a few rows per partition, so every format is written in several chunks
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 2)
+
+
+def test_ndjson_and_its_gzip_variant(client, db, make_recipe, small_batches):
+    ids = [make_recipe(description=f"number {number}") for number in range(3)]
+    response = download(client, "recipes")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="recipes.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == db.exec(select(func.count()).select_from(Recipe)).one()
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    mine = {row["id"]: row for row in rows if row["id"] in ids}
+    assert [mine[recipe_id]["description"] for recipe_id in ids] == ["number 0", "number 1", "number 2"]
+
+    packed = download(client, "recipes", compress="gzip")
+    assert packed.headers["content-type"] == "application/gzip"
+    assert packed.headers["content-disposition"] == 'attachment; filename="recipes.ndjson.gz"'
+    assert gzip.decompress(packed.content) == response.content
+
+
+def test_csv_users_leave_out_credentials(client, user, small_batches):
+    response = download(client, "users", format="csv")
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert "password_hash" not in reader.fieldnames and "email" not in reader.fieldnames
+    rows = list(reader)
+    assert sum(row["username"] == user["username"] for row in rows) == 1  # one header, no repeats
+    assert gzip.decompress(download(client, "users", format="csv", compress="gzip").content) == response.content
+
+
+def test_parquet(client, make_recipe, small_batches):
+    pq = pytest.importorskip("pyarrow.parquet")
+    recipe_id = make_recipe(prep_time=25)
+    table = pq.read_table(io.BytesIO(download(client, "recipes", format="parquet").content))
+    rows = {row["id"]: row for row in table.to_pylist()}
+    assert rows[recipe_id]["prep_time"] == 25
+    assert table.schema.field("created_at").type.unit == "us"
+    packed = download(client, "recipes", format="parquet", compress="gzip").content
+    assert pq.read_table(io.BytesIO(gzip.decompress(packed))).num_rows == table.num_rows
+
+
+def test_parquet_without_pyarrow(client, monkeypatch):
+    monkeypatch.setattr(export, "pa", None)
+    assert client.get("/export/recipes", params={"format": "parquet"}).status_code == 501
+
+
+def test_unknown_table_or_format(client):
+    assert client.get("/export/favorites").status_code == 422
+    assert client.get("/export/recipes", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,113 @@
+"""GET /recipes/facets: sidebar counts from the in-memory catalog."""
+import pytest
+from sqlmodel import func, select
+
+from app.core import catalog as catalog_module
+from app.core.catalog import TIME_BUCKETS
+from app.models.recipe import Recipe
+from app.models.diet import Diet, RecipeDiet
+from app.models.allergy import Allergy, RecipeAllergy
+from app.routers.recipes import _recipe_filters
+
+from conftest import unique
+
+pytestmark = pytest.mark.skipif(not catalog_module.available(), reason="needs numpy")
+
+FILTERS = dict(difficulty=[], cuisine_id=[], diet_id=[], diet_match="any", exclude_allergy_id=[],
+               min_time=None, max_time=None)
+
+
+def sql_conditions(filters, without=()):
+    filters = {**FILTERS, **filters}
+    for name in without:
+        filters[name] = FILTERS[name]
+    return _recipe_filters(None, filters["difficulty"], filters["cuisine_id"], filters["diet_id"], filters["min_time"],
+                           filters["max_time"], None, filters["diet_match"], filters["exclude_allergy_id"])
+
+
+def sql_facets(db, filters):
+    """What the facets should be, from grouped SQL counts."""
+    def grouped(column, without, *joins):
+        statement = select(column, func.count()).select_from(Recipe)
+        for join in joins:
+            statement = statement.join(join)
+        rows = db.exec(statement.where(*sql_conditions(filters, without)).group_by(column)).all()
+        return {key: count for key, count in rows if count}
+
+    def count(conditions):
+        return db.exec(select(func.count()).select_from(Recipe).where(*conditions)).one()
+
+    allergy_ids = db.exec(select(Allergy.id)).all()
+    without_allergies = sql_conditions(filters, ["exclude_allergy_id"])
+    return {
+        "total": count(sql_conditions(filters)),
+        "cuisine": grouped(Recipe.cuisine_id, ["cuisine_id"]),
+        "difficulty": grouped(Recipe.difficulty, ["difficulty"]),
+        "diet": grouped(RecipeDiet.diet_id, ["diet_id"], RecipeDiet),
+        "allergy_free": {allergy_id: count(without_allergies + [Recipe.id.not_in(
+            select(RecipeAllergy.recipe_id).where(RecipeAllergy.allergy_id == allergy_id))]) for allergy_id in allergy_ids},
+        # the bucket's range replaces the time filter
+        "cooking_time": {name: count(sql_conditions({**filters, "min_time": low, "max_time": high}))
+                         for name, low, high in TIME_BUCKETS},
+    }
+
+
+def api_facets(body):
+    return {
+        "total": body["total"],
+        "cuisine": {item["id"]: item["count"] for item in body["cuisine"] if item["count"]},
+        "difficulty": {item["name"]: item["count"] for item in body["difficulty"] if item["count"]},
+        "diet": {item["id"]: item["count"] for item in body["diet"] if item["count"]},
+        "allergy_free": {item["id"]: item["count"] for item in body["allergy_free"]},
+        "cooking_time": {item["name"]: item["count"] for item in body["cooking_time"]},
+    }
+
+
+def test_counts_match_grouped_sql(client, db, make_recipe, make_allergy, cuisine):
+    diets = [unique("diet") for _ in range(2)]
+    allergies = [make_allergy() for _ in range(2)]
+    for number in range(16):
+        make_recipe(
+            difficulty=("Easy", "Medium", "Hard")[number % 3],
+            prep_time=number * 10, cook_time=number % 3 * 15,
+            diets=[diet for bit, diet in enumerate(diets) if number >> bit & 1],
+            allergies=[allergy for bit, allergy in enumerate(allergies) if number >> (bit + 2) & 1],
+        )
+    diet_ids = db.exec(select(Diet.id).where(Diet.name.in_(diets)).order_by(Diet.id)).all()
+
+    for filters in (
+        {},
+        {"cuisine_id": [cuisine]},
+        {"cuisine_id": [cuisine], "difficulty": ["Easy", "Hard"]},
+        {"cuisine_id": [cuisine], "diet_id": diet_ids},
+        {"cuisine_id": [cuisine], "diet_id": diet_ids, "diet_match": "all"},
+        {"cuisine_id": [cuisine], "exclude_allergy_id": allergies[:1]},
+        {"diet_id": diet_ids[1:], "exclude_allergy_id": allergies, "difficulty": ["Medium"]},
+    ):
+        response = client.get("/recipes/facets", params=filters)
+        assert response.status_code == 200, response.text
+        assert api_facets(response.json()) == sql_facets(db, filters), filters
+
+
+def test_time_buckets_ignore_the_time_filter(client, make_recipe, cuisine):
+    for minutes in (10, 45, 90, 200):
+        make_recipe(prep_time=minutes, cook_time=0)
+    body = client.get("/recipes/facets", params={"cuisine_id": cuisine, "min_time": 30, "max_time": 60}).json()
+    assert body["total"] == 1
+    assert [bucket["count"] for bucket in body["cooking_time"]] == [1, 1, 1, 1]
+
+
+def test_etag_moves_with_writes(client, user, cuisine):
+    first = client.get("/recipes/facets", params={"cuisine_id": cuisine})
+    assert first.json()["total"] == 0
+    etag = first.headers["etag"]
+    assert client.get("/recipes/facets", params={"cuisine_id": cuisine},
+                      headers={"If-None-Match": etag}).status_code == 304
+
+    for total in range(1, 11):
+        client.post("/recipes/", json={"title": unique("recipe"), "user_id": user["id"], "cuisine_id": cuisine})
+        after = client.get("/recipes/facets", params={"cuisine_id": cuisine}, headers={"If-None-Match": etag})
+        assert after.status_code == 200
+        assert after.json()["total"] == total
+        assert after.headers["etag"] != etag
+        etag = after.headers["etag"]
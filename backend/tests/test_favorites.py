@@ -0,0 +1,56 @@
+"""The favorites routes and the bulk membership check."""
+from app.routers.favorites import MAX_CHECK_RECIPES
+
+
+def favorite(client, user_id, recipe_id):
+    return client.post("/favorites/", json={"user_id": user_id, "recipe_id": recipe_id})
+
+
+def test_add_is_idempotent_and_remove(client, make_recipe, user):
+    recipe_id = make_recipe()
+    first = favorite(client, user["id"], recipe_id)
+    assert first.status_code == 200
+    again = favorite(client, user["id"], recipe_id)
+    assert again.status_code == 200 and again.json() == first.json()
+    assert client.get(f"/users/{user['id']}").json()["favorite_count"] == 1
+
+    assert client.delete(f"/favorites/{user['id']}/{recipe_id}").status_code == 200
+    assert client.delete(f"/favorites/{user['id']}/{recipe_id}").status_code == 404
+    assert client.get(f"/users/{user['id']}").json()["favorite_count"] == 0
+
+
+def test_add_checks_user_and_recipe(client, make_recipe, user):
+    assert favorite(client, 999999999, make_recipe()).json()["detail"] == "User not found"
+    assert favorite(client, user["id"], 999999999).json()["detail"] == "Recipe not found"
+
+
+def test_list_follows_the_cursor(client, make_recipe, user):
+    recipes = [make_recipe() for _ in range(5)]
+    for recipe_id in recipes:
+        favorite(client, user["id"], recipe_id)
+    listed, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get(f"/favorites/user/{user['id']}", params=params).json()
+        listed += [item["recipe_id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert listed == recipes and pages == 3
+
+
+def test_check_answers_a_page_in_one_query(client, make_recipe, user, statements):
+    recipes = [make_recipe() for _ in range(4)]
+    for recipe_id in recipes[1::2]:
+        favorite(client, user["id"], recipe_id)
+
+    statements.clear()
+    asked = [recipes[3], 999999999, recipes[0], recipes[1], recipes[3]]
+    response = client.get(f"/favorites/user/{user['id']}/check", params={"recipe_ids": asked})
+    assert response.json() == {"user_id": user["id"], "recipe_ids": [recipes[3], recipes[1]]}
+    assert len(statements) == 1
+
+    too_many = client.get(f"/favorites/user/{user['id']}/check",
+                          params={"recipe_ids": list(range(MAX_CHECK_RECIPES + 1))})
+    assert too_many.status_code == 400
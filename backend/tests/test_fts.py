@@ -0,0 +1,72 @@
+"""The FTS5 recipe index and the triggers that keep it in sync."""
+import pytest
+from sqlalchemy import text, update
+from sqlmodel import select
+
+from app.core import fts
+from app.core.database import engine
+from app.models.ingredient import Ingredient
+from app.models.user import User
+
+from conftest import unique
+
+pytestmark = pytest.mark.skipif(not fts.is_supported(engine), reason="needs SQLite FTS5")
+
+
+def word() -> str:
+    return unique("word").replace("-", "")
+
+
+def found(db, query: str):
+    return db.exec(select(fts.recipe_fts.c.rowid).where(fts.matches(fts.match_query(query)))).all()
+
+
+def test_indexes_title_description_ingredients_and_author(db, make_recipe, user):
+    title, description, ingredient = word(), word(), word()
+    recipe_id = make_recipe(title=f"{title} stew", description=f"with {description}", ingredients=[ingredient])
+    for query in (title, description, ingredient, user["display_name"], title[:4]):  # prefixes match too
+        assert recipe_id in found(db, query), query
+
+
+def test_follows_edits(client, db, make_recipe, user, cuisine):
+    old_title, new_title, old_ingredient, new_ingredient = word(), word(), word(), word()
+    recipe_id = make_recipe(title=old_title, ingredients=[old_ingredient])
+
+    client.put(f"/recipes/{recipe_id}", json={"title": new_title})
+    assert found(db, old_title) == [] and found(db, new_title) == [recipe_id]
+
+    client.post("/recipes/batch", json=[{"id": recipe_id, "title": new_title, "user_id": user["id"],
+                                         "cuisine_id": cuisine, "ingredients": [{"name": new_ingredient}]}])
+    assert found(db, old_ingredient) == [] and found(db, new_ingredient) == [recipe_id]
+
+    renamed = word()
+    db.exec(update(Ingredient).where(Ingredient.name == new_ingredient).values(name=renamed))
+    author = word()
+    db.exec(update(User).where(User.id == user["id"]).values(display_name=author))
+    db.commit()
+    assert found(db, renamed) == [recipe_id]
+    assert recipe_id in found(db, author)
+
+
+def test_deleted_recipe_leaves_the_index(client, db, user, cuisine):
+    title = word()
+    recipe_id = client.post("/recipes/", json={"title": title, "user_id": user["id"], "cuisine_id": cuisine}).json()["id"]
+    assert found(db, title) == [recipe_id]
+    client.delete(f"/recipes/{recipe_id}")
+    assert found(db, title) == []
+
+
+def test_rebuild_matches_the_trigger_maintained_index(db, make_recipe):
+    make_recipe(ingredients=[word(), word()])
+    contents = text(f"SELECT rowid, title, description, ingredients, author FROM {fts.FTS_TABLE} ORDER BY rowid")
+    connection = db.connection()
+    maintained = connection.execute(contents).all()
+    fts.rebuildFTS(connection)
+    assert connection.execute(contents).all() == maintained
+    assert fts.installFTS(connection) == []  # already there, nothing to do
+    db.rollback()
+
+
+def test_operators_are_searched_literally():
+    assert fts.match_query('salt AND "pepper" NEAR title:x') == '"salt"* "AND"* "pepper"* "NEAR"* "title"* "x"*'
+    assert fts.match_query("  !? ") is None
@@ -0,0 +1,56 @@
+"""In-place upgrade of an existing database.db (app/core/migrations.py)."""
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import SQLModel
+
+from app.core.migrations import upgradeDB
+
+BUNDLED = Path(__file__).resolve().parent.parent / "database.db"
+
+
+def row_counts(engine):
+    with engine.connect() as conn:
+        tables = inspect(conn).get_table_names()
+        return {table: conn.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar() for table in tables}
+
+
+@pytest.fixture
+def copy_engine(tmp_path):
+    """An engine on a copy of the bundled database, which is left as it is."""
+    shutil.copy(BUNDLED, tmp_path / "database.db")
+    engine = create_engine(f"sqlite:///{tmp_path / 'database.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_upgrades_the_bundled_database_once(copy_engine):
+    before = row_counts(copy_engine)
+    SQLModel.metadata.create_all(copy_engine)  # what createDB() runs first
+    changes = upgradeDB(copy_engine)
+    assert "created index ix_user_username" in changes
+    assert "created index ix_review_recipe_id_created_at_id" in changes
+    assert "added column recipe.rating_count" in changes and "backfilled recipe.rating_count" in changes
+    assert "created full-text index recipe_fts" in changes
+
+    inspector = inspect(copy_engine)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= existing, table.name
+    assert {name: count for name, count in row_counts(copy_engine).items() if name in before} == before
+    with copy_engine.connect() as conn:
+        stored = conn.execute(text("SELECT id, rating_count, rating_sum FROM recipe WHERE rating_count > 0 ORDER BY id"))
+        grouped = conn.execute(text("SELECT recipe_id, COUNT(*), SUM(rating) FROM review GROUP BY recipe_id ORDER BY recipe_id"))
+        assert stored.all() == grouped.all()
+        assert conn.execute(text("SELECT COUNT(*) FROM recipe_fts")).scalar() == before["recipe"]
+
+    assert upgradeDB(copy_engine) == []  # a second run has nothing left to do
+
+
+def test_duplicate_usernames_block_the_unique_index(copy_engine):
+    with copy_engine.begin() as conn:
+        conn.execute(text('UPDATE "user" SET username = (SELECT MIN(username) FROM "user")'))
+    with pytest.raises(RuntimeError, match="ix_user_username"):
+        upgradeDB(copy_engine)
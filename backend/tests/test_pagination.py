@@ -0,0 +1,65 @@
+"""Keyset cursors of the list endpoints."""
+from datetime import datetime
+
+from sqlmodel import select
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.recipe import Recipe
+
+from conftest import unique
+
+
+def walk(client, path, limit, **params):
+    """Every item of a listing, following next_cursor; also returns the number of pages."""
+    items, cursor, pages = [], None, 0
+    while True:
+        response = client.get(path, params={"limit": limit, **params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        items += body["items"]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+def test_cursor_round_trip():
+    moment = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(moment, 42)
+    assert decode_cursor(cursor) == (moment, 42)
+    assert "=" not in cursor
+
+
+def test_pages_cover_every_row_once_with_tied_timestamps(client, db, user, cuisine):
+    # rows sharing a created_at, so only the id breaks the ties
+    moment = datetime.utcnow()
+    db.add_all(Recipe(title=unique("recipe"), image_url="", difficulty="Easy", user_id=user["id"], cuisine_id=cuisine,
+                      created_at=moment, updated_at=moment) for _ in range(11))
+    db.commit()
+    expected = db.exec(select(Recipe.id).order_by(Recipe.created_at, Recipe.id)).all()
+    items, pages = walk(client, "/recipes/", limit=4)
+    assert [item["id"] for item in items] == expected
+    assert pages == -(-len(expected) // 4)
+
+
+def test_rows_added_behind_the_cursor_are_not_repeated(client, make_recipe):
+    for _ in range(3):
+        make_recipe()
+    first = client.get("/recipes/", params={"limit": 2}).json()
+    make_recipe()
+    rest, _ = walk(client, "/recipes/", limit=2, cursor=first["next_cursor"])
+    ids = [item["id"] for item in first["items"] + rest]
+    assert len(ids) == len(set(ids))
+
+
+def test_review_pages(client, make_recipe, user):
+    recipe_id = make_recipe()
+    created = [client.post("/reviews/", json={"recipe_id": recipe_id, "user_id": user["id"], "rating": rating,
+                                              "comment": "ok"}).json()["id"] for rating in (1, 2, 3, 4, 5)]
+    items, pages = walk(client, f"/reviews/recipe/{recipe_id}", limit=2)
+    assert [item["id"] for item in items] == created
+    assert pages == 3
+
+
+def test_invalid_cursor(client):
+    assert client.get("/recipes/", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,83 @@
+"""POST /recipes/by-ingredients and the shared recipe index plumbing."""
+import pytest
+from sqlmodel import select
+
+from app.core.recipe_index import INDEXES, Bitsets, RecipeIndex, unpack
+from app.models.ingredient import Ingredient
+from app.models.diet import Diet
+
+from conftest import unique
+
+np = pytest.importorskip("numpy")
+
+
+def cookable(client, **query):
+    response = client.post("/recipes/by-ingredients", json=query)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_index_missing_a_hook_fails_when_created():
+    class Incomplete(RecipeIndex):
+        def load(self, conn, condition):
+            return {}
+
+    before = len(INDEXES)
+    with pytest.raises(TypeError):
+        Incomplete(None)
+    assert len(INDEXES) == before
+
+
+def test_bitset_algebra():
+    bitsets = Bitsets()
+    bitsets.resize(16)
+    for key, rows in {1: (0, 3, 9), 2: (3, 9, 15), 3: (9,)}.items():
+        for row in rows:
+            bitsets.add(key, row)
+    everything = np.full(2, 0xFF, dtype=np.uint8)
+
+    def rows(bits):
+        return list(unpack(bits, 16).nonzero()[0])
+
+    assert rows(bitsets.any_of([1, 2], everything)) == [0, 3, 9, 15]
+    assert rows(bitsets.all_of([1, 2], everything)) == [3, 9]
+    assert rows(bitsets.all_of([1, 99], everything)) == []
+    assert rows(bitsets.none_of([3], bitsets.get(1))) == [0, 3]
+    bitsets.discard(1, 3)
+    assert rows(bitsets.get(1)) == [0, 9]
+
+
+def test_ranked_by_missing_then_used(client, db, make_recipe):
+    a, b, c, d, x = (unique("ingredient") for _ in range(5))
+    exact = make_recipe(ingredients=[a, b])
+    one_more = make_recipe(ingredients=[a, b, c])
+    one_used = make_recipe(ingredients=[a, d])
+    make_recipe(ingredients=[a, c, d])  # misses two
+    make_recipe(ingredients=[x])  # uses none
+    ids = dict(db.exec(select(Ingredient.name, Ingredient.id).where(Ingredient.name.in_([c, d]))).all())
+
+    result = cookable(client, ingredients=[a, b, "no such ingredient"], max_missing=1)
+    assert result["unknown_ingredients"] == ["no such ingredient"]
+    assert result["total"] == 3
+    assert [(item["recipe_id"], item["have"], item["missing_ingredient_ids"]) for item in result["items"]] == [
+        (exact, 2, []),
+        (one_more, 2, [ids[c]]),
+        (one_used, 1, [ids[d]]),
+    ]
+    assert [item["recipe_id"] for item in cookable(client, ingredients=[a, b])["items"]] == [exact]
+
+
+def test_diet_and_allergy_filters(client, db, make_recipe, make_allergy):
+    salt, vegan = unique("ingredient"), unique("diet")
+    nuts = make_allergy()
+    plain = make_recipe(ingredients=[salt])
+    vegan_recipe = make_recipe(ingredients=[salt], diets=[vegan])
+    vegan_with_nuts = make_recipe(ingredients=[salt], diets=[vegan], allergies=[nuts])
+    vegan_id = db.exec(select(Diet.id).where(Diet.name == vegan)).one()
+
+    def found(**filters):
+        return sorted(item["recipe_id"] for item in cookable(client, ingredients=[salt], **filters)["items"])
+
+    assert found() == sorted([plain, vegan_recipe, vegan_with_nuts])
+    assert found(diet_ids=[vegan_id]) == sorted([vegan_recipe, vegan_with_nuts])
+    assert found(diet_ids=[vegan_id], exclude_allergy_ids=[nuts]) == [vegan_recipe]
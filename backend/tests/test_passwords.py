@@ -0,0 +1,57 @@
+"""Password hashing in the process pool and the login checks."""
+from sqlmodel import select
+
+from app.core import security
+from app.core.security import hashpw, needs_rehash
+from app.models.user import User
+from app.routers import auths
+
+from conftest import unique
+
+
+def register(client, password="secret"):
+    username = unique("user")
+    response = client.post("/auth/register", json={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return username
+
+
+def login(client, username, password):
+    return client.post("/auth/login", json={"username": username, "password": password})
+
+
+def test_register_stores_a_bcrypt_hash(client, db):
+    username = register(client)
+    password_hash = db.exec(select(User.password_hash).where(User.username == username)).one()
+    assert password_hash.startswith("$2b$04$")
+    assert not needs_rehash(password_hash)
+    assert login(client, username, "secret").status_code == 200
+    assert login(client, username, "wrong").status_code == 401
+
+
+def test_unknown_username_is_checked_against_a_dummy_hash(client, monkeypatch):
+    checked = []
+
+    async def verify(password, password_hash):
+        checked.append(password_hash)
+        return await security.verify_password(password, password_hash)
+
+    monkeypatch.setattr(auths, "verify_password", verify)
+    assert login(client, unique("nobody"), "secret").status_code == 401
+    assert login(client, unique("nobody"), "secret").status_code == 401
+    assert len(checked) == 2 and checked[0] == checked[1]
+    assert checked[0].startswith("$2b$")
+
+
+def test_legacy_and_outdated_hashes_are_upgraded_on_login(client, db):
+    for stored in ("plain-secret", hashpw("plain-secret", rounds=5)):
+        user = User(username=unique("user"), display_name="Legacy", email=f"{unique('mail')}@example.com",
+                    password_hash=stored)
+        db.add(user)
+        db.commit()
+        assert needs_rehash(stored)
+        assert login(client, user.username, "plain-secret").status_code == 200
+        db.expire_all()
+        upgraded = db.get(User, user.id).password_hash
+        assert upgraded != stored and not needs_rehash(upgraded)
+        assert login(client, user.username, "plain-secret").status_code == 200
@@ -0,0 +1,53 @@
+"""Rating aggregates on Recipe, kept by one UPDATE per review write."""
+from sqlmodel import select
+
+from app.core.ratings import STARS, histogram_column, recompute_rating_aggregates
+from app.models.recipe import Recipe
+
+COLUMNS = [Recipe.rating_count, Recipe.rating_sum, Recipe.rating_avg] + [histogram_column(star) for star in STARS]
+
+
+def stats(client, recipe_id):
+    body = client.get(f"/recipes/{recipe_id}").json()
+    return body["rating_count"], body["rating_sum"], body["rating_avg"], body["rating_histogram"]
+
+
+def recomputed(db, recipe_id):
+    """The aggregates rebuilt from the review table, without keeping the rebuild."""
+    connection = db.connection()
+    recompute_rating_aggregates(connection)
+    row = connection.execute(select(*COLUMNS).where(Recipe.id == recipe_id)).one()
+    db.rollback()
+    return row[0], row[1], row[2], list(row[3:])
+
+
+def test_deltas_follow_create_edit_and_delete(client, db, make_recipe, user):
+    recipe_id = make_recipe()
+
+    def review(rating):
+        return client.post("/reviews/", json={"recipe_id": recipe_id, "user_id": user["id"], "rating": rating,
+                                              "comment": "ok"}).json()["id"]
+
+    five, three, _ = review(5), review(3), review(4)
+    assert stats(client, recipe_id) == (3, 12, 4.0, [0, 0, 1, 1, 1])
+
+    client.put(f"/reviews/{three}", json={"recipe_id": recipe_id, "user_id": user["id"], "rating": 1, "comment": "no"})
+    assert stats(client, recipe_id) == (3, 10, 10 / 3, [1, 0, 0, 1, 1])
+
+    client.delete(f"/reviews/{five}")
+    assert stats(client, recipe_id) == (2, 5, 2.5, [1, 0, 0, 1, 0])
+    assert stats(client, recipe_id) == recomputed(db, recipe_id)
+
+
+def test_last_review_removed_resets_the_average(client, make_recipe, user):
+    recipe_id = make_recipe()
+    review_id = client.post("/reviews/", json={"recipe_id": recipe_id, "user_id": user["id"], "rating": 2,
+                                               "comment": "ok"}).json()["id"]
+    client.delete(f"/reviews/{review_id}")
+    assert stats(client, recipe_id) == (0, 0, 0.0, [0, 0, 0, 0, 0])
+
+
+def test_review_of_unknown_recipe(client, user):
+    response = client.post("/reviews/", json={"recipe_id": 999999999, "user_id": user["id"], "rating": 3,
+                                              "comment": "ok"})
+    assert response.status_code == 404
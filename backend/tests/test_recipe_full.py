@@ -0,0 +1,30 @@
+"""GET /recipes/{id}/full: the whole recipe graph in a fixed number of queries."""
+from conftest import unique
+
+
+def test_fixed_query_count(client, make_recipe, make_allergy, statements):
+    allergies = [make_allergy() for _ in range(2)]
+    recipe_id = make_recipe(
+        ingredients=[unique("ingredient") for _ in range(8)],
+        instructions=[f"Step {number}" for number in range(1, 7)],
+        tags=[unique("tag") for _ in range(3)],
+        diets=[unique("diet") for _ in range(2)],
+        allergies=allergies,
+    )
+    statements.clear()
+    response = client.get(f"/recipes/{recipe_id}/full")
+    assert response.status_code == 200
+    # the recipe joined to cuisine and author, then one SELECT ... IN per collection
+    assert len(statements) == 6, statements
+
+    body = response.json()
+    assert [len(body[name]) for name in ("ingredients", "instructions", "tags", "diets", "allergies")] == [8, 6, 3, 2, 2]
+    assert [item["ord"] for item in body["ingredients"]] == list(range(1, 9))
+    assert [step["description"] for step in body["instructions"]] == [f"Step {number}" for number in range(1, 7)]
+    assert sorted(allergy["id"] for allergy in body["allergies"]) == allergies
+    assert body["author"]["id"] == body["user_id"]
+    assert body["cuisine"]["id"] == body["cuisine_id"]
+
+
+def test_unknown_recipe(client):
+    assert client.get("/recipes/999999999/full").status_code == 404
@@ -0,0 +1,109 @@
+"""GET /users/{id}/recommendations: the item-item model, its fallback and its refresh."""
+import time
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from app.core import recommendations
+from app.core.recommendations import Recommender, recommender
+from app.routers import users
+
+from conftest import unique
+
+pytestmark = pytest.mark.skipif(not recommendations.available(), reason="needs numpy and scipy")
+
+
+def new_user(client) -> int:
+    name = unique("user")
+    return client.post("/users/", json={
+        "username": name, "display_name": name, "email": f"{name}@example.com", "password": "secret",
+    }).json()["id"]
+
+
+def favorite(client, user_id, recipe_id):
+    assert client.post("/favorites/", json={"user_id": user_id, "recipe_id": recipe_id}).status_code == 200
+
+
+def recommend(client, user_id):
+    response = client.get(f"/users/{user_id}/recommendations", params={"limit": 50})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_neighbors_of_liked_recipes(client, make_recipe):
+    first, second, third, disliked = (make_recipe() for _ in range(4))
+    fan, bigger_fan, newcomer, critic = (new_user(client) for _ in range(4))
+    favorite(client, fan, first)
+    favorite(client, fan, second)
+    for recipe_id in (first, second, third):
+        favorite(client, bigger_fan, recipe_id)
+    favorite(client, newcomer, first)
+    for recipe_id, rating in ((first, 5), (disliked, 1)):  # 1-2 stars carry no weight
+        client.post("/reviews/", json={"recipe_id": recipe_id, "user_id": critic, "rating": rating, "comment": "ok"})
+    client.portal.call(recommender.refresh)
+
+    result = recommend(client, newcomer)
+    assert result["fallback"] is False and result["model_built_at"] is not None
+    scores = {item["recipe_id"]: item["score"] for item in result["items"]}
+    # cosine over the users: first is liked by four users, second by two of them, third by one
+    assert scores[second] == round(2 / (4 * 2) ** 0.5, 4)
+    assert scores[third] == round(1 / 4 ** 0.5, 4)
+    assert first not in scores and disliked not in scores
+    assert list(scores)[:2] == [second, third]
+
+
+def test_user_without_history_gets_popular_recipes(client, make_recipe):
+    liked = make_recipe()
+    favorite(client, new_user(client), liked)
+    client.portal.call(recommender.refresh)
+
+    result = recommend(client, new_user(client))
+    assert result["fallback"] is True and result["items"]
+    assert all(item["score"] == 0.0 for item in result["items"])
+    assert liked in [item["recipe_id"] for item in result["items"]]
+
+
+def test_falls_back_to_top_rated_before_any_interactions(client, make_recipe, monkeypatch, tmp_path):
+    empty = create_engine(f"sqlite:///{tmp_path}/empty.db")
+    SQLModel.metadata.create_all(empty)
+    monkeypatch.setattr(users, "recommender", Recommender(empty))
+    best = make_recipe()
+    client.post("/reviews/", json={"recipe_id": best, "user_id": new_user(client), "rating": 5, "comment": "top"})
+
+    result = recommend(client, new_user(client))
+    assert result["fallback"] is True and result["model_built_at"] is None
+    top_rated = client.get("/recipes/search", params={"sort": "top_rated", "limit": 50}).json()["items"]
+    assert [item["recipe_id"] for item in result["items"]] == [recipe["id"] for recipe in top_rated]
+    assert best in [recipe["id"] for recipe in top_rated]
+
+
+def test_request_builds_once_interactions_arrive(client, tmp_path):
+    empty = create_engine(f"sqlite:///{tmp_path}/empty.db")
+    SQLModel.metadata.create_all(empty)
+    cold = Recommender(empty)
+    assert client.portal.call(cold.current) is None
+    with empty.begin() as conn:
+        conn.execute(recommendations.Favorite.__table__.insert(), [
+            {"user_id": 1, "recipe_id": 1}, {"user_id": 1, "recipe_id": 2}])
+    assert client.portal.call(cold.current) is None  # nobody announced the write
+    cold.changed()
+    model = client.portal.call(cold.current)
+    assert model is not None and list(model.recipe_ids) == [1, 2]
+
+
+def test_writes_wake_the_refresh_loop(client, make_recipe):
+    first, second = make_recipe(), make_recipe()
+    fan, newcomer = new_user(client), new_user(client)
+    favorite(client, fan, first)
+    favorite(client, newcomer, first)
+    before = recommend(client, newcomer)["model_built_at"]
+
+    favorite(client, fan, second)  # no refresh() here: the route wakes Recommender.run()
+    deadline = time.monotonic() + 10
+    while True:
+        result = recommend(client, newcomer)
+        if second in [item["recipe_id"] for item in result["items"]]:
+            break
+        assert time.monotonic() < deadline, "the model was not rebuilt after the favorite"
+        time.sleep(0.05)
+    assert result["fallback"] is False and result["model_built_at"] != before
@@ -0,0 +1,48 @@
+"""GET /recipes/search with a text query, and the SQL filters behind it."""
+from sqlmodel import select
+
+from app.models.recipe import Recipe
+from app.routers.recipes import _like_pattern, _recipe_filters
+
+from conftest import unique
+
+
+def search(client, **params):
+    response = client.get("/recipes/search", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_query_with_filters_and_total(client, make_recipe, cuisine):
+    word = unique("paella").replace("-", "")
+    easy = make_recipe(title=f"{word} quick", difficulty="Easy", prep_time=10, cook_time=10)
+    hard = make_recipe(title=f"{word} feast", difficulty="Hard", prep_time=60, cook_time=90)
+    make_recipe(title="Something else", difficulty="Easy")
+
+    page = search(client, q=word, limit=1)
+    assert page["total"] == 2 and len(page["items"]) == 1
+    assert search(client, q=word, difficulty="Hard")["items"][0]["id"] == hard
+    assert [item["id"] for item in search(client, q=word, max_time=30)["items"]] == [easy]
+    assert search(client, q=word, cuisine_id=cuisine, min_time=100)["total"] == 1
+    assert search(client, q=word, min_rating=4)["total"] == 0
+
+
+def test_query_matches_the_author(client, make_recipe, user):
+    recipe_id = make_recipe()
+    assert recipe_id in [item["id"] for item in search(client, q=user["display_name"], limit=100)["items"]]
+
+
+def test_like_fallback_escapes_wildcards(db, make_recipe, cuisine):
+    percent = make_recipe(title="Save 100% of the flavour")
+    make_recipe(title="Save 1000 calories")
+    assert _like_pattern("100%_x") == "%100\\%\\_x%"
+    found = db.exec(select(Recipe.id).where(Recipe.cuisine_id == cuisine,
+                                            *_recipe_filters("100%", [], [], [], None, None))).all()
+    assert found == [percent]
+
+
+def test_blank_query_lists_everything(client, make_recipe, cuisine):
+    ids = [make_recipe() for _ in range(3)]
+    page = search(client, q="   ", cuisine_id=cuisine)
+    assert page["total"] == 3
+    assert sorted(item["id"] for item in page["items"]) == ids
@@ -0,0 +1,56 @@
+"""GET /recipes/{id}/similar: the MinHash index and its upkeep."""
+import pytest
+
+from app.core import similarity
+from app.core.similarity import SIGNATURE_SIZE, signature
+
+from conftest import unique
+
+pytestmark = pytest.mark.skipif(not similarity.available(), reason="needs numpy")
+
+
+def similar(client, recipe_id):
+    response = client.get(f"/recipes/{recipe_id}/similar", params={"limit": 50})
+    assert response.status_code == 200, response.text
+    return {item["recipe_id"]: item["score"] for item in response.json()["items"]}
+
+
+def test_signature_agreement_estimates_jaccard():
+    shared = set(range(300))
+    first, second = signature(shared | set(range(1000, 1100))), signature(shared | set(range(2000, 2100)))
+    assert abs((first == second).mean() - 300 / 500) < 3 / SIGNATURE_SIZE ** 0.5
+    assert (signature(shared) == signature(set(range(300)))).all()  # rebuilds give the same rows
+
+
+def test_ranked_by_exact_jaccard(client, make_recipe):
+    ingredients = [unique("ingredient") for _ in range(6)]
+    base = make_recipe(ingredients=ingredients[:4])
+    close = make_recipe(ingredients=ingredients[:3] + ingredients[4:5])
+    far = make_recipe(ingredients=ingredients[:1] + ingredients[5:])
+    scores = similar(client, base)
+    # tokens are the ingredients plus the shared cuisine
+    assert scores[close] == round(4 / 6, 4)
+    assert scores[far] == round(2 / 6, 4)
+    assert base not in scores
+
+
+def test_follows_edits_right_away(client, make_recipe, user, cuisine):
+    ingredients = [unique("ingredient") for _ in range(3)]
+    base = make_recipe(ingredients=ingredients)
+    other = make_recipe(ingredients=[unique("ingredient")])
+    assert similar(client, base)[other] == round(1 / 5, 4)
+    replaced = client.post("/recipes/batch", json=[{
+        "id": other, "title": unique("recipe"), "user_id": user["id"], "cuisine_id": cuisine,
+        "ingredients": [{"name": name} for name in ingredients],
+    }]).json()
+    assert replaced["updated"] == 1
+    assert similar(client, base)[other] == 1.0
+
+
+def test_unknown_recipe_is_404_without_queries(client, make_recipe):
+    similar(client, make_recipe())  # builds the index and applies the pending writes
+    for _ in range(5):
+        response = client.get("/recipes/999999999/similar")
+        assert response.status_code == 404
+        # statements run for the request, a refresh included (it inherits the request's stats)
+        assert 'desc="0 queries"' in response.headers["server-timing"]
@@ -0,0 +1,51 @@
+"""Signed HS256 login tokens and the query-free auth dependency."""
+import base64
+import json
+
+from app.core.security import create_token, decode_token
+from app.schemas.user_schema import TokenData
+
+from conftest import unique
+
+
+def me(client, token):
+    return client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_login_token_authenticates_without_queries(client, statements):
+    username = unique("user")
+    user_id = client.post("/auth/register", json={"username": username, "password": "secret"}).json()["user_id"]
+    login = client.post("/auth/login", json={"username": username, "password": "secret"}).json()
+    assert login["user_id"] == user_id and login["expires_in"] > 0
+
+    statements.clear()
+    response = me(client, login["token"])
+    assert response.status_code == 200
+    assert response.json() == {"id": user_id, "username": username, "display_name": username}
+    assert statements == []
+
+
+def test_rejected_tokens(client):
+    user = TokenData(id=1, username="someone", display_name="Someone")
+    header, payload, signature = create_token(user).split(".")
+    forged_claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    forged_claims["sub"] = "2"
+    forged = base64.urlsafe_b64encode(json.dumps(forged_claims).encode()).decode().rstrip("=")
+    unsigned = base64.urlsafe_b64encode(b'{"alg":"none","typ":"JWT"}').decode().rstrip("=")
+
+    for token in (
+        f"{header}.{forged}.{signature}",  # claims changed after signing
+        f"{unsigned}.{payload}.",  # alg=none
+        create_token(user, ttl=-1),  # expired
+        "not.a-token",
+        "",
+    ):
+        response = me(client, token)
+        assert response.status_code == 401, token
+        assert response.headers["www-authenticate"] == "Bearer"
+    assert client.get("/auth/me").status_code == 401
+
+
+def test_round_trip():
+    user = TokenData(id=7, username="cook", display_name="The Cook")
+    assert decode_token(create_token(user)) == user
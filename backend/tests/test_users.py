@@ -0,0 +1,50 @@
+"""The user routes: profile counts, batch lookup and the sign-up checks."""
+from app.models.favorite import Favorite
+from app.routers.users import MAX_BATCH_USERS
+
+from conftest import unique
+
+
+def sign_up(client, **fields):
+    name = unique("user")
+    body = {"username": name, "display_name": name, "email": f"{name}@example.com", "password": "secret", **fields}
+    return client.post("/users/", json=body)
+
+
+def test_duplicate_username_or_email(client, user):
+    taken_name = sign_up(client, username=user["username"])
+    assert taken_name.status_code == 400 and taken_name.json()["detail"] == "Username already registered"
+    taken_email = sign_up(client, email=user["email"])
+    assert taken_email.status_code == 400 and taken_email.json()["detail"] == "Email already registered"
+
+
+def test_register_conflicting_with_an_existing_email(client):
+    # /auth/register derives the email from the username; only the unique index sees the clash
+    name = unique("user")
+    assert sign_up(client, email=f"{name}@example.com").status_code == 200
+    response = client.post("/auth/register", json={"username": name, "password": "secret"})
+    assert response.status_code == 400
+
+
+def test_profile_counts(client, db, make_recipe, user):
+    recipes = [make_recipe() for _ in range(3)]
+    db.add_all(Favorite(user_id=user["id"], recipe_id=recipe_id) for recipe_id in recipes[:2])
+    db.commit()
+    client.post("/reviews/", json={"recipe_id": recipes[0], "user_id": user["id"], "rating": 4, "comment": "ok"})
+
+    profile = client.get(f"/users/{user['id']}").json()
+    assert (profile["recipe_count"], profile["favorite_count"], profile["review_count"]) == (3, 2, 1)
+    assert client.get(f"/users/username/{user['username']}").json() == profile
+    assert client.get("/users/999999999").status_code == 404
+
+
+def test_batch_lookup_keeps_the_request_order(client, make_recipe, user):
+    make_recipe()
+    other = sign_up(client).json()
+    response = client.get("/users/batch", params={"ids": [other["id"], 999999999, user["id"], other["id"]]})
+    assert response.status_code == 200
+    # unknown ids are skipped and repeats answered once
+    assert [(item["id"], item["recipe_count"]) for item in response.json()] == [(other["id"], 0), (user["id"], 1)]
+
+    too_many = client.get("/users/batch", params={"ids": list(range(1, MAX_BATCH_USERS + 2))})
+    assert too_many.status_code == 400
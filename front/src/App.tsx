@@ -992,22 +992,71 @@ export default function App() {
     loadData();
   }, []);
 
+  // Option counts for the sidebar, refetched when the search or the filters change
+  const [facets, setFacets] = useState<api.RecipeFacets | null>(null);
+
+  useEffect(() => {
+    // the sidebar works with names, the API with ids; the last facets map one to the other
+    const idsOf = (options: api.FacetCount[] | undefined, names: string[]) =>
+      names.map(name => options?.find(option => option.name === name)?.id).filter((id): id is number => id != null);
+    const buckets = facets?.cooking_time.filter(bucket => filters.cookingTime.includes(bucket.name)) ?? [];
+    const timer = setTimeout(() => {
+      api.getRecipeFacets({
+        q: searchQuery.trim() || undefined,
+        difficulty: filters.difficulty,
+        cuisine_id: idsOf(facets?.cuisine, filters.cuisine),
+        diet_id: idsOf(facets?.diet, filters.dietary),
+        exclude_allergy_id: idsOf(facets?.allergy_free, filters.allergies),
+        min_time: buckets.length ? Math.min(...buckets.map(bucket => bucket.min_time)) : undefined,
+        max_time: buckets.length && buckets.every(bucket => bucket.max_time !== null)
+          ? Math.max(...buckets.map(bucket => bucket.max_time as number))
+          : undefined,
+      })
+        .then(setFacets)
+        .catch(err => console.error("Error loading facet counts:", err));
+    }, 250); // typing in the search box settles first
+    return () => clearTimeout(timer);
+  }, [searchQuery, filters]);
+
+  const countsByName = (options: api.FacetCount[]) =>
+    Object.fromEntries(options.map(option => [option.name, option.count]));
+  const facetCounts = facets ? {
+    dietary: countsByName(facets.diet),
+    allergies: countsByName(facets.allergy_free),
+    cuisine: countsByName(facets.cuisine),
+    difficulty: countsByName(facets.difficulty),
+    cookingTime: countsByName(facets.cooking_time),
+  } : undefined;
+
+  // Mark the signed-in user's favorites among the loaded recipes, one request per page
+  useEffect(() => {
+    if (!currentUserId || recipes.length === 0) return;
+    api.getFavoritedIds(currentUserId, recipes.map(recipe => recipe.id))
+      .then(ids => {
+        const favorited = new Set(ids);
+        setRecipes(prev => prev.map(recipe => ({ ...recipe, isFavorite: favorited.has(recipe.id) })));
+      })
+      .catch(err => console.error("Error loading favorites:", err));
+  }, [currentUserId, recipes.length]);
+
   const loadData = async () => {
     try {
       setLoading(true);
       setError(null);
       
-      const [recipesData, reviewsData] = await Promise.all([
+      const [recipesPage, reviewsPage] = await Promise.all([
         api.getRecipes(),
         api.getReviews()
       ]);
+      const recipesData = recipesPage.items;
+      const reviewsData = reviewsPage.items;
       
       // Transform backend data to match frontend expectations
       const transformedRecipes = recipesData.map((recipe: any) => ({
         ...recipe,
         author: recipe.user_id ? `User ${recipe.user_id}` : "Anonymous",
-        rating: 0, // Will be calculated from reviews
-        reviewCount: 0,
+        rating: recipe.rating_avg || 0, // maintained by the backend on every review write
+        reviewCount: recipe.rating_count || 0,
         cookTime: `${recipe.cook_time || 0} min`,
         prepTime: `${recipe.prep_time || 0} min`,
         totalTime: `${(recipe.prep_time || 0) + (recipe.cook_time || 0)} min`,
@@ -1196,12 +1245,25 @@ const handleSignUp = async (displayName: string, email: string, username: string
     }
   };
 
-  const handleFavoriteToggle = (recipeId: number) => {
-    setRecipes(prev => prev.map(recipe => 
+  const handleFavoriteToggle = async (recipeId: number) => {
+    const wasFavorite = recipes.find(recipe => recipe.id === recipeId)?.isFavorite;
+    const setFavorite = (isFavorite: boolean) => setRecipes(prev => prev.map(recipe => 
       recipe.id === recipeId 
-        ? { ...recipe, isFavorite: !recipe.isFavorite }
+        ? { ...recipe, isFavorite }
         : recipe
     ));
+    setFavorite(!wasFavorite);
+    if (!currentUserId) return;
+    try {
+      if (wasFavorite) {
+        await api.removeFavorite(currentUserId, recipeId);
+      } else {
+        await api.addFavorite(currentUserId, recipeId);
+      }
+    } catch (err) {
+      console.error("Error updating favorite:", err);
+      setFavorite(!!wasFavorite);
+    }
   };
 
   const handleFilterChange = (category: string, value: string, checked: boolean) => {
@@ -1225,7 +1287,7 @@ const handleSignUp = async (displayName: string, email: string, username: string
 
   const handleUploadRecipe = async (recipeData: any) => {
     try {
-      const newRecipe = await api.createRecipe({
+      const result = await api.saveRecipes([{
         title: recipeData.title,
         description: recipeData.description,
         image_url: recipeData.image,
@@ -1235,7 +1297,11 @@ const handleSignUp = async (displayName: string, email: string, username: string
         difficulty: recipeData.difficulty,
         cuisine_id: 1,
         user_id: currentUserId || 1,
-      });
+        ingredients: recipeData.ingredients.map((name: string) => ({ name })),
+        instructions: recipeData.instructions,
+        diets: recipeData.dietary,
+      }]);
+      if (result.failed) throw new Error(result.items[0].detail);
       
       await loadData();
       setIsUploadModalOpen(false);
@@ -1511,6 +1577,7 @@ const handleSignUp = async (displayName: string, email: string, username: string
               isOpen={true}
               onClose={() => {}}
               filters={filters}
+              counts={facetCounts}
               onFilterChange={handleFilterChange}
               onClearFilters={handleClearFilters}
             />
@@ -1589,6 +1656,7 @@ const handleSignUp = async (displayName: string, email: string, username: string
         isOpen={isFilterOpen}
         onClose={() => setIsFilterOpen(false)}
         filters={filters}
+        counts={facetCounts}
         onFilterChange={handleFilterChange}
         onClearFilters={handleClearFilters}
       />
@@ -3,9 +3,70 @@ const API_URL = "http://localhost:8000";
 
 // ... (Recipe API functions are unchanged) ...
 // Recipe API
-export async function getRecipes() {
-  const response = await fetch(`${API_URL}/recipes`);
+// List endpoints are cursor-paginated: pass back `next_cursor` to get the next page
+export async function getRecipes(cursor?: string, limit?: number) {
+  const query = new URLSearchParams();
+  if (cursor) query.append("cursor", cursor);
+  if (limit) query.append("limit", String(limit));
+  const response = await fetch(`${API_URL}/recipes?${query}`);
   if (!response.ok) throw new Error("Failed to fetch recipes");
+  return response.json(); // { items, next_cursor }
+}
+
+// Filters shared by the search listing and its facet counts
+export interface RecipeFilters {
+  q?: string;
+  difficulty?: string[];
+  cuisine_id?: number[];
+  diet_id?: number[];
+  diet_match?: "any" | "all";
+  exclude_allergy_id?: number[];
+  min_time?: number;
+  max_time?: number;
+  min_rating?: number;
+}
+
+function filterQuery(params: Record<string, any>) {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value === undefined || value === null || value === "") return;
+    if (Array.isArray(value)) value.forEach(v => query.append(key, String(v)));
+    else query.append(key, String(value));
+  });
+  return query;
+}
+
+// Server-side search: filters run in the database and only one page comes back
+export async function searchRecipes(params: RecipeFilters & {
+  sort?: "newest" | "top_rated";
+  limit?: number;
+  offset?: number;
+}) {
+  const response = await fetch(`${API_URL}/recipes/search?${filterQuery(params)}`);
+  if (!response.ok) throw new Error("Failed to search recipes");
+  return response.json(); // { items, total, limit, offset }
+}
+
+export interface FacetCount {
+  id: number | null;
+  name: string;
+  count: number;
+}
+
+export interface RecipeFacets {
+  total: number;
+  cuisine: FacetCount[];
+  difficulty: FacetCount[];
+  diet: FacetCount[];
+  allergy_free: FacetCount[];
+  cooking_time: (FacetCount & { min_time: number; max_time: number | null })[];
+}
+
+// Counts for the sidebar options under the current filters; each facet
+// ignores its own filter, so unticked options show what they would add
+export async function getRecipeFacets(params: RecipeFilters): Promise<RecipeFacets> {
+  const response = await fetch(`${API_URL}/recipes/facets?${filterQuery(params)}`);
+  if (!response.ok) throw new Error("Failed to fetch facet counts");
   return response.json();
 }
 
@@ -30,6 +91,23 @@ export async function createRecipe(data: any) {
   return response.json();
 }
 
+// Create (or, with an id, replace) recipes together with their ingredients,
+// instructions, tags and diets in one request; results come back per recipe
+export async function saveRecipes(recipes: any[]) {
+  const response = await fetch(`${API_URL}/recipes/batch`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(recipes),
+  });
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.detail || "Failed to save recipes");
+  }
+  return response.json();
+}
+
 export async function updateRecipe(id: number, data: any) {
   const response = await fetch(`${API_URL}/recipes/${id}`, {
     method: "PUT",
@@ -51,16 +129,20 @@ export async function deleteRecipe(id: number) {
 }
 
 // Review API
-export async function getReviews() {
-  const response = await fetch(`${API_URL}/reviews`);
+export async function getReviews(cursor?: string, limit?: number) {
+  const query = new URLSearchParams();
+  if (cursor) query.append("cursor", cursor);
+  if (limit) query.append("limit", String(limit));
+  const response = await fetch(`${API_URL}/reviews?${query}`);
   if (!response.ok) throw new Error("Failed to fetch reviews");
-  return response.json();
+  return response.json(); // { items, next_cursor }
 }
 
-export async function getReviewsForRecipe(recipeId: number) {
-  const response = await fetch(`${API_URL}/reviews/recipe/${recipeId}`);
+export async function getReviewsForRecipe(recipeId: number, cursor?: string) {
+  const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+  const response = await fetch(`${API_URL}/reviews/recipe/${recipeId}${query}`);
   if (!response.ok) throw new Error("Failed to fetch reviews for recipe");
-  return response.json();
+  return response.json(); // { items, next_cursor }
 }
 
 export async function createReview(data: {
@@ -101,11 +183,48 @@ export async function deleteReview(id: number) {
 }
 // ... (Review API functions are unchanged) ...
 
+// Favorite API
+export async function addFavorite(userId: number, recipeId: number) {
+  const response = await fetch(`${API_URL}/favorites`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ user_id: userId, recipe_id: recipeId }),
+  });
+  if (!response.ok) throw new Error("Failed to add favorite");
+  return response.json();
+}
+
+export async function removeFavorite(userId: number, recipeId: number) {
+  const response = await fetch(`${API_URL}/favorites/${userId}/${recipeId}`, {
+    method: "DELETE",
+  });
+  if (!response.ok && response.status !== 404) throw new Error("Failed to remove favorite");
+}
+
+// Which of these recipes the user has favorited: one request per 200 ids
+export async function getFavoritedIds(userId: number, recipeIds: number[]): Promise<number[]> {
+  const chunks = [];
+  for (let start = 0; start < recipeIds.length; start += 200) {
+    chunks.push(recipeIds.slice(start, start + 200));
+  }
+  const pages = await Promise.all(chunks.map(async (ids) => {
+    const query = new URLSearchParams();
+    ids.forEach((id) => query.append("recipe_ids", String(id)));
+    const response = await fetch(`${API_URL}/favorites/user/${userId}/check?${query}`);
+    if (!response.ok) throw new Error("Failed to check favorites");
+    return (await response.json()).recipe_ids as number[];
+  }));
+  return pages.flat();
+}
+
 // User API
-export async function getUsers() {
- const response = await fetch(`${API_URL}/users`);
+export async function getUsers(cursor?: string) {
+ const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+ const response = await fetch(`${API_URL}/users${query}`);
  if (!response.ok) throw new Error("Failed to fetch users");
- return response.json();
+ return response.json(); // { items, next_cursor }
 }
 
 export async function getUserById(id: number) {
@@ -16,6 +16,8 @@ interface FilterSidebarProps {
   };
   onFilterChange: (category: string, value: string, checked: boolean) => void;
   onClearFilters: () => void;
+  // matching recipes per option, by category then option name (from GET /recipes/facets)
+  counts?: Record<string, Record<string, number>>;
 }
 
 export function FilterSidebar({
@@ -24,9 +26,16 @@ export function FilterSidebar({
   filters,
   onFilterChange,
   onClearFilters,
+  counts,
 }: FilterSidebarProps) {
   if (!isOpen) return null;
 
+  const optionCount = (category: string, option: string) => {
+    const count = counts?.[category]?.[option];
+    if (count === undefined) return null;
+    return <span className="ml-1 text-xs text-[#4a6741] opacity-70">({count})</span>;
+  };
+
   const filterOptions = {
     dietary: ["Vegetarian", "Vegan", "Gluten-Free", "Keto", "Paleo", "Low-Carb", "Dairy-Free"],
     allergies: ["Nuts", "Dairy", "Eggs", "Soy", "Shellfish", "Fish", "Gluten"],
@@ -96,6 +105,7 @@ export function FilterSidebar({
                       className="text-sm text-[#2d3e1f]"
                     >
                       {option}
+                      {optionCount("dietary", option)}
                     </Label>
                   </div>
                 ))}
@@ -124,6 +134,7 @@ export function FilterSidebar({
                       className="text-sm text-[#2d3e1f]"
                     >
                       {option}-Free
+                      {optionCount("allergies", option)}
                     </Label>
                   </div>
                 ))}
@@ -152,6 +163,7 @@ export function FilterSidebar({
                       className="text-sm text-[#2d3e1f]"
                     >
                       {option}
+                      {optionCount("cuisine", option)}
                     </Label>
                   </div>
                 ))}
@@ -180,6 +192,7 @@ export function FilterSidebar({
                       className="text-sm text-[#2d3e1f]"
                     >
                       {option}
+                      {optionCount("difficulty", option)}
                     </Label>
                   </div>
                 ))}
@@ -208,6 +221,7 @@ export function FilterSidebar({
                       className="text-sm text-[#2d3e1f]"
                     >
                       {option}
+                      {optionCount("cookingTime", option)}
                     </Label>
                   </div>
                 ))}